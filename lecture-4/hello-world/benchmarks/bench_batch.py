@@ -0,0 +1,111 @@
+"""式の一括計算（calc_batch）のベンチマーク
+
+同じ式を多数の x について、evaluate_expression を1要素ずつ呼ぶ Python のループと
+evaluate_batch（NumPy でまとめて計算）で計算し、時間を比較する。
+x には負の数と 0 も入れて、定義域外（"Error"）になる要素と表示の文字列が
+1要素ずつ計算した場合と一致するか、format_numbers の丸めが format_number と同じかも確かめる。
+
+実行: python benchmarks/bench_batch.py [--size 1000000] [--check 200000]
+"""
+import argparse
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "src"))
+
+import numpy as np  # noqa: E402
+from calc_batch import display_strings, evaluate_batch, format_numbers  # noqa: E402
+from calc_expr import CalcError, evaluate_expression, format_number  # noqa: E402
+
+EXPRESSIONS = [
+    "x²",
+    "2x + 1",
+    "sin(x)² + cos(x)²",
+    "√x",
+    "ln(x) / log(x)",
+    "1 / x",
+    "x ^ 0.5 + 10%",
+    "tan(x) * e ^ -x",
+]
+
+
+def python_loop(source, xs):
+    """従来相当: 1要素ずつ計算する（CalcError は None）"""
+    out = []
+    for x in xs:
+        try:
+            out.append(evaluate_expression(source, {"x": x}))
+        except CalcError:
+            out.append(None)
+    return out
+
+
+def compare(expected, values):
+    """(Error かどうかの不一致数, 表示の不一致数, 表示が違う要素の最大相対差)
+
+    sin・pow などは math と NumPy で最後の1ビットが違うことがあり、その差が
+    10桁の丸めで表示に出る場合がある。丸め自体の一致は format_numbers で別に確かめる。
+    """
+    got = display_strings(values)
+    error_mismatches = 0
+    display_mismatches = 0
+    worst = 0.0
+    for value, batch, text in zip(expected, values.tolist(), got):
+        if (value is None) != (text == "Error"):
+            error_mismatches += 1
+        elif value is not None and str(format_number(value)) != text:
+            display_mismatches += 1
+            worst = max(worst, abs(batch - value) / abs(value))
+    return error_mismatches, display_mismatches, worst
+
+
+def make_points(size, seed=0):
+    rng = np.random.default_rng(seed)
+    xs = rng.uniform(-1000, 1000, size)
+    # 0・整数・小さい数も混ぜる
+    xs[::97] = 0.0
+    xs[1::89] = np.round(xs[1::89])
+    xs[2::83] *= 1e-12
+    return xs
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--size", type=int, default=1_000_000)
+    parser.add_argument("--check", type=int, default=200_000, help="Python のループで計算する要素数")
+    args = parser.parse_args()
+
+    xs = make_points(args.size)
+    check = xs[:args.check].tolist()
+    print(f"要素数 {args.size:,}（Python のループは先頭 {len(check):,} 要素で測り、1要素あたりで比較）")
+    for source in EXPRESSIONS:
+        start = time.perf_counter()
+        expected = python_loop(source, check)
+        loop_seconds = (time.perf_counter() - start) / len(check)
+
+        evaluate_batch(source, {"x": xs[:1000]})  # 初回のコンパイルを除く
+        start = time.perf_counter()
+        values = evaluate_batch(source, {"x": xs})
+        batch_seconds = (time.perf_counter() - start) / len(xs)
+
+        error_mismatches, display_mismatches, worst = compare(expected, values[:len(check)])
+        errors = int(np.isnan(values).sum())
+        print(f"{source:20s} ループ {loop_seconds * 1e9:5.0f} ns/要素  一括 {batch_seconds * 1e9:5.1f} ns/要素  "
+              f"({loop_seconds / batch_seconds:4.0f} 倍)  Error {errors:7,d} 件  "
+              f"Error の不一致 {error_mismatches} 件  表示の不一致 {display_mismatches} 件 (相対差 {worst:.1e})")
+
+    # format_number の丸めの一致（NumPy 側で計算した値に両方を適用して比べる）
+    values = evaluate_batch("x / 7 + x", {"x": xs})
+    start = time.perf_counter()
+    formatted = format_numbers(values)
+    vector_seconds = time.perf_counter() - start
+    start = time.perf_counter()
+    expected = [format_number(value) for value in values.tolist()]
+    loop_seconds = time.perf_counter() - start
+    mismatches = int(np.count_nonzero(formatted != np.array(expected, dtype=np.float64)))
+    print(f"format_numbers       ループ {loop_seconds / len(xs) * 1e9:5.0f} ns/要素  "
+          f"一括 {vector_seconds / len(xs) * 1e9:5.1f} ns/要素  不一致 {mismatches} 件")
+
+if __name__ == "__main__":
+    main()
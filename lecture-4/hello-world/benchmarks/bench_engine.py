@@ -0,0 +1,174 @@
+"""キー操作の処理（CalculatorEngine）のベンチマーク
+
+従来の button_clicked（キーの文字を if/elif で順に比べる）と同じ処理を画面なしで再現したものと、
+CalculatorEngine（キーの表で種類を引き、種類ごとの処理を呼ぶ）に同じキー列を入力し、
+1キーあたりの時間を比較する。あわせて、1キーごとの表示（式と結果）が一致するかも確かめる。
+キー列は電卓のボタンからランダムに作る（数字を多めにする）。
+
+実行: python benchmarks/bench_engine.py [--keys 200000] [--repeat 5]
+"""
+import argparse
+import os
+import random
+import statistics
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "src"))
+
+from calc_engine import KEYS, TRAILING_NUMBER, CalculatorEngine  # noqa: E402
+from calc_expr import CalcError, evaluate_expression, format_number  # noqa: E402
+
+# 1つの式として続けて押すキーの数の目安（これごとに AC を押す）
+SEQUENCE_LENGTH = 12
+
+
+class LegacyEngine:
+    """従来の CalculatorApp.button_clicked と同じ処理（表示は文字列で持つ）"""
+
+    def __init__(self):
+        self.expression = ""
+        self.result = "0"
+        self.reset()
+
+    def press(self, data):
+        if self.result == "Error" or data == "AC":
+            self.result = "0"
+            self.expression = ""
+            self.reset()
+
+        elif data in ("1", "2", "3", "4", "5", "6", "7", "8", "9", "0", "."):
+            if self.evaluated:
+                self.reset()
+            self.append(data)
+
+        elif data in ("+", "-", "*", "/", "x^y"):
+            if self.evaluated:
+                self.input = self.result
+                self.evaluated = False
+            self.append(f" {'^' if data == 'x^y' else data} ")
+
+        elif data == "=":
+            if self.input:
+                self.evaluate(self.input)
+
+        elif data in ("%", "x²"):
+            symbol = "%" if data == "%" else "²"
+            if self.evaluated:
+                self.evaluate(f"({self.result}){symbol}")
+            else:
+                self.append(symbol)
+
+        elif data == "+/-":
+            if self.evaluated:
+                self.evaluate(f"-({self.result})")
+            elif self.input:
+                self.input = f"-({self.input})"
+                self.preview()
+            else:
+                self.append("-")
+
+        elif data in ("sin", "cos", "tan", "log", "ln", "√"):
+            number = TRAILING_NUMBER.search(self.input)
+            if self.evaluated:
+                self.evaluate(f"{data}({self.result})")
+            elif number:
+                self.input = f"{self.input[:number.start()]}{data}({number.group()})"
+                self.preview()
+            else:
+                self.append(f"{data}(")
+
+        elif data in ("π", "e", "("):
+            if self.evaluated:
+                self.reset()
+            self.append(data)
+
+        elif data == ")":
+            if not self.evaluated:
+                self.append(data)
+
+    def append(self, text):
+        self.input += text
+        self.preview()
+
+    def preview(self):
+        self.expression = self.input
+        try:
+            self.result = str(format_number(evaluate_expression(self.input)))
+        except CalcError:
+            pass
+
+    def evaluate(self, source):
+        try:
+            self.result = str(format_number(evaluate_expression(source)))
+        except CalcError:
+            self.result = "Error"
+        self.expression = "" if self.result == "Error" else f"{source} = "
+        self.reset()
+        self.evaluated = True
+
+    def reset(self):
+        self.input = ""
+        self.evaluated = False
+
+
+def make_keys(count, seed=0):
+    rng = random.Random(seed)
+    keys = list(KEYS)
+    digits = list("0123456789")
+    sequence = []
+    while len(sequence) < count:
+        for _ in range(SEQUENCE_LENGTH):
+            sequence.append(rng.choice(digits) if rng.random() < 0.5 else rng.choice(keys))
+        sequence.append("=")
+        sequence.append("AC")
+    return sequence[:count]
+
+
+def check(keys):
+    """1キーごとに両方の表示を比べ、一致しなかったキーの数を返す"""
+    legacy = LegacyEngine()
+    engine = CalculatorEngine()
+    mismatches = 0
+    for key in keys:
+        legacy.press(key)
+        engine.press(key)
+        if (legacy.expression, legacy.result) != (engine.expression, engine.result):
+            mismatches += 1
+    return mismatches
+
+
+def measure(make_engine, keys, repeat):
+    samples = []
+    for _ in range(repeat):
+        engine = make_engine()
+        press = engine.press
+        start = time.perf_counter()
+        for key in keys:
+            press(key)
+        samples.append((time.perf_counter() - start) / len(keys))
+    return statistics.median(samples)
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--keys", type=int, default=200_000)
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    keys = make_keys(args.keys)
+    print(f"キー {len(keys):,} 個  表示の不一致 {check(keys)} 件")
+    # 計算を含む時間（式のコンパイル・計算結果はキャッシュされるので2回目以降を測る）
+    for name, make_engine in (("従来 (if/elif)", LegacyEngine), ("CalculatorEngine", CalculatorEngine)):
+        seconds = measure(make_engine, keys, args.repeat)
+        print(f"{name:18s} {seconds * 1e6:6.2f} us/キー  ({1 / seconds:10,.0f} キー/秒)")
+
+    # キーの振り分けだけの時間（計算の直後の閉じ括弧は何もしない。従来は最後の elif まで比べる）
+    dispatch_keys = ["1", "="] + [")"] * args.keys
+    for name, make_engine in (("従来 (if/elif)", LegacyEngine), ("CalculatorEngine", CalculatorEngine)):
+        seconds = measure(make_engine, dispatch_keys, args.repeat)
+        print(f"振り分けのみ {name:18s} {seconds * 1e9:6.0f} ns/キー")
+
+
+if __name__ == "__main__":
+    main()
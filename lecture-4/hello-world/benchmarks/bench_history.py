@@ -0,0 +1,134 @@
+"""計算履歴（CalcHistory）のベンチマーク
+
+1. 記録の書き込み: まとめて書く add() と、1件ずつ INSERT して commit する方式の1件あたりの時間。
+2. 100,000 件を記録したDBを開き直して、式の結果の呼び出し（メモにないときはDBの主キー、
+   あるときはメモ）・先頭一致検索・新しい順の一覧の時間（中央値と p99）。
+3. 前に計算した式をもう一度計算するとき（式のコンパイル結果のキャッシュに残っていない場合）、
+   履歴のメモを使う場合と計算し直す場合の時間。履歴ありは記録の書き込みも含む。
+
+実行: python benchmarks/bench_history.py [--entries 100000] [--queries 2000]
+"""
+import argparse
+import os
+import random
+import sqlite3
+import statistics
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "src"))
+
+from calc_engine import CalculatorEngine  # noqa: E402
+from calc_expr import compile_expression  # noqa: E402
+from calc_history import SCHEMA, SQL_INSERT_HISTORY, SQL_UPSERT_RESULT, CalcHistory  # noqa: E402
+from calc_numeric import BACKENDS  # noqa: E402
+
+TEMPLATES = ["{a} + {b}", "{a} * {b}", "{a} / {b}", "sin({a})", "cos({a}) ^ 2", "√{a}", "ln({a}) - {b}",
+             "({a} + {b})²", "{a}%", "log({a})"]
+
+
+def make_entries(count, seed=0):
+    rng = random.Random(seed)
+    backends = ["float", "decimal:28", "fraction:28"]
+    entries = []
+    for _ in range(count):
+        template = rng.choice(TEMPLATES)
+        expression = template.format(a=rng.randint(0, 99999), b=round(rng.uniform(0, 1000), rng.randint(0, 3)))
+        entries.append((expression, str(rng.random()), rng.choice(backends)))
+    return entries
+
+
+def percentiles(samples):
+    samples = sorted(samples)
+    return statistics.median(samples) * 1e6, samples[int(len(samples) * 0.99)] * 1e6
+
+
+def report_writes(tmp, entries):
+    print("== 書き込み (1件あたり) ==")
+    count = min(len(entries), 2000)
+    conn = sqlite3.connect(os.path.join(tmp, "one_by_one.db"))
+    conn.execute("PRAGMA journal_mode=WAL")
+    conn.execute("PRAGMA synchronous=NORMAL")
+    conn.executescript(SCHEMA)
+    start = time.perf_counter()
+    for expression, result, backend in entries[:count]:
+        conn.execute(SQL_INSERT_HISTORY, (backend, expression, result, time.time()))
+        conn.execute(SQL_UPSERT_RESULT, (backend, expression, result))
+        conn.commit()
+    one_by_one = (time.perf_counter() - start) / count
+    conn.close()
+
+    history = CalcHistory(os.path.join(tmp, "history.db"))
+    start = time.perf_counter()
+    for expression, result, backend in entries:
+        history.add(expression, result, backend)
+    history.flush()
+    batched = (time.perf_counter() - start) / len(entries)
+    history.close()
+    print(f"1件ずつ commit ({count:,} 件)      {one_by_one * 1e6:8.1f} us")
+    print(f"CalcHistory.add ({len(entries):,} 件) {batched * 1e6:8.1f} us  ({one_by_one / batched:.0f} 倍)")
+
+
+def report_queries(tmp, entries, queries):
+    history = CalcHistory(os.path.join(tmp, "history.db"))
+    print(f"== 読み出し ({history.count():,} 件のDB、中央値 / p99 us) ==")
+    rng = random.Random(1)
+    targets = [rng.choice(entries) for _ in range(queries)]
+    prefixes = [expression[:rng.randint(1, 4)] for expression, _, _ in targets]
+
+    def measure(name, call, args_list):
+        samples = []
+        for args in args_list:
+            start = time.perf_counter()
+            call(*args)
+            samples.append(time.perf_counter() - start)
+        median, p99 = percentiles(samples)
+        print(f"{name:28s} {median:8.1f} / {p99:8.1f}")
+
+    measure("lookup (DB)", history.lookup, [(expression, backend) for expression, _, backend in targets])
+    measure("lookup (メモ)", history.lookup, [(expression, backend) for expression, _, backend in targets])
+    measure("lookup (ない式)", history.lookup, [(f"{expression} + 1", backend) for expression, _, backend in targets])
+    measure("search (先頭1〜4文字, 20件)", history.search,
+            [(prefix, backend) for prefix, (_, _, backend) in zip(prefixes, targets)])
+    measure("recent (20件)", history.recent, [()] * queries)
+    print("stats:", history.stats())
+    history.close()
+
+
+def report_memo(tmp, repeat):
+    print("== 前に計算した式をもう一度計算 (1回あたり us) ==")
+    history = CalcHistory(os.path.join(tmp, "memo.db"))
+    for name in ("float", "decimal", "fraction"):
+        for source in ("sin(1) + cos(2)", "2 ^ 0.5 * ln(3)"):
+            times = []
+            for engine in (CalculatorEngine(backend=BACKENDS[name]),
+                           CalculatorEngine(backend=BACKENDS[name], history=history)):
+                engine.calculate(source)
+                elapsed = 0.0
+                for _ in range(repeat):
+                    # 別の式をたくさん計算してキャッシュから追い出された状態にする
+                    compile_expression.cache_clear()
+                    start = time.perf_counter()
+                    engine.calculate(source)
+                    elapsed += time.perf_counter() - start
+                times.append(elapsed / repeat)
+            print(f"{name:9s} {source:18s} 計算し直す {times[0] * 1e6:7.1f}  履歴のメモ {times[1] * 1e6:7.1f}")
+    history.close()
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--entries", type=int, default=100_000)
+    parser.add_argument("--queries", type=int, default=2000)
+    args = parser.parse_args()
+
+    entries = make_entries(args.entries)
+    with tempfile.TemporaryDirectory() as tmp:
+        report_writes(tmp, entries)
+        report_queries(tmp, entries, args.queries)
+        report_memo(tmp, 200)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,90 @@
+"""数の種類（float・Decimal・Fraction）ごとの計算のベンチマーク
+
+演算子・関数ごとに、変数 a, b を使った式（a + b、sin(a) など）を evaluate_expression で
+計算し、変数 a だけの式との差から1演算あたりの時間を求める（変数のある式は毎回計算する）。
+あわせて Decimal・Fraction の関数の値が、桁数を増やして計算した値を丸めたものと一致する
+（正しく丸められている）かを、ランダムな引数で確かめる。
+
+実行: python benchmarks/bench_numeric.py [--repeat 2000] [--precision 28] [--check 200]
+"""
+import argparse
+import os
+import random
+import sys
+import time
+from decimal import Decimal
+from fractions import Fraction
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "src"))
+
+from calc_expr import FLOAT, evaluate_expression  # noqa: E402
+from calc_numeric import DecimalBackend, FractionBackend  # noqa: E402
+
+OPERATIONS = ["a + b", "a - b", "a * b", "a / b", "a ^ 3", "a ^ b", "sin(a)", "cos(a)", "tan(a)",
+              "log(a)", "ln(a)", "√a"]
+
+# 正しく丸められているかを確かめる関数（引数は a）
+CHECKED = ["sin(a)", "cos(a)", "tan(a)", "log(a)", "ln(a)", "√a", "a ^ 0.37"]
+
+
+def per_call(source, values, backend, repeat):
+    start = time.perf_counter()
+    for _ in range(repeat):
+        evaluate_expression(source, values, backend)
+    return (time.perf_counter() - start) / repeat
+
+
+def report_costs(backends, repeat):
+    print("== 1演算あたりの時間 (us) ==")
+    print(f"{'':10s}" + "".join(f"{name:>12s}" for name, _, _ in backends))
+    baselines = [per_call("a", values, backend, repeat) for _, backend, values in backends]
+    for source in OPERATIONS:
+        row = []
+        for (_, backend, values), baseline in zip(backends, baselines):
+            row.append(max(per_call(source, values, backend, repeat) - baseline, 0))
+        print(f"{source:10s}" + "".join(f"{seconds * 1e6:12.2f}" for seconds in row))
+    print(f"{'(式1回)':10s}" + "".join(f"{seconds * 1e6:12.2f}" for seconds in baselines))
+
+
+def rounded(value, context):
+    """Decimal・Fraction の値を context の桁数の Decimal に丸める"""
+    value = Fraction(value)
+    return context.divide(Decimal(value.numerator), Decimal(value.denominator))
+
+
+def report_rounding(precision, count):
+    print(f"== 正しく丸められているか ({precision} 桁、桁数を 40 増やして計算した値と比較) ==")
+    rng = random.Random(0)
+    for name, make in (("decimal", DecimalBackend), ("fraction", FractionBackend)):
+        backend, reference = make(precision), make(precision + 40)
+        mismatches = 0
+        for _ in range(count):
+            if name == "decimal":
+                a = Decimal(rng.uniform(0.001, 100)).quantize(Decimal("1e-9"))
+            else:
+                a = Fraction(rng.randint(1, 10 ** 6), rng.randint(1, 10 ** 4))
+            for source in CHECKED:
+                value = rounded(evaluate_expression(source, {"a": a}, backend), backend.context)
+                expected = rounded(evaluate_expression(source, {"a": a}, reference), backend.context)
+                mismatches += value != expected
+        print(f"{name:10s} {count * len(CHECKED)} 件中 不一致 {mismatches} 件")
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--repeat", type=int, default=2000)
+    parser.add_argument("--precision", type=int, default=28)
+    parser.add_argument("--check", type=int, default=200)
+    args = parser.parse_args()
+
+    backends = [
+        ("float", FLOAT, {"a": 1.2345, "b": 0.678}),
+        ("decimal", DecimalBackend(args.precision), {"a": Decimal("1.2345"), "b": Decimal("0.678")}),
+        ("fraction", FractionBackend(args.precision), {"a": Fraction("1.2345"), "b": Fraction("0.678")}),
+    ]
+    report_costs(backends, args.repeat)
+    report_rounding(args.precision, args.check)
+
+
+if __name__ == "__main__":
+    main()
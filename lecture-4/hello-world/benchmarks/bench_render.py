@@ -0,0 +1,112 @@
+"""電卓の画面更新のベンチマーク
+
+従来の CalculatorApp（キーごとに電卓全体を update()、モード切替で行を作り直して全体を update()）と
+現在の CalculatorApp（変わったテキストだけを page.update()、科学計算の行は最初から置いて表示だけを切替）に
+同じキー列とモード切替を与え、1回あたりの送信バイト数・メッセージ数・処理時間
+（差分の計算と JSON 化を含む。クライアントは無いので描画は含まない）を比較する。
+現在の方式は非表示の行も最初に送るので、初回表示の送信バイト数もあわせて表示する。
+
+実行: python benchmarks/bench_render.py [--keys 400] [--toggles 40]
+"""
+import argparse
+import contextlib
+import io
+import os
+import random
+import sys
+import time
+import types
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "src"))
+# 送信内容の記録は天気アプリのベンチマークと同じ flet_probe を使う
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "..", "..", "lecture5", "hello-world", "benchmarks"))
+
+import flet as ft  # noqa: E402
+from calc import CalculatorApp  # noqa: E402
+from calc_engine import KEYS  # noqa: E402
+from flet_probe import make_page  # noqa: E402
+
+
+class LegacyCalculatorApp(CalculatorApp):
+    """従来の画面更新（行の作り直しと電卓全体の update()）"""
+
+    def __init__(self):
+        super().__init__()
+        self.content.controls = [self.make_display(), self.all_rows[1]] + self.standard_rows
+
+    def make_display(self):
+        return ft.Column(
+            controls=[self.expression, self.result],
+            alignment=ft.MainAxisAlignment.END,
+            horizontal_alignment=ft.CrossAxisAlignment.END,
+            spacing=5,
+        )
+
+    def toggle_mode(self, e):
+        self.scientific_mode = not self.scientific_mode
+        self.mode_button.text = f"Scientific Mode: {'ON' if self.scientific_mode else 'OFF'}"
+        rows = [self.make_display(), self.all_rows[1]]
+        if self.scientific_mode:
+            rows.extend(self.scientific_rows)
+        rows.extend(self.standard_rows)
+        self.content.controls = rows
+        self.update()
+
+    def button_clicked(self, e):
+        self.engine.press(e.control.data)
+        self.expression.value = self.engine.expression
+        self.result.value = self.engine.result
+        self.update()
+
+
+def click(data):
+    return types.SimpleNamespace(control=types.SimpleNamespace(data=data))
+
+
+def make_keys(count, seed=0):
+    rng = random.Random(seed)
+    keys = [key for key in KEYS if key != "AC"]
+    sequence = []
+    while len(sequence) < count:
+        sequence.extend(rng.choice("0123456789") if rng.random() < 0.6 else rng.choice(keys) for _ in range(10))
+        sequence.extend(["=", "AC"])
+    return sequence[:count]
+
+
+def measure(app, conn, action, args_list):
+    """1回あたりの (送信バイト数, メッセージ数, 秒)"""
+    conn.reset()
+    start = time.perf_counter()
+    for args in args_list:
+        action(*args)
+    seconds = time.perf_counter() - start
+    return conn.bytes_sent / len(args_list), conn.messages / len(args_list), seconds / len(args_list)
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--keys", type=int, default=400)
+    parser.add_argument("--toggles", type=int, default=40)
+    args = parser.parse_args()
+
+    keys = make_keys(args.keys)
+    results = {}
+    for name, make_app in (("従来", LegacyCalculatorApp), ("現在", CalculatorApp)):
+        page, conn = make_page()
+        app = make_app()
+        results[(name, "初回表示")] = measure(app, conn, page.add, [(app,)])
+        # 押したキーの表示（print）はベンチマークでは捨てる
+        with contextlib.redirect_stdout(io.StringIO()):
+            for mode in ("標準", "科学計算"):
+                results[(name, f"キー ({mode}モード)")] = measure(
+                    app, conn, app.button_clicked, [(click(key),) for key in keys])
+                app.toggle_mode(None)
+            if app.scientific_mode:
+                app.toggle_mode(None)
+            results[(name, "モード切替")] = measure(app, conn, app.toggle_mode, [(None,)] * args.toggles)
+    print(f"キー {len(keys)} 個 × 標準/科学計算モード、モード切替 {args.toggles} 回")
+    for (name, action), (sent, messages, seconds) in results.items():
+        print(f"{name} {action:16s} {sent:8.0f} バイト/回  {messages:4.2f} メッセージ/回  {seconds * 1e6:8.1f} us/回")
+
+if __name__ == "__main__":
+    main()
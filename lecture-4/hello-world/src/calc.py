@@ -1,5 +1,7 @@
 import flet as ft
-import math
+from calc_engine import CalculatorEngine
+from calc_history import CalcHistory
+from calc_numeric import BACKENDS
 
 
 class CalcButton(ft.ElevatedButton):
@@ -40,10 +42,13 @@ class ScientificButton(CalcButton):
 
 
 class CalculatorApp(ft.Container):
-    def __init__(self):
+    def __init__(self, history=None):
         super().__init__()
-        self.reset()
+        # キー操作と計算は画面なしの CalculatorEngine が受け持つ
+        self.engine = CalculatorEngine(history=history)
         self.scientific_mode = False
+        # 数の種類（float・decimal・fraction）
+        self.backend_names = list(BACKENDS)
 
         # 式の表示用テキスト
         self.expression = ft.Text(value="", color=ft.Colors.WHITE60, size=16)
@@ -133,7 +138,17 @@ class CalculatorApp(ft.Container):
             bgcolor=ft.Colors.GREEN_700,
             color=ft.Colors.WHITE
         )
+        # 数の種類の切替ボタン
+        self.backend_button = ft.ElevatedButton(
+            text="Number: float",
+            on_click=self.toggle_backend,
+            bgcolor=ft.Colors.INDIGO_700,
+            color=ft.Colors.WHITE
+        )
         
+        # 科学計算モードの行は最初から置いておき、表示・非表示だけを切り替える
+        self.scientific_panel = ft.Column(controls=self.scientific_rows, visible=False)
+
         # 初期表示は標準モード
         self.all_rows = [
             ft.Column(
@@ -145,7 +160,8 @@ class CalculatorApp(ft.Container):
                 horizontal_alignment=ft.CrossAxisAlignment.END,
                 spacing=5
             ), 
-            ft.Row(controls=[self.mode_button])
+            ft.Row(controls=[self.mode_button, self.backend_button]),
+            self.scientific_panel,
         ]
         self.all_rows.extend(self.standard_rows)
         
@@ -154,224 +170,48 @@ class CalculatorApp(ft.Container):
     def toggle_mode(self, e):
         self.scientific_mode = not self.scientific_mode
         
-        # ボタンのテキストを更新
+        # ボタンのテキストと科学計算の行の表示だけを送る（行は作り直さない）
         self.mode_button.text = f"Scientific Mode: {'ON' if self.scientific_mode else 'OFF'}"
-        
-        # 行を再構築
-        self.all_rows = [
-            ft.Column(
-                controls=[
-                    self.expression,
-                    self.result
-                ],
-                alignment=ft.MainAxisAlignment.END,
-                horizontal_alignment=ft.CrossAxisAlignment.END,
-                spacing=5
-            ), 
-            ft.Row(controls=[self.mode_button])
-        ]
-        
-        if self.scientific_mode:
-            self.all_rows.extend(self.scientific_rows)
-        
-        self.all_rows.extend(self.standard_rows)
-        
-        self.content.controls = self.all_rows
-        self.update()
+        self.scientific_panel.visible = self.scientific_mode
+        self.page.update(self.mode_button, self.scientific_panel)
+
+    def toggle_backend(self, e):
+        # 次の数の種類に切り替え、入力中の式を計算し直す
+        name = self.backend_names[(self.backend_names.index(self.engine.backend.name) + 1) % len(self.backend_names)]
+        self.engine.set_backend(BACKENDS[name])
+        self.backend_button.text = f"Number: {name}"
+        self.page.update(self.backend_button, *self.show_engine())
 
     def button_clicked(self, e):
         data = e.control.data
         print(f"Button clicked with data = {data}")
-        
-        if self.result.value == "Error" or data == "AC":
-            self.result.value = "0"
-            self.expression.value = ""
-            self.reset()
-        
-        elif data in ("1", "2", "3", "4", "5", "6", "7", "8", "9", "0", "."):
-            if self.result.value == "0" or self.new_operand == True:
-                self.result.value = data
-                self.new_operand = False
-            else:
-                self.result.value = self.result.value + data
-        
-        elif data in ("+", "-", "*", "/"):
-            # 式を更新
-            if self.expression.value == "":
-                self.expression.value = f"{self.result.value} {data} "
-            else:
-                # 前の演算子を含む式に現在の値と新しい演算子を追加
-                self.expression.value = f"{self.expression.value}{self.result.value} {data} "
-            
-            self.result.value = self.calculate(self.operand1, float(self.result.value), self.operator)
-            self.operator = data
-            if self.result.value == "Error":
-                self.operand1 = "0"
-                self.expression.value = ""
-            else:
-                self.operand1 = float(self.result.value)
-            self.new_operand = True
-        
-        elif data == "=":
-            # 式を完成させる
-            if self.expression.value != "":
-                self.expression.value = f"{self.expression.value}{self.result.value} = "
-            
-            self.result.value = self.calculate(self.operand1, float(self.result.value), self.operator)
-            # 計算の履歴を保持
-            previous_expression = self.expression.value
-            self.reset()
-            # 計算後も式を表示
-            self.expression.value = previous_expression
-        
-        elif data == "%":
-            self.result.value = float(self.result.value) / 100
-            self.expression.value = f"{self.expression.value}{self.result.value}% = "
-            self.reset()
-        
-        elif data == "+/-":
-            if float(self.result.value) > 0:
-                self.result.value = "-" + str(self.result.value)
-            elif float(self.result.value) < 0:
-                self.result.value = str(self.format_number(abs(float(self.result.value))))
-        
-        # 科学計算ボタンの処理
-        elif data == "sin":
-            try:
-                value = float(self.result.value)
-                result = math.sin(value)
-                self.expression.value = f"sin({value}) = "
-                self.result.value = str(self.format_number(result))
-            except:
-                self.result.value = "Error"
-                self.expression.value = ""
-            self.reset()
-        
-        elif data == "cos":
-            try:
-                value = float(self.result.value)
-                result = math.cos(value)
-                self.expression.value = f"cos({value}) = "
-                self.result.value = str(self.format_number(result))
-            except:
-                self.result.value = "Error"
-                self.expression.value = ""
-            self.reset()
-        
-        elif data == "tan":
-            try:
-                value = float(self.result.value)
-                result = math.tan(value)
-                self.expression.value = f"tan({value}) = "
-                self.result.value = str(self.format_number(result))
-            except:
-                self.result.value = "Error"
-                self.expression.value = ""
-            self.reset()
-        
-        elif data == "log":
-            try:
-                value = float(self.result.value)
-                result = math.log10(value)
-                self.expression.value = f"log({value}) = "
-                self.result.value = str(self.format_number(result))
-            except:
-                self.result.value = "Error"
-                self.expression.value = ""
-            self.reset()
-        
-        elif data == "ln":
-            try:
-                value = float(self.result.value)
-                result = math.log(value)
-                self.expression.value = f"ln({value}) = "
-                self.result.value = str(self.format_number(result))
-            except:
-                self.result.value = "Error"
-                self.expression.value = ""
-            self.reset()
-        
-        elif data == "√":
-            try:
-                value = float(self.result.value)
-                result = math.sqrt(value)
-                self.expression.value = f"√({value}) = "
-                self.result.value = str(self.format_number(result))
-            except:
-                self.result.value = "Error"
-                self.expression.value = ""
-            self.reset()
-        
-        elif data == "x²":
-            try:
-                value = float(self.result.value)
-                result = value ** 2
-                self.expression.value = f"({value})² = "
-                self.result.value = str(self.format_number(result))
-            except:
-                self.result.value = "Error"
-                self.expression.value = ""
-            self.reset()
-        
-        elif data == "x^y":
-            self.operator = "^"
-            self.operand1 = float(self.result.value)
-            self.expression.value = f"{self.operand1} ^ "
-            self.new_operand = True
-        
-        elif data == "π":
-            self.result.value = str(self.format_number(math.pi))
-            self.reset()
-        
-        elif data == "e":
-            self.result.value = str(self.format_number(math.e))
-            self.reset()
-        
-        elif data in ("(", ")"):
-            # 括弧は今回は実装していません（複雑な式の解析が必要なため）
-            pass
-
-        self.update()
-
-    def format_number(self, num):
-        if num % 1 == 0:
-            return int(num)
-        else:
-            # 小数点以下が多すぎる場合は丸める
-            if abs(num) < 1e-10:
-                return 0
-            return round(num, 10)
+        self.engine.press(data)
+        changed = self.show_engine()
+        if changed:
+            self.page.update(*changed)
 
-    def calculate(self, operand1, operand2, operator):
-        try:
-            if operator == "+":
-                return self.format_number(operand1 + operand2)
-            elif operator == "-":
-                return self.format_number(operand1 - operand2)
-            elif operator == "*":
-                return self.format_number(operand1 * operand2)
-            elif operator == "/":
-                if operand2 == 0:
-                    return "Error"
-                else:
-                    return self.format_number(operand1 / operand2)
-            elif operator == "^":
-                return self.format_number(operand1 ** operand2)
-            else:
-                return operand2
-        except:
-            return "Error"
+    def show_engine(self):
+        """式と結果の表示を CalculatorEngine に合わせ、変わったテキストだけを返す
 
-    def reset(self):
-        self.operator = "+"
-        self.operand1 = 0
-        self.new_operand = True
+        キーを押すたびに電卓全体を update() すると全ボタンの差分を調べるので、
+        変わったテキストだけを page.update() に渡す。
+        """
+        changed = []
+        for text, value in ((self.expression, self.engine.expression), (self.result, self.engine.result)):
+            if text.value != value:
+                text.value = value
+                changed.append(text)
+        return changed
 
 
 def main(page: ft.Page):
     page.title = "Scientific Calculator"
-    calc = CalculatorApp()
+    history = CalcHistory()
+    calc = CalculatorApp(history=history)
+    # 書き込み待ちの履歴を書いてから閉じる
+    page.on_disconnect = lambda e: history.close()
     page.add(calc)
 
 
-ft.app(main)
\ No newline at end of file
+if __name__ == "__main__":
+    ft.app(main)
@@ -0,0 +1,157 @@
+import math
+import operator
+
+import numpy as np
+
+from calc_expr import (BINARY, PUSH, POSTFIX_OPS, UNARY, CalcError, compile_expression,
+                       divide, power)
+
+# 一度に計算する要素数（途中結果の配列がキャッシュに収まる大きさで区切る）
+CHUNK_SIZE = 1 << 16
+
+
+def _math_error(result, *args):
+    """math.* が ValueError / OverflowError を出す要素
+
+    NaN でない引数から NaN になったもの（定義域外）と、有限の引数から無限大になったもの
+    （log(0)、0 の負の数乗、オーバーフロー）。
+    """
+    any_nan = np.zeros(np.shape(result), dtype=bool)
+    all_finite = np.ones(np.shape(result), dtype=bool)
+    for arg in args:
+        any_nan |= np.isnan(arg)
+        all_finite &= np.isfinite(arg)
+    return (np.isnan(result) & ~any_nan) | (np.isinf(result) & all_finite)
+
+
+def _zero_division(result, a, b):
+    """divide が ZeroDivisionError を出す要素"""
+    return np.broadcast_to(b == 0, np.shape(result))
+
+
+# 1要素ずつ計算する関数 → (同じ計算の ufunc, 例外になる要素を返す関数)。
+# 例外にならない演算（+ - * と符号反転など）は inf や NaN をそのまま次に渡す
+VECTOR_OPS = {
+    operator.add: (np.add, None),
+    operator.sub: (np.subtract, None),
+    operator.mul: (np.multiply, None),
+    operator.neg: (np.negative, None),
+    divide: (np.divide, _zero_division),
+    power: (np.power, _math_error),
+    math.sin: (np.sin, _math_error),
+    math.cos: (np.cos, _math_error),
+    math.tan: (np.tan, _math_error),
+    math.log10: (np.log10, _math_error),
+    math.log: (np.log, _math_error),
+    math.sqrt: (np.sqrt, _math_error),
+    POSTFIX_OPS["²"]: (np.square, None),
+    POSTFIX_OPS["%"]: (lambda x: np.divide(x, 100), None),
+}
+
+
+def run_vector(code, values, size):
+    """命令列を配列で実行し、(値, 例外になった要素の印) を返す"""
+    stack = []
+    push = stack.append
+    pop = stack.pop
+    failed = np.zeros(size, dtype=bool)
+    for arity, arg in code:
+        if arity == PUSH:
+            push(arg)
+            continue
+        if arity == UNARY:
+            args = (pop(),)
+        elif arity == BINARY:
+            right = pop()
+            args = (pop(), right)
+        else:
+            try:
+                push(values[arg])
+            except KeyError as e:
+                raise CalcError(f"unknown name {e.args[0]!r}") from e
+            continue
+        if arg not in VECTOR_OPS:
+            # register_function などで後から足した関数は ufunc がない
+            raise CalcError(f"no vectorized form of {getattr(arg, '__name__', arg)!r}")
+        ufunc, error = VECTOR_OPS[arg]
+        result = ufunc(*args)
+        if error is not None:
+            failed |= error(result, *args)
+        push(result)
+    return stack[0], failed
+
+
+def evaluate_batch(source, values=None, chunk_size=CHUNK_SIZE):
+    """式を変数の配列（変数名 → 配列）のすべての要素について計算する
+
+    evaluate_expression を1要素ずつ呼んだのと同じ値を返し、CalcError になる要素
+    （定義域外・0 での割り算・結果が有限の実数でない）は NaN にする。
+    配列どうしはブロードキャストする。式そのものが正しくなければ CalcError。
+    """
+    program = compile_expression(source)
+    names = sorted(program.variables)
+    values = values or {}
+    missing = [name for name in names if name not in values]
+    if missing:
+        raise CalcError(f"unknown name {missing[0]!r}")
+    arrays = np.broadcast_arrays(*(np.asarray(values[name], dtype=np.float64) for name in names))
+    shape = arrays[0].shape if arrays else ()
+    flat = [array.ravel() for array in arrays]
+    size = math.prod(shape)
+    out = np.empty(size, dtype=np.float64)
+    # 例外の代わりに NaN・inf になる計算の警告は出さない（あとで印をつけて NaN にする）
+    with np.errstate(all="ignore"):
+        for start in range(0, max(size, 1), chunk_size):
+            stop = min(start + chunk_size, size)
+            chunk = {name: array[start:stop] for name, array in zip(names, flat)}
+            result, failed = run_vector(program.code, chunk, stop - start)
+            result = np.broadcast_to(result, failed.shape)
+            out[start:stop] = np.where(failed | ~np.isfinite(result), np.nan, result)
+    return out.reshape(shape)
+
+
+def round_numbers(values, ndigits=10):
+    """round(num, ndigits) と同じ値を配列で求める
+
+    np.round は num * 10**ndigits を丸めてから割り戻すので、round と最後の桁が違うことがある。
+    ここでは整数部と小数部に分け、小数部だけを丸めた整数（2**53 未満なので誤差なし）を
+    1回だけ割るので round と同じ値になる。丸めの境目（端数が 0.5 付近）の要素だけは
+    小数部の掛け算の誤差で向きが変わりうるので round で計算し直す。
+    """
+    values = np.asarray(values, dtype=np.float64)
+    scale = 10.0 ** ndigits
+    with np.errstate(all="ignore"):
+        whole = np.trunc(values)
+        scaled = (values - whole) * scale
+        rounded = np.rint(scaled)
+        out = (whole * scale + rounded) / scale
+        # これ以上大きい数は小数点以下 ndigits 桁より細かい値を持たないので、そのまま
+        exact = np.abs(values) >= 2.0 ** 53 / scale
+        out[exact] = values[exact]
+        recheck = np.abs(np.abs(scaled - rounded) - 0.5) < 1e-3
+    recheck &= ~exact & np.isfinite(values)
+    indices = np.flatnonzero(recheck)
+    out.flat[indices] = [round(num, ndigits) for num in values.flat[indices].tolist()]
+    return out
+
+
+def format_numbers(values):
+    """format_number を配列の全要素に適用した値（NaN はそのまま）"""
+    values = np.asarray(values, dtype=np.float64)
+    with np.errstate(invalid="ignore"):
+        integral = np.mod(values, 1) == 0
+    out = np.where(np.abs(values) < 1e-10, 0.0, round_numbers(values))
+    # 整数は丸めずそのまま（-0.0 は 0 にする）
+    return np.where(integral, values + 0.0, out)
+
+
+def display_strings(values):
+    """画面と同じ表示用の文字列のリスト（NaN は "Error"）"""
+    values = np.asarray(values, dtype=np.float64).ravel()
+    with np.errstate(invalid="ignore"):
+        # format_number は整数と 0 に丸めた小さい数を int で返す
+        integral = ((np.mod(values, 1) == 0) | (np.abs(values) < 1e-10)).tolist()
+    return [
+        "Error" if num != num else str(int(num)) if is_int else str(num)
+        for num, is_int in zip(format_numbers(values).tolist(), integral)
+    ]
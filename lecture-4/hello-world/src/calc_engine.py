@@ -0,0 +1,216 @@
+import re
+
+from calc_expr import (BINARY, BINARY_OPS, CONSTANTS, FLOAT, FUNCTIONS, CalcError, compile_expression,
+                       evaluate_expression)
+
+# キーの種類
+DIGIT, OPERATOR, POSTFIX, FUNCTION, CONSTANT, OPEN, CLOSE, EQUALS, CLEAR, SIGN = range(10)
+
+# キー（ボタンの文字）→ (種類, 式に書く文字列)
+KEYS = {
+    **{key: (DIGIT, key) for key in "0123456789."},
+    "+": (OPERATOR, " + "),
+    "-": (OPERATOR, " - "),
+    "*": (OPERATOR, " * "),
+    "/": (OPERATOR, " / "),
+    "x^y": (OPERATOR, " ^ "),
+    "%": (POSTFIX, "%"),
+    "x²": (POSTFIX, "²"),
+    "sin": (FUNCTION, "sin"),
+    "cos": (FUNCTION, "cos"),
+    "tan": (FUNCTION, "tan"),
+    "log": (FUNCTION, "log"),
+    "ln": (FUNCTION, "ln"),
+    "√": (FUNCTION, "√"),
+    "π": (CONSTANT, "π"),
+    "e": (CONSTANT, "e"),
+    "(": (OPEN, "("),
+    ")": (CLOSE, ")"),
+    "=": (EQUALS, None),
+    "AC": (CLEAR, None),
+    "+/-": (SIGN, None),
+}
+
+# 入力中の式の末尾の数字（関数キーをその数字に適用する）
+TRAILING_NUMBER = re.compile(r"(\d+\.?\d*|\.\d+)$")
+
+
+def register_function(name, func, key=None):
+    """引数1つの関数を式とキーに追加する（key を省略すると name と同じ）"""
+    FUNCTIONS[name] = func
+    KEYS[key or name] = (FUNCTION, name)
+    # 変数としてコンパイル済みの式を残さない
+    compile_expression.cache_clear()
+
+
+def register_constant(name, value, key=None):
+    """定数を式とキーに追加する"""
+    CONSTANTS[name] = value
+    KEYS[key or name] = (CONSTANT, name)
+    compile_expression.cache_clear()
+
+
+def register_operator(symbol, precedence, func, key=None, right_assoc=False):
+    """二項演算子（記号1文字）を式とキーに追加する"""
+    BINARY_OPS[symbol] = (precedence, right_assoc, BINARY, func)
+    KEYS[key or symbol] = (OPERATOR, f" {symbol} ")
+    compile_expression.cache_clear()
+
+
+class CalculatorEngine:
+    """電卓の状態とキー操作（画面なしで動き、画面は expression / result を表示するだけ）
+
+    backend は数の種類（calc_expr.FLOAT か calc_numeric の DecimalBackend・FractionBackend）。
+    history（calc_history.CalcHistory）を渡すと計算した式を記録し、同じ式は計算し直さない。
+    """
+
+    def __init__(self, keys=KEYS, backend=FLOAT, history=None):
+        self.keys = keys
+        self.backend = backend
+        self.history = history
+        # キーの種類 → 処理
+        self.handlers = {
+            DIGIT: self.digit,
+            OPERATOR: self.operator,
+            POSTFIX: self.postfix,
+            FUNCTION: self.function,
+            CONSTANT: self.constant,
+            OPEN: self.constant,
+            CLOSE: self.close,
+            EQUALS: self.equals,
+            CLEAR: self.clear,
+            SIGN: self.sign,
+        }
+        self.clear()
+
+    def press(self, key):
+        """キーを1つ押す（知らないキーは無視）"""
+        if self.result == "Error":
+            # エラー表示中はどのキーでも最初に戻る
+            self.clear()
+            return
+        entry = self.keys.get(key)
+        if entry is not None:
+            kind, text = entry
+            self.handlers[kind](text)
+
+    def replay(self, keys):
+        """キーを順に押して、最後の表示（結果の文字列）を返す"""
+        press = self.press
+        for key in keys:
+            press(key)
+        return self.result
+
+    def recall(self, expression):
+        """履歴の式を入力中の式にする"""
+        self.reset()
+        self.append(expression)
+
+    def set_backend(self, backend):
+        """数の種類を切り替える（入力中の式はそのまま計算し直す）"""
+        self.backend = backend
+        if self.input:
+            self.preview()
+
+    def clear(self, text=None):
+        self.expression = ""
+        self.result = "0"
+        self.reset()
+
+    def digit(self, text):
+        # 計算の直後に数字を押したら新しい式を始める
+        if self.evaluated:
+            self.reset()
+        self.append(text)
+
+    def operator(self, text):
+        # 計算の直後は結果の続きから式を書く
+        if self.evaluated:
+            # 分数の結果（1/3）は括弧で囲まないと 1/3 ^ 2 のように続きとつながる
+            self.input = f"({self.result})" if "/" in self.result else self.result
+            self.evaluated = False
+        self.append(text)
+
+    def equals(self, text):
+        if self.input:
+            self.evaluate(self.input)
+
+    def postfix(self, text):
+        if self.evaluated:
+            self.evaluate(f"({self.result}){text}")
+        else:
+            self.append(text)
+
+    def sign(self, text):
+        if self.evaluated:
+            self.evaluate(f"-({self.result})")
+        elif self.input:
+            self.input = f"-({self.input})"
+            self.preview()
+        else:
+            self.append("-")
+
+    def function(self, name):
+        # 計算の直後なら結果に、数字の直後ならその数字に適用し、それ以外は関数を書き始める
+        if self.evaluated:
+            self.evaluate(f"{name}({self.result})")
+            return
+        number = TRAILING_NUMBER.search(self.input)
+        if number:
+            self.input = f"{self.input[:number.start()]}{name}({number.group()})"
+            self.preview()
+        else:
+            self.append(f"{name}(")
+
+    def constant(self, text):
+        if self.evaluated:
+            self.reset()
+        self.append(text)
+
+    def close(self, text):
+        if not self.evaluated:
+            self.append(text)
+
+    def append(self, text):
+        """入力中の式に書き足し、計算できる式なら途中の値を表示"""
+        self.input += text
+        self.preview()
+
+    def preview(self):
+        self.expression = self.input
+        try:
+            self.result = self.backend.format(evaluate_expression(self.input, None, self.backend))
+        except CalcError:
+            # 書きかけの式（"2 + " など）は前の表示のまま
+            pass
+
+    def evaluate(self, source):
+        """式を計算して結果を表示（式は上の行に残す）"""
+        self.result = self.calculate(source)
+        if self.result == "Error":
+            self.expression = ""
+        else:
+            self.expression = f"{source} = "
+        self.reset()
+        self.evaluated = True
+
+    def calculate(self, source):
+        """式の文字列を計算して表示用の文字列を返す（計算できなければ "Error"）"""
+        if self.history is None:
+            return self._calculate(source)
+        result = self.history.lookup(source, self.backend.key)
+        if result is None:
+            result = self._calculate(source)
+        self.history.add(source, result, self.backend.key)
+        return result
+
+    def _calculate(self, source):
+        try:
+            return self.backend.format(evaluate_expression(source, None, self.backend))
+        except CalcError:
+            return "Error"
+
+    def reset(self):
+        # 入力中の式と、直前に「=」などで計算したか
+        self.input = ""
+        self.evaluated = False
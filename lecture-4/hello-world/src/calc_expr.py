@@ -0,0 +1,277 @@
+import math
+import operator
+import re
+from functools import lru_cache
+
+
+class CalcError(Exception):
+    """式が正しくない・定義域外など（画面には "Error" と表示する）"""
+
+
+# 式の読み方・計算・表示を変えたら上げる（calc_history は版が変わると保存した結果を捨てる）
+EVALUATOR_VERSION = 2
+
+
+def format_number(num):
+    if num % 1 == 0:
+        return int(num)
+    else:
+        # 小数点以下が多すぎる場合は丸める
+        if abs(num) < 1e-10:
+            return 0
+        return round(num, 10)
+
+
+def divide(a, b):
+    if b == 0:
+        raise ZeroDivisionError("division by zero")
+    return a / b
+
+
+def power(a, b):
+    # 負の数の小数乗は複素数になるので math.pow で ValueError にする
+    return math.pow(a, b)
+
+
+# 命令（逆ポーランド記法の1ステップ）: (引数の数, 値か関数)。VARIABLE は変数名の値を積む
+PUSH, UNARY, BINARY, VARIABLE = 0, 1, 2, 3
+
+# 二項演算子: 記号 → (優先順位, 右結合か, 引数の数, 関数)
+BINARY_OPS = {
+    "+": (1, False, BINARY, operator.add),
+    "-": (1, False, BINARY, operator.sub),
+    "*": (2, False, BINARY, operator.mul),
+    "/": (2, False, BINARY, divide),
+    "^": (4, True, BINARY, power),
+}
+
+# 単項マイナス（-2^2 = -4 になるよう ^ より弱く、* より強い）
+NEGATE = (3, True, UNARY, operator.neg)
+
+# 関数（引数1つ）。括弧なしの √9 も書けるよう、前置演算子として最も強く結びつける
+FUNCTION_PRECEDENCE = 5
+FUNCTIONS = {
+    "sin": math.sin,
+    "cos": math.cos,
+    "tan": math.tan,
+    "log": math.log10,
+    "ln": math.log,
+    "√": math.sqrt,
+    "sqrt": math.sqrt,
+}
+
+# 後置演算子（直前の値にすぐ適用する）
+POSTFIX_OPS = {
+    "²": lambda x: x * x,
+    "%": lambda x: x / 100,
+}
+
+CONSTANTS = {
+    "π": math.pi,
+    "pi": math.pi,
+    "e": math.e,
+}
+
+# 数は指数表記（format_number が返す 5e-05 や 1e+16）も1つの数として読む。
+# 指数がないと 5e-05 が 5 × e − 05（e はネイピア数）になってしまう。
+# 符号のない 2e3 はキーで 2・e・3 と押したものなので、これまでどおり 2 × e × 3 にする
+_TOKEN_PATTERN = re.compile(r"\s*(?:((?:\d+\.?\d*|\.\d+)(?:[eE][+-]\d+)?)|([A-Za-z]+)|(.))")
+
+NUMBER, NAME, SYMBOL = "number", "name", "symbol"
+
+# 演算子スタック上の開き括弧の印
+_LPAREN = (0, False, PUSH, None)
+
+
+def tokenize(source):
+    """式の文字列をトークン [(種類, 文字列), ...] に分ける"""
+    tokens = []
+    for number, name, symbol in _TOKEN_PATTERN.findall(source):
+        if number:
+            tokens.append((NUMBER, number))
+        elif name:
+            tokens.append((NAME, name))
+        elif symbol.strip():
+            tokens.append((SYMBOL, symbol))
+    return tokens
+
+
+def run(code, values=None):
+    stack = []
+    push = stack.append
+    pop = stack.pop
+    try:
+        for arity, arg in code:
+            if arity == PUSH:
+                push(arg)
+            elif arity == UNARY:
+                push(arg(pop()))
+            elif arity == BINARY:
+                right = pop()
+                push(arg(pop(), right))
+            else:
+                push(values[arg])
+    except KeyError as e:
+        raise CalcError(f"unknown name {e.args[0]!r}") from e
+    except (ValueError, ArithmeticError, TypeError) as e:
+        # ArithmeticError は ZeroDivisionError・OverflowError と decimal の例外
+        raise CalcError(str(e)) from e
+    return stack[0]
+
+
+class FloatBackend:
+    """数の種類ごとの、数の読み方・定数・関数と計算のしかた（既定の float）
+
+    Decimal・Fraction で計算するものは calc_numeric にあり、同じ属性を持つ。
+    """
+
+    name = "float"
+    # 計算結果を保存・再利用するときに区別する名前（精度のあるものは精度も含める）
+    key = "float"
+    number = float
+    functions = FUNCTIONS
+    constants = CONSTANTS
+    # 記号 → 関数（ない記号は BINARY_OPS の関数をそのまま使う）
+    binary = {}
+
+    run = staticmethod(run)
+
+    def is_finite(self, value):
+        return not isinstance(value, complex) and math.isfinite(value)
+
+    def format(self, value):
+        """表示用の文字列"""
+        return str(format_number(value))
+
+
+FLOAT = FloatBackend()
+
+
+class Program:
+    """コンパイル済みの式（逆ポーランド記法の命令列と、使っている変数名）"""
+
+    __slots__ = ("source", "code", "backend", "variables", "_value")
+
+    def __init__(self, source, code, backend=FLOAT):
+        self.source = source
+        self.code = code
+        self.backend = backend
+        self.variables = frozenset(arg for arity, arg in code if arity == VARIABLE)
+        self._value = None
+
+    def evaluate(self, values=None):
+        """命令列を実行して値を返す
+
+        変数のない式は1回だけ実行し、2回目以降は保存した値を返す。
+        変数のある式は values（変数名 → 値）を使って毎回実行する。
+        """
+        if self.variables:
+            return self.backend.run(self.code, values or {})
+        if self._value is None:
+            self._value = self.backend.run(self.code)
+        return self._value
+
+    def __repr__(self):
+        return f"Program({self.source!r}, {len(self.code)} ops)"
+
+
+def _pop_while(stack, code, precedence, right_assoc):
+    """precedence より強い（左結合なら同じ強さも）演算子を出力に移す"""
+    while stack and stack[-1] is not _LPAREN:
+        top_precedence, _, arity, func = stack[-1]
+        if top_precedence > precedence or (top_precedence == precedence and not right_assoc):
+            stack.pop()
+            code.append((arity, func))
+        else:
+            break
+
+
+@lru_cache(maxsize=1024)
+def compile_expression(source, backend=FLOAT):
+    """式を操車場アルゴリズムで逆ポーランド記法の命令列にコンパイル
+
+    優先順位・括弧・単項マイナス・関数（sin(30)、√9）・後置の ² と % に対応する。
+    2π や 2(3+4) のような掛け算の省略と、閉じていない括弧（sin(30 など）も受け付ける。
+    関数・定数以外の名前（x など）は変数になり、評価時に値を渡す。
+    同じ文字列のコンパイル結果はキャッシュするので、入力途中に何度評価し直しても
+    変わっていない式はコンパイルも計算もやり直さない。
+    数・定数・関数は backend（既定は float）のものを使う。
+    """
+    functions = backend.functions
+    constants = backend.constants
+    code = []
+    stack = []
+    expect_operand = True
+    previous = None
+    for kind, text in tokenize(source):
+        if kind == NUMBER and previous == NUMBER:
+            # 1.2.3 のような数字の続きは掛け算にしない
+            raise CalcError(f"unexpected {text!r}")
+        previous = kind
+        if not expect_operand and (kind == NUMBER or kind == NAME or text == "("
+                                   or text in functions or text in constants):
+            # 2π、2(3)、)( などは掛け算を省略したものとして扱う
+            _pop_while(stack, code, BINARY_OPS["*"][0], False)
+            stack.append(BINARY_OPS["*"])
+            expect_operand = True
+
+        if expect_operand:
+            if kind == NUMBER:
+                code.append((PUSH, backend.number(text)))
+                expect_operand = False
+            elif text in constants:
+                code.append((PUSH, constants[text]))
+                expect_operand = False
+            elif text in functions:
+                stack.append((FUNCTION_PRECEDENCE, True, UNARY, functions[text]))
+            elif kind == NAME and (text in FUNCTIONS or text in CONSTANTS):
+                raise CalcError(f"{text!r} is not available in {backend.name} mode")
+            elif kind == NAME:
+                code.append((VARIABLE, text))
+                expect_operand = False
+            elif text == "(":
+                stack.append(_LPAREN)
+            elif text == "-":
+                stack.append(NEGATE)
+            elif text == "+":
+                pass
+            else:
+                raise CalcError(f"unexpected {text!r}")
+        elif text in BINARY_OPS:
+            precedence, right_assoc, arity, func = BINARY_OPS[text]
+            _pop_while(stack, code, precedence, right_assoc)
+            stack.append((precedence, right_assoc, arity, backend.binary.get(text, func)))
+            expect_operand = True
+        elif text in POSTFIX_OPS:
+            code.append((UNARY, POSTFIX_OPS[text]))
+        elif text == ")":
+            while stack and stack[-1] is not _LPAREN:
+                code.append(stack.pop()[2:])
+            if not stack:
+                raise CalcError("unbalanced ')'")
+            stack.pop()
+        else:
+            raise CalcError(f"unexpected {text!r}")
+
+    if expect_operand:
+        raise CalcError("incomplete expression")
+    # 閉じていない括弧は式の終わりで閉じる
+    while stack:
+        entry = stack.pop()
+        if entry is not _LPAREN:
+            code.append(entry[2:])
+    return Program(source, tuple(code), backend)
+
+
+def evaluate_expression(source, values=None, backend=FLOAT):
+    """式の値（既定は float）。式の誤りや定義域外は CalcError"""
+    if backend is not FLOAT:
+        value = compile_expression(source, backend).evaluate(values)
+        if not backend.is_finite(value):
+            raise CalcError("not a finite real number")
+        return value
+    # float はキャッシュのキーを文字列だけにし、判定も関数を呼ばずに行う（入力のたびに呼ばれるので）
+    value = compile_expression(source).evaluate(values)
+    if isinstance(value, complex) or not math.isfinite(value):
+        raise CalcError("not a finite real number")
+    return value
@@ -0,0 +1,244 @@
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+
+from calc_expr import EVALUATOR_VERSION
+
+DB_NAME = "calc_history.db"
+
+# 接続時に設定するPRAGMA
+PRAGMAS = (
+    "PRAGMA journal_mode=WAL",
+    "PRAGMA synchronous=NORMAL",
+    "PRAGMA temp_store=MEMORY",
+    "PRAGMA busy_timeout=5000",
+)
+
+# この件数たまるか、最初の書き込み待ちからこの秒数たったらまとめて書き込む
+BATCH_SIZE = 256
+FLUSH_INTERVAL = 2.0
+
+# メモリに置く 式 → 結果 の件数（あふれた分はDBの主キーで引く）
+MEMO_SIZE = 4096
+
+SCHEMA_VERSION = 2
+
+# history は計算した順の記録、results は (数の種類, 式) ごとの最新の結果（メモと先頭一致検索に使う）
+# meta は results を計算した計算機の版（calc_expr.EVALUATOR_VERSION）
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS history (
+    id INTEGER PRIMARY KEY,
+    backend TEXT NOT NULL,
+    expression TEXT NOT NULL,
+    result TEXT NOT NULL,
+    evaluated_at REAL NOT NULL
+);
+CREATE TABLE IF NOT EXISTS results (
+    backend TEXT NOT NULL,
+    expression TEXT NOT NULL,
+    result TEXT NOT NULL,
+    PRIMARY KEY (backend, expression)
+) WITHOUT ROWID;
+CREATE TABLE IF NOT EXISTS meta (
+    name TEXT PRIMARY KEY,
+    value INTEGER NOT NULL
+) WITHOUT ROWID;
+"""
+
+SQL_SELECT_EVALUATOR_VERSION = "SELECT value FROM meta WHERE name = 'evaluator_version'"
+
+SQL_UPSERT_EVALUATOR_VERSION = """
+    INSERT INTO meta (name, value) VALUES ('evaluator_version', ?)
+    ON CONFLICT (name) DO UPDATE SET value = excluded.value
+"""
+
+SQL_DELETE_RESULTS = "DELETE FROM results"
+
+SQL_INSERT_HISTORY = """
+    INSERT INTO history (backend, expression, result, evaluated_at)
+    VALUES (?, ?, ?, ?)
+"""
+
+SQL_UPSERT_RESULT = """
+    INSERT INTO results (backend, expression, result)
+    VALUES (?, ?, ?)
+    ON CONFLICT (backend, expression) DO UPDATE SET result = excluded.result
+"""
+
+SQL_SELECT_RESULT = "SELECT result FROM results WHERE backend = ? AND expression = ?"
+
+# 主キーの範囲で引くので、件数が増えても読むのは一致する先頭の limit 行だけ
+SQL_SEARCH_PREFIX = """
+    SELECT expression, result FROM results
+    WHERE backend = ? AND expression >= ? AND expression < ?
+    ORDER BY expression
+    LIMIT ?
+"""
+
+SQL_SELECT_RECENT = """
+    SELECT backend, expression, result, evaluated_at FROM history
+    ORDER BY id DESC
+    LIMIT ?
+"""
+
+SQL_COUNT_HISTORY = "SELECT COUNT(*) FROM history"
+
+# 先頭一致の範囲の上端（どの文字よりも後ろに並ぶ）
+_PREFIX_END = "\U0010ffff"
+
+
+class CalcHistory:
+    """計算の履歴（SQLite）と、式 → 結果のメモ（スレッドセーフ）
+
+    add() はすぐには書き込まず、BATCH_SIZE 件たまるか FLUSH_INTERVAL 秒たったときに
+    （タイマーのスレッドで）まとめて1つのトランザクションで書く。まだ書いていない分も
+    検索・呼び出しに含める。close() せずにプロセスが落ちると、最後の FLUSH_INTERVAL 秒
+    ほどの記録は失われる。
+    式は数の種類（backend.key）ごとに区別する。保存した結果は evaluator_version
+    （既定は calc_expr.EVALUATOR_VERSION）が前回と違えば捨て、計算し直す。
+    """
+
+    def __init__(self, db_name=DB_NAME, batch_size=BATCH_SIZE, flush_interval=FLUSH_INTERVAL,
+                 memo_size=MEMO_SIZE, evaluator_version=EVALUATOR_VERSION):
+        self.db_name = db_name
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.memo_size = memo_size
+        self.evaluator_version = evaluator_version
+        self.conn = sqlite3.connect(db_name, check_same_thread=False)
+        for pragma in PRAGMAS:
+            self.conn.execute(pragma)
+        self._lock = threading.Lock()
+        # 書き込み待ちの (backend, expression, result, evaluated_at)
+        self._pending = []
+        self._memo = OrderedDict()
+        self._timer = None
+        self._closed = False
+        self.memo_hits = 0
+        self.db_hits = 0
+        self.misses = 0
+        self.init_schema()
+        self.check_evaluator_version()
+
+    def init_schema(self):
+        """テーブルを作る（スキーマが最新なら何もしない）"""
+        with self._lock:
+            if self.conn.execute("PRAGMA user_version").fetchone()[0] >= SCHEMA_VERSION:
+                return False
+            with self.conn:
+                self.conn.executescript(SCHEMA)
+                self.conn.execute(f"PRAGMA user_version = {SCHEMA_VERSION}")
+            return True
+
+    def check_evaluator_version(self):
+        """保存した結果が今の計算機のものでなければ消す（消したかを返す。計算の記録は残す）"""
+        with self._lock:
+            row = self.conn.execute(SQL_SELECT_EVALUATOR_VERSION).fetchone()
+            if row is not None and row[0] == self.evaluator_version:
+                return False
+            with self.conn:
+                self.conn.execute(SQL_DELETE_RESULTS)
+                self.conn.execute(SQL_UPSERT_EVALUATOR_VERSION, (self.evaluator_version,))
+            self._memo.clear()
+            return True
+
+    def lookup(self, expression, backend_key):
+        """前に計算した結果（なければ None）。メモになければDBを主キーで引く"""
+        key = (backend_key, expression)
+        with self._lock:
+            result = self._memo.get(key)
+            if result is not None:
+                self._memo.move_to_end(key)
+                self.memo_hits += 1
+                return result
+            row = self.conn.execute(SQL_SELECT_RESULT, key).fetchone()
+            if row is None:
+                self.misses += 1
+                return None
+            self.db_hits += 1
+            self._remember(key, row[0])
+            return row[0]
+
+    def add(self, expression, result, backend_key):
+        """計算した式と結果を記録する（書き込みはまとめて行う）"""
+        with self._lock:
+            self._pending.append((backend_key, expression, result, time.time()))
+            self._remember((backend_key, expression), result)
+            if len(self._pending) >= self.batch_size:
+                self._flush()
+            elif self._timer is None:
+                # 追加が止まっても FLUSH_INTERVAL 秒後には書き込む
+                self._timer = threading.Timer(self.flush_interval, self._flush_later)
+                self._timer.daemon = True
+                self._timer.start()
+
+    def flush(self):
+        """書き込み待ちの記録をすべて書き込む"""
+        with self._lock:
+            self._flush()
+
+    def _flush_later(self):
+        with self._lock:
+            self._timer = None
+            if not self._closed:
+                self._flush()
+
+    def _flush(self):
+        if not self._pending:
+            return
+        pending, self._pending = self._pending, []
+        with self.conn:
+            self.conn.executemany(SQL_INSERT_HISTORY, pending)
+            self.conn.executemany(SQL_UPSERT_RESULT, [row[:3] for row in pending])
+
+    def _remember(self, key, result):
+        self._memo[key] = result
+        self._memo.move_to_end(key)
+        if len(self._memo) > self.memo_size:
+            self._memo.popitem(last=False)
+
+    def search(self, prefix, backend_key, limit=20):
+        """prefix で始まる式と最新の結果 [(式, 結果), ...]（式の順）"""
+        with self._lock:
+            found = dict(self.conn.execute(
+                SQL_SEARCH_PREFIX, (backend_key, prefix, prefix + _PREFIX_END, limit)).fetchall())
+            for backend, expression, result, _ in self._pending:
+                if backend == backend_key and expression.startswith(prefix):
+                    found[expression] = result
+        return sorted(found.items())[:limit]
+
+    def recent(self, limit=20):
+        """新しい順の記録 [(数の種類, 式, 結果, 計算した時刻), ...]"""
+        with self._lock:
+            entries = self._pending[::-1][:limit]
+            if len(entries) < limit:
+                entries += self.conn.execute(SQL_SELECT_RECENT, (limit - len(entries),)).fetchall()
+        return entries
+
+    def count(self):
+        """記録の件数（書き込み待ちを含む）"""
+        with self._lock:
+            return self.conn.execute(SQL_COUNT_HISTORY).fetchone()[0] + len(self._pending)
+
+    def stats(self):
+        """メモ・DBでの見つかった数と、書き込み待ちの件数"""
+        with self._lock:
+            return {
+                "memo_size": len(self._memo),
+                "memo_hits": self.memo_hits,
+                "db_hits": self.db_hits,
+                "misses": self.misses,
+                "pending": len(self._pending),
+            }
+
+    def close(self):
+        with self._lock:
+            if self._closed:
+                return
+            if self._timer is not None:
+                self._timer.cancel()
+                self._timer = None
+            self._flush()
+            self._closed = True
+            self.conn.close()
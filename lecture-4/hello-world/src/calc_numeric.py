@@ -0,0 +1,352 @@
+import math
+from decimal import ROUND_HALF_EVEN, Context, Decimal, localcontext
+from fractions import Fraction
+from functools import lru_cache
+
+from calc_expr import FLOAT, run
+
+# Decimal の既定の精度（有効桁数）。Fraction で割り切れない関数の値もこの桁数に丸める
+DEFAULT_PRECISION = 28
+
+# Ziv の方法で最初に足す桁数と、これ以上は精度を上げない上限（精度に対する倍率）
+GUARD_DIGITS = 10
+MAX_PRECISION_FACTOR = 8
+
+# Fraction の整数乗の結果の大きさ（ビット数）の上限（float のオーバーフローの代わり）
+MAX_FRACTION_BITS = 1 << 20
+
+# sin・cos・tan の引数の整数部の桁数の上限（float と同じく 1e308 程度まで）。
+# 2π の倍数を引くのに引数の桁数ぶん精度が要るので、これより大きいと計算が終わらない
+MAX_TRIG_DIGITS = 308
+
+
+def _context(precision):
+    return Context(prec=precision, rounding=ROUND_HALF_EVEN)
+
+
+def correctly_rounded(compute, precision):
+    """precision 桁に正しく丸めた値（Ziv の方法）
+
+    compute(w) は w 桁で計算した (値, 誤差の上限) を返す。値 ± 誤差 の両端を precision 桁に
+    丸めて一致すれば、真の値を丸めたものもそれと同じなので返す。一致しなければ w を
+    増やして計算し直す（真の値がちょうど丸めの境目にある場合は上限の桁数で打ち切る）。
+    """
+    context = _context(precision)
+    working = precision + GUARD_DIGITS
+    while True:
+        value, error = compute(working)
+        low, high = context.subtract(value, error), context.add(value, error)
+        if low == high:
+            return low
+        if working > precision * MAX_PRECISION_FACTOR:
+            return context.plus(value)
+        working *= 2
+
+
+def _ulps(value, precision, count=1):
+    """precision 桁で計算した value の最後の桁 count 個分"""
+    return Decimal(count).scaleb(value.adjusted() - precision + 1)
+
+
+def _to_decimal(x, precision):
+    """Fraction なら precision 桁の Decimal に（Decimal・整数はそのまま）"""
+    if isinstance(x, Fraction):
+        return _context(precision).divide(Decimal(x.numerator), Decimal(x.denominator))
+    return Decimal(x)
+
+
+@lru_cache(maxsize=16)
+def _pi(precision):
+    """precision 桁の π（誤差は最後の桁の 1 以内。decimal のドキュメントの方法）"""
+    with localcontext(_context(precision + 2)):
+        three = Decimal(3)
+        lasts, t, s, n, na, d, da = 0, three, 3, 1, 0, 0, 24
+        while s != lasts:
+            lasts = s
+            n, na = n + na, na + 8
+            d, da = d + da, da + 32
+            t = (t * n) / d
+            s += t
+    return _context(precision).plus(s)
+
+
+def _pi_rounded(precision):
+    """precision 桁に正しく丸めた π"""
+    return correctly_rounded(lambda w: (_pi(w), Decimal(1).scaleb(-w + 1)), precision)
+
+
+def _sin_cos(x, precision):
+    """precision 桁の (sin x, cos x)。誤差はどちらも 10**-precision 以内"""
+    # 2π の倍数を引くとき x の整数部の桁数ぶん π の誤差が大きくなるので、その分多く計算する
+    digits = _to_decimal(x, 20).adjusted()
+    if digits > MAX_TRIG_DIGITS:
+        raise OverflowError("math range error")
+    extra = max(0, digits) + 5
+    working = precision + extra
+    with localcontext(_context(working)):
+        r = _to_decimal(x, working).remainder_near(2 * _pi(working))
+        r2 = r * r
+        epsilon = Decimal(1).scaleb(-working)
+        sin = sin_term = r
+        cos = cos_term = Decimal(1)
+        i = 1
+        # テイラー級数（|r| <= π なので項はすぐ小さくなる）
+        while abs(sin_term) >= epsilon or abs(cos_term) >= epsilon:
+            cos_term = -cos_term * r2 / (i * (i + 1))
+            sin_term = -sin_term * r2 / ((i + 1) * (i + 2))
+            sin += sin_term
+            cos += cos_term
+            i += 2
+    return sin, cos
+
+
+def _sin(x, precision):
+    if x == 0:
+        return Decimal(0)
+    return correctly_rounded(lambda w: (_sin_cos(x, w)[0], Decimal(1).scaleb(-w + 1)), precision)
+
+
+def _cos(x, precision):
+    if x == 0:
+        return Decimal(1)
+    return correctly_rounded(lambda w: (_sin_cos(x, w)[1], Decimal(1).scaleb(-w + 1)), precision)
+
+
+def _tan(x, precision):
+    if x == 0:
+        return Decimal(0)
+
+    def compute(w):
+        sin, cos = _sin_cos(x, w)
+        error = Decimal(1).scaleb(-w + 1)
+        with localcontext(_context(w)):
+            tan = sin / cos
+            # sin・cos の誤差（絶対値）を tan の相対誤差に直す
+            return tan, abs(tan) * (error / abs(sin) + error / abs(cos)) + _ulps(tan, w)
+
+    return correctly_rounded(compute, precision)
+
+
+def _ln(x, precision):
+    """ln x（Decimal の ln は正しく丸められるので、Fraction を十分な桁の Decimal にして使う）"""
+    if isinstance(x, Decimal):
+        return _context(precision).ln(x)
+    if x <= 0:
+        raise ValueError("math domain error")
+    if x == 1:
+        return Decimal(0)
+
+    def compute(w):
+        # 引数の相対誤差 10**(1-w) は ln の絶対誤差 10**(1-w) になる
+        value = _context(w).ln(_to_decimal(x, w + 1))
+        return value, _ulps(value, w) + Decimal(1).scaleb(-w)
+
+    return correctly_rounded(compute, precision)
+
+
+def _log10(x, precision):
+    if isinstance(x, Decimal):
+        return _context(precision).log10(x)
+    if x <= 0:
+        raise ValueError("math domain error")
+    # 10 の累乗（10**k と 1/10**k）はちょうど求まる
+    if x.numerator == 1 or x.denominator == 1:
+        digits = str(x.numerator * x.denominator)
+        if digits == "1" + "0" * (len(digits) - 1):
+            return Decimal(len(digits) - 1 if x.denominator == 1 else 1 - len(digits))
+
+    def compute(w):
+        value = _context(w).log10(_to_decimal(x, w + 1))
+        return value, _ulps(value, w) + Decimal(1).scaleb(-w)
+
+    return correctly_rounded(compute, precision)
+
+
+def _sqrt(x, precision):
+    if isinstance(x, Decimal):
+        return _context(precision).sqrt(x)
+    if x < 0:
+        raise ValueError("math domain error")
+    # 分子・分母が平方数ならちょうど求まる
+    numerator, denominator = math.isqrt(x.numerator), math.isqrt(x.denominator)
+    if numerator * numerator == x.numerator and denominator * denominator == x.denominator:
+        return Fraction(numerator, denominator)
+
+    def compute(w):
+        # 引数の相対誤差 10**(1-w) は平方根では半分になる
+        value = _context(w).sqrt(_to_decimal(x, w + 1))
+        return value, _ulps(value, w, 2)
+
+    return correctly_rounded(compute, precision)
+
+
+def _power(a, b, precision):
+    """a ** b（b が整数でなければ exp(b ln a) を正しく丸める）"""
+    if b == int(b):
+        if isinstance(a, Fraction):
+            size = max(a.numerator.bit_length(), a.denominator.bit_length())
+            if size * abs(int(b)) > MAX_FRACTION_BITS:
+                raise OverflowError("result too large")
+            return a ** int(b)
+        return _context(precision).power(a, int(b))
+    if a < 0:
+        # float と同じく、負の数の小数乗は定義域外
+        raise ValueError("math domain error")
+    if a == 0:
+        if b < 0:
+            raise ZeroDivisionError("0 cannot be raised to a negative power")
+        return Decimal(0)
+    if isinstance(a, Fraction) and isinstance(b, Fraction):
+        exact = _exact_root_power(a, b)
+        if exact is not None:
+            return exact
+
+    def compute(w):
+        with localcontext(_context(w + 5)):
+            exponent = _to_decimal(b, w + 5) * _to_decimal(a, w + 5).ln()
+            value = _context(w).exp(exponent)
+        # 指数の絶対誤差は結果の相対誤差になる
+        return value, abs(value) * (abs(exponent) + 1) * Decimal(1).scaleb(-w + 1) + _ulps(value, w)
+
+    return correctly_rounded(compute, precision)
+
+
+def _integer_root(n, k):
+    """正の整数 n の k 乗根が整数ならそれを、そうでなければ None"""
+    # 真の値より大きい 2 の累乗から整数のニュートン法で下げていく
+    root = 1 << -(-n.bit_length() // k)
+    while True:
+        better = ((k - 1) * root + n // root ** (k - 1)) // k
+        if better >= root:
+            break
+        root = better
+    return root if root ** k == n else None
+
+
+def _exact_root_power(a, b):
+    """a ** b がちょうど有理数になるならその Fraction（b = p/q で a の分子・分母が q 乗数のとき）"""
+    if b.denominator > 64:
+        return None
+    numerator = _integer_root(a.numerator, b.denominator)
+    denominator = _integer_root(a.denominator, b.denominator)
+    if numerator is None or denominator is None:
+        return None
+    return Fraction(numerator, denominator) ** b.numerator
+
+
+class DecimalBackend:
+    """decimal.Decimal で precision 桁に丸めて計算する（関数も precision 桁に正しく丸める）"""
+
+    name = "decimal"
+
+    def __init__(self, precision=DEFAULT_PRECISION):
+        self.precision = precision
+        self.key = f"decimal:{precision}"
+        self.context = _context(precision)
+        self.constants = {
+            "π": _pi_rounded(precision),
+            "pi": _pi_rounded(precision),
+            "e": self.context.exp(1),
+        }
+        self.functions = {
+            name: self._function(func)
+            for name, func in (("sin", _sin), ("cos", _cos), ("tan", _tan), ("log", _log10),
+                               ("ln", _ln), ("√", _sqrt), ("sqrt", _sqrt))
+        }
+        self.binary = {"^": lambda a, b: _power(a, b, precision)}
+
+    def _function(self, func):
+        precision = self.precision
+        return lambda x: func(x, precision)
+
+    def number(self, text):
+        return Decimal(text)
+
+    def run(self, code, values=None):
+        with localcontext(self.context):
+            return run(code, values)
+
+    def is_finite(self, value):
+        return value.is_finite()
+
+    def format(self, value):
+        if value == 0:
+            return "0"
+        # 指数表記（1E+30）は式に書き戻せないので、桁をすべて書く
+        return format(value.normalize(self.context), "f")
+
+    def __repr__(self):
+        return f"DecimalBackend(precision={self.precision})"
+
+
+class FractionBackend:
+    """fractions.Fraction でちょうど計算する
+
+    四則演算・整数乗・平方数の平方根などはちょうどの値になる。割り切れない関数の値は
+    precision 桁に正しく丸めた値を Fraction にして続きを計算する。
+    """
+
+    name = "fraction"
+
+    def __init__(self, precision=DEFAULT_PRECISION):
+        self.precision = precision
+        self.key = f"fraction:{precision}"
+        self.context = _context(precision)
+        self.constants = {
+            "π": Fraction(_pi_rounded(precision)),
+            "pi": Fraction(_pi_rounded(precision)),
+            "e": Fraction(self.context.exp(1)),
+        }
+        self.functions = {
+            name: self._function(func)
+            for name, func in (("sin", _sin), ("cos", _cos), ("tan", _tan), ("log", _log10),
+                               ("ln", _ln), ("√", _sqrt), ("sqrt", _sqrt))
+        }
+        self.binary = {"^": self._power}
+
+    def _function(self, func):
+        precision = self.precision
+
+        def apply(x):
+            return Fraction(func(Fraction(x), precision))
+        return apply
+
+    def _power(self, a, b):
+        return Fraction(_power(Fraction(a), Fraction(b), self.precision))
+
+    number = staticmethod(Fraction)
+    run = staticmethod(run)
+
+    def is_finite(self, value):
+        return True
+
+    def format(self, value):
+        """整数・有限小数はそのまま、それ以外は 分子/分母（式に書き戻してもちょうどの値になる）"""
+        value = Fraction(value)
+        if value.denominator == 1:
+            return str(value.numerator)
+        denominator = value.denominator
+        twos = fives = 0
+        while denominator % 2 == 0:
+            denominator //= 2
+            twos += 1
+        while denominator % 5 == 0:
+            denominator //= 5
+            fives += 1
+        if denominator != 1:
+            return f"{value.numerator}/{value.denominator}"
+        places = max(twos, fives)
+        digits = str(abs(value.numerator) * 10 ** places // value.denominator).rjust(places + 1, "0")
+        sign = "-" if value < 0 else ""
+        return f"{sign}{digits[:-places]}.{digits[-places:]}"
+
+    def __repr__(self):
+        return f"FractionBackend(precision={self.precision})"
+
+
+# 電卓で選べる数の種類
+BACKENDS = {
+    "float": FLOAT,
+    "decimal": DecimalBackend(),
+    "fraction": FractionBackend(),
+}
@@ -0,0 +1,115 @@
+"""calc_expr（式のコンパイル）と calc_engine（キー操作）のテスト"""
+import math
+
+import pytest
+
+from calc_engine import CalculatorEngine
+from calc_expr import CalcError, compile_expression, evaluate_expression, tokenize
+from calc_numeric import BACKENDS
+
+
+def press(keys, backend=None):
+    engine = CalculatorEngine() if backend is None else CalculatorEngine(backend=backend)
+    engine.replay(keys)
+    return engine
+
+
+@pytest.mark.parametrize("source, expected", [
+    ("1 + 2 * 3", 7),
+    ("(1 + 2) * 3", 9),
+    ("-2 ^ 2", -4),
+    ("2 ^ 3 ^ 2", 512),
+    ("2π", 2 * math.pi),
+    ("2(3 + 4)", 14),
+    ("√9 + 3²", 12),
+    ("50%", 0.5),
+    ("sin(0", 0),
+])
+def test_evaluate_expression(source, expected):
+    assert evaluate_expression(source) == pytest.approx(expected)
+
+
+@pytest.mark.parametrize("source", ["2 + ", "1.2.3", "(1 + 2))", "1 / 0", "√(-1)", "* 2"])
+def test_evaluate_expression_errors(source):
+    with pytest.raises(CalcError):
+        evaluate_expression(source)
+
+
+def test_scientific_notation_is_one_number():
+    assert tokenize("5e-05") == [("number", "5e-05")]
+    assert tokenize("1.5e+20 * 2") == [("number", "1.5e+20"), ("symbol", "*"), ("number", "2")]
+    assert evaluate_expression("5e-05 * 2") == pytest.approx(1e-04)
+
+
+def test_e_without_sign_is_euler_number():
+    # キーで 2・e・3 と押した式は 2 × e × 3 のまま
+    assert evaluate_expression("2e3") == pytest.approx(6 * math.e)
+    assert evaluate_expression("2e - 3") == pytest.approx(2 * math.e - 3)
+
+
+def test_variables():
+    program = compile_expression("2x + y")
+    assert program.variables == {"x", "y"}
+    assert evaluate_expression("2x + y", {"x": 3, "y": 1}) == 7
+
+
+def test_keys():
+    engine = press(["1", "2", "+", "3", "*", "2"])
+    assert engine.expression == "12 + 3 * 2"
+    assert engine.result == "18"
+    engine.press("=")
+    assert engine.expression == "12 + 3 * 2 = "
+    assert engine.result == "18"
+
+
+def test_error_then_any_key_clears():
+    engine = press(["1", "/", "0", "="])
+    assert engine.result == "Error"
+    engine.press("5")
+    assert engine.result == "0"
+    assert engine.expression == ""
+
+
+# 結果が指数表記（5e-05）になったあとに、その結果の続きを計算する
+SMALL_RESULT = ["1", "/", "2", "0", "0", "0", "0", "="]
+
+
+@pytest.mark.parametrize("keys, expected", [
+    (["*", "2", "="], 1e-04),
+    (["x²"], 2.5e-09),
+    (["+/-"], -5e-05),
+    (["sin"], math.sin(5e-05)),
+    (["+", "1", "="], 1.00005),
+])
+def test_continue_from_scientific_result(keys, expected):
+    engine = press(SMALL_RESULT)
+    assert engine.result == "5e-05"
+    engine.replay(keys)
+    assert float(engine.result) == pytest.approx(expected)
+
+
+def test_continue_from_large_result():
+    engine = press(["1", "0", "x^y", "2", "0", "="])
+    assert engine.result == "100000000000000000000"
+    engine.replay(["*", "1", ".", "5", "="])
+    assert float(engine.result) == pytest.approx(1.5e20)
+    engine.replay(["*", "1", "0", "="])
+    assert float(engine.result) == pytest.approx(1.5e21)
+
+
+def test_fraction_result_continues_as_fraction():
+    engine = press(["1", "/", "3", "="], BACKENDS["fraction"])
+    assert engine.result == "1/3"
+    engine.replay(["x^y", "2", "="])
+    assert engine.result == "1/9"
+
+
+def test_decimal_backend_is_exact():
+    engine = press(["0", ".", "1", "+", "0", ".", "2", "="], BACKENDS["decimal"])
+    assert engine.result == "0.3"
+
+
+def test_numeric_backends_reject_huge_trig_arguments():
+    for name in ("decimal", "fraction"):
+        with pytest.raises(CalcError):
+            evaluate_expression("sin(10 ^ 400)", None, BACKENDS[name])
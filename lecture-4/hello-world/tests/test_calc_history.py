@@ -0,0 +1,95 @@
+"""calc_history（計算履歴とメモ）のテスト"""
+import sqlite3
+import time
+
+import pytest
+
+from calc_history import CalcHistory
+
+
+@pytest.fixture
+def db_name(tmp_path):
+    return str(tmp_path / "history.db")
+
+
+def test_lookup_and_search_include_pending(db_name):
+    history = CalcHistory(db_name)
+    history.add("1 + 2", "3", "float")
+    history.add("1 + 3", "4", "float")
+    history.add("1 + 2", "3.0", "decimal:28")
+    assert history.lookup("1 + 2", "float") == "3"
+    assert history.lookup("1 + 2", "decimal:28") == "3.0"
+    assert history.lookup("2 + 2", "float") is None
+    assert history.search("1 +", "float") == [("1 + 2", "3"), ("1 + 3", "4")]
+    assert history.count() == 3
+    history.close()
+
+
+def test_results_survive_reopen(db_name):
+    history = CalcHistory(db_name)
+    history.add("2 * 3", "6", "float")
+    history.close()
+
+    history = CalcHistory(db_name)
+    assert history.lookup("2 * 3", "float") == "6"
+    assert history.stats()["db_hits"] == 1
+    assert [entry[1:3] for entry in history.recent()] == [("2 * 3", "6")]
+    history.close()
+
+
+def test_evaluator_version_change_drops_results(db_name):
+    history = CalcHistory(db_name, evaluator_version=1)
+    history.add("5e-05 * 2", "Error", "float")
+    history.close()
+
+    history = CalcHistory(db_name, evaluator_version=1)
+    assert history.lookup("5e-05 * 2", "float") == "Error"
+    history.close()
+
+    # 計算機を直したら、前の版の結果は使わない（記録は残す）
+    history = CalcHistory(db_name, evaluator_version=2)
+    assert history.lookup("5e-05 * 2", "float") is None
+    assert history.count() == 1
+    history.close()
+
+
+def test_schema_v1_results_are_dropped(db_name):
+    conn = sqlite3.connect(db_name)
+    conn.executescript("""
+        CREATE TABLE history (id INTEGER PRIMARY KEY, backend TEXT NOT NULL, expression TEXT NOT NULL,
+                              result TEXT NOT NULL, evaluated_at REAL NOT NULL);
+        CREATE TABLE results (backend TEXT NOT NULL, expression TEXT NOT NULL, result TEXT NOT NULL,
+                              PRIMARY KEY (backend, expression)) WITHOUT ROWID;
+        INSERT INTO results VALUES ('float', '5e-05 * 2', '3.5914091423');
+        PRAGMA user_version = 1;
+    """)
+    conn.close()
+
+    history = CalcHistory(db_name)
+    assert history.lookup("5e-05 * 2", "float") is None
+    history.close()
+
+
+def test_pending_entries_are_flushed_by_timer(db_name):
+    history = CalcHistory(db_name, flush_interval=0.05)
+    history.add("1 + 1", "2", "float")
+    deadline = time.monotonic() + 5
+    while history.stats()["pending"] and time.monotonic() < deadline:
+        time.sleep(0.01)
+    assert history.stats()["pending"] == 0
+
+    # close() せずに別の接続から読めるか
+    conn = sqlite3.connect(db_name)
+    assert conn.execute("SELECT expression, result FROM history").fetchall() == [("1 + 1", "2")]
+    conn.close()
+    history.close()
+
+
+def test_batch_size_flushes_immediately(db_name):
+    history = CalcHistory(db_name, batch_size=2, flush_interval=60)
+    history.add("1", "1", "float")
+    assert history.stats()["pending"] == 1
+    history.add("2", "2", "float")
+    assert history.stats()["pending"] == 0
+    history.close()
+    history.close()
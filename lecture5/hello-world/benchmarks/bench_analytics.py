@@ -0,0 +1,106 @@
+"""予報の変化の集計（forecast_analytics）のベンチマーク
+
+従来の「fetchall() で全件を読み、Pythonで予報日ごとに並べて直前の発表と比べる」
+方式と、forecast_analytics.update_revisions（索引順の読み出し + pandas の shift と列演算、結果はDBに保存）の
+全件集計、さらに1回分の発表を追加したあとの差分更新の時間を比較する。
+
+実行: python benchmarks/bench_analytics.py [--offices 60] [--reports 240]
+"""
+import argparse
+import os
+import sqlite3
+import sys
+import tempfile
+import time
+from datetime import datetime, timedelta
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "src"))
+
+from forecast_analytics import update_revisions  # noqa: E402
+from forecast_parser import build_report  # noqa: E402
+from weather_icons import weather_category  # noqa: E402
+from weather_store import WeatherStore  # noqa: E402
+
+WEATHERS = ("晴れ", "晴れ　時々　くもり", "くもり", "くもり　後　雨", "雨", "雪")
+
+LEGACY_SELECT = """
+    SELECT office_code, forecast_date, report_datetime, weather, temp_min, temp_max
+    FROM forecasts
+"""
+
+
+def make_cycle(offices, r, days=7):
+    """r 回目の発表（1日2回）の全オフィス分"""
+    start = datetime(2024, 1, 1, 5) + timedelta(hours=12 * r)
+    report_datetime = f"{start:%Y-%m-%dT%H}:00:00+09:00"
+    # 気象庁と同じく、当日分の予報日時は発表時刻
+    dates = [report_datetime] + [f"{start.date() + timedelta(days=d)}T00:00:00+09:00" for d in range(1, days)]
+    results = []
+    for o in range(offices):
+        weathers = [WEATHERS[(o + r * 3 + d * 5) % len(WEATHERS) if (o + r) % 4 == 0 else (o + d) % len(WEATHERS)]
+                    for d in range(days)]
+        temps_min = [str((o + d) % 12 - 2 + (r % 3)) for d in range(days)]
+        temps_max = [str((o + d) % 12 + 8 - (r % 2)) for d in range(days)]
+        results.append((f"{o:06d}", build_report(report_datetime, dates, weathers, temps_min, temps_max)))
+    return results
+
+
+def legacy_revisions(conn):
+    """従来方式: 全件を読み、Pythonのループで直前の発表と比べる（予報日は日時の日付部分）"""
+    by_date = {}
+    for office_code, forecast_date, report_datetime, weather, temp_min, temp_max in conn.execute(LEGACY_SELECT).fetchall():
+        by_date.setdefault((office_code, forecast_date[:10]), []).append((report_datetime, weather, temp_min, temp_max))
+
+    revisions = []
+    for (office_code, forecast_date), reports in by_date.items():
+        reports.sort()
+        for prev, cur in zip(reports, reports[1:]):
+            flipped = weather_category(cur[1]) != weather_category(prev[1])
+            drift_min = float(cur[2]) - float(prev[2]) if cur[2] and prev[2] else None
+            drift_max = float(cur[3]) - float(prev[3]) if cur[3] and prev[3] else None
+            revisions.append((office_code, forecast_date, cur[0], flipped, drift_min, drift_max))
+    return revisions
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--offices", type=int, default=60)
+    parser.add_argument("--reports", type=int, default=240, help="発表回数（1日2回）")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        db_name = os.path.join(tmp, "bench.db")
+        store = WeatherStore(db_name)
+        store.init_schema()
+        for r in range(args.reports):
+            store.save_forecasts(make_cycle(args.offices, r))
+
+        conn = sqlite3.connect(db_name)
+        rows = conn.execute("SELECT COUNT(*) FROM forecasts").fetchone()[0]
+
+        start = time.perf_counter()
+        legacy = legacy_revisions(conn)
+        legacy_elapsed = time.perf_counter() - start
+
+        full = update_revisions(conn)
+
+        # 1回分の発表を追加して差分だけ更新
+        store.save_forecasts(make_cycle(args.offices, args.reports))
+        incremental = update_revisions(conn)
+
+        start = time.perf_counter()
+        legacy_revisions(conn)
+        legacy_again = time.perf_counter() - start
+        conn.close()
+        store.close()
+
+    print(f"rows={rows} offices={args.offices} reports={args.reports}")
+    print(f"従来方式 (fetchall + Pythonループ, 保存なし): {legacy_elapsed:7.3f} 秒  変化 {len(legacy)} 件")
+    print(f"update_revisions (全件, pandas + 保存):      {full['elapsed']:7.3f} 秒  変化 {full['revisions']} 件 "
+          f"(天気が変わった {full['flips']} 件)")
+    print(f"発表1回分を追加後: 従来方式 {legacy_again:.3f} 秒 / update_revisions(差分) "
+          f"{incremental['elapsed']:.3f} 秒 (読み直し {incremental['history_rows']} 行)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,107 @@
+"""area.json 取り込みのベンチマーク
+
+従来方式（子ごとに親の children を全走査し、1行ずつ INSERT）と
+WeatherStore.save_area（逆引き表 + executemany + 1トランザクション）を比較する。
+area.json は実物と同程度の規模のダミーを生成する。
+
+実行: python benchmarks/bench_area_ingest.py [--scale 1]
+"""
+import argparse
+import os
+import sqlite3
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "src"))
+
+from weather_store import AREA_LEVELS, SQL_INSERT_SUB_AREA, WeatherStore  # noqa: E402
+
+# 実物の area.json のおおよその件数
+LEVEL_SIZES = {"centers": 11, "offices": 58, "class10s": 142, "class15s": 372, "class20s": 1896}
+
+
+def make_area_json(scale=1):
+    """各階層を指定件数だけ持つダミーの area.json を作る"""
+    area = {}
+    previous = None
+    for depth, level in enumerate(AREA_LEVELS):
+        count = LEVEL_SIZES[level] * scale
+        codes = [f"{depth}{i:06d}" for i in range(count)]
+        area[level] = {code: {"name": f"{level}-{i}", "children": []} for i, code in enumerate(codes)}
+        if previous:
+            parent_codes = list(area[previous])
+            for i, code in enumerate(codes):
+                parent = parent_codes[i % len(parent_codes)]
+                area[previous][parent]["children"].append(code)
+                area[level][code]["parent"] = parent
+        previous = level
+    return area
+
+
+def legacy_save_area(db_name, area_json):
+    """従来方式: 親を毎回全走査し、1行ずつ INSERT する（下位階層も同じやり方で拡張）"""
+    conn = sqlite3.connect(db_name)
+    cursor = conn.cursor()
+    created_at = "2025-01-01T00:00:00"
+
+    for center_code, center_data in area_json["centers"].items():
+        cursor.execute(
+            "INSERT OR REPLACE INTO centers (center_code, center_name, created_at) VALUES (?, ?, ?)",
+            (center_code, center_data["name"], created_at),
+        )
+
+    for parent_level, level in zip(AREA_LEVELS, AREA_LEVELS[1:]):
+        for code, data in area_json[level].items():
+            parent = None
+            for parent_code, parent_data in area_json[parent_level].items():
+                if code in parent_data.get("children", []):
+                    parent = parent_code
+                    break
+            if not parent:
+                continue
+            if level == "offices":
+                cursor.execute(
+                    "INSERT OR REPLACE INTO offices (office_code, office_name, center_code, created_at) "
+                    "VALUES (?, ?, ?, ?)",
+                    (code, data["name"], parent, created_at),
+                )
+            else:
+                cursor.execute(SQL_INSERT_SUB_AREA, (level, code, data["name"], parent, created_at))
+
+    conn.commit()
+    conn.close()
+
+
+def timed(func, *args):
+    start = time.perf_counter()
+    func(*args)
+    return time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--scale", type=int, default=1, help="各階層の件数の倍率")
+    args = parser.parse_args()
+
+    area_json = make_area_json(args.scale)
+    total = sum(len(area_json[level]) for level in AREA_LEVELS)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        legacy_db = os.path.join(tmp, "legacy.db")
+        WeatherStore(legacy_db).init_schema()
+        legacy = timed(legacy_save_area, legacy_db, area_json)
+
+        store = WeatherStore(os.path.join(tmp, "store.db"))
+        store.init_schema()
+        indexed = timed(store.save_area, area_json)
+        store.close()
+
+    print(f"areas={total} (scale={args.scale})")
+    print(f"従来方式 (全走査 + 1行ずつ):     {legacy * 1000:9.1f} ms")
+    print(f"逆引き表 + executemany:          {indexed * 1000:9.1f} ms")
+    print(f"倍率: {legacy / indexed:.1f}x")
+
+
+if __name__ == "__main__":
+    main()
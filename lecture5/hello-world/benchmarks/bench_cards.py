@@ -0,0 +1,129 @@
+"""地域切り替え時の予報カード描画のベンチマーク
+
+従来方式（毎回カードを作り直して controls.clear() + page.update()）と
+ForecastCardPool（作り置きのカードを差し替えて page.update(*changed)）で、
+1回の切り替えあたりの作成コントロール数・送信バイト数・時間を比較する。
+
+実行: python benchmarks/bench_cards.py [--switches 200]
+"""
+import argparse
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "src"))
+
+import flet as ft  # noqa: E402
+from flet_probe import ControlCounter, make_page  # noqa: E402
+from forecast_cards import ForecastCardPool, format_forecast_date, format_temp  # noqa: E402
+from weather_icons import get_weather_icon  # noqa: E402
+
+WEATHERS = ["晴れ　時々　くもり", "くもり", "雨　後　くもり", "雪", "くもり　一時　雨", "晴れ", "晴れ　後　雨"]
+
+
+def make_forecasts(switches, days=7):
+    """切り替えごとの予報（地域ごとに値が少しずつ違う）"""
+    forecasts = []
+    for s in range(switches):
+        forecasts.append([
+            (f"2025-01-{10 + d:02d}T00:00:00+09:00", WEATHERS[(s + d) % len(WEATHERS)], str(s % 5), str(10 + (s + d) % 7))
+            for d in range(days)
+        ])
+    return forecasts
+
+
+def legacy_card(date_str, weather, temp_min, temp_max):
+    """従来の create_forecast_card と同じ構造のカード"""
+    return ft.Container(
+        content=ft.Column(
+            [
+                ft.Text(format_forecast_date(date_str), size=14, weight=ft.FontWeight.BOLD, color="white"),
+                ft.Container(height=5),
+                ft.Text(get_weather_icon(weather), size=48),
+                ft.Container(height=5),
+                ft.Text(weather, size=11, text_align=ft.TextAlign.CENTER, color="#B0BEC5", max_lines=2),
+                ft.Container(height=5),
+                ft.Row(
+                    [
+                        ft.Text(format_temp(temp_min), size=14, color="#81D4FA", weight=ft.FontWeight.BOLD),
+                        ft.Text("/", size=14, color="#B0BEC5"),
+                        ft.Text(format_temp(temp_max), size=14, color="#EF5350", weight=ft.FontWeight.BOLD),
+                    ],
+                    alignment=ft.MainAxisAlignment.CENTER,
+                    spacing=5,
+                ),
+            ],
+            horizontal_alignment=ft.CrossAxisAlignment.CENTER,
+            alignment=ft.MainAxisAlignment.CENTER,
+        ),
+        width=140,
+        height=200,
+        bgcolor="#4DFFFFFF",
+        border_radius=10,
+        padding=12,
+        border=ft.border.all(1, "#33FFFFFF"),
+    )
+
+
+def sidebar():
+    """ページ全体の更新コストを実際に近づけるためのサイドバー（約60地域）"""
+    return ft.Column([
+        ft.ExpansionTile(
+            title=ft.Text(f"センター{c}"),
+            controls=[ft.ListTile(title=ft.Text(f"オフィス{c}-{o}"), data=f"{c}{o}") for o in range(6)],
+        )
+        for c in range(10)
+    ])
+
+
+def run_legacy(forecasts):
+    page, conn = make_page()
+    cards = ft.Row(wrap=True)
+    page.add(ft.Row([sidebar(), cards]))
+    conn.reset()
+
+    start = time.perf_counter()
+    with ControlCounter() as counter:
+        for forecast in forecasts:
+            cards.controls.clear()
+            for date_str, weather, temp_min, temp_max in forecast:
+                cards.controls.append(legacy_card(date_str, weather, temp_min, temp_max))
+            page.update()
+    return time.perf_counter() - start, counter.count, conn
+
+
+def run_pool(forecasts):
+    page, conn = make_page()
+    pool = ForecastCardPool()
+    page.add(ft.Row([sidebar(), pool.row]))
+    conn.reset()
+
+    start = time.perf_counter()
+    with ControlCounter() as counter:
+        for forecast in forecasts:
+            changed = []
+            for i, (date_str, weather, temp_min, temp_max) in enumerate(forecast):
+                changed.extend(pool.show(i, date_str, weather, temp_min, temp_max))
+            changed.extend(pool.hide_from(len(forecast)))
+            if changed:
+                page.update(*changed)
+    return time.perf_counter() - start, counter.count, conn
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--switches", type=int, default=200)
+    args = parser.parse_args()
+
+    forecasts = make_forecasts(args.switches)
+    n = args.switches
+    print(f"switches={n} (1回あたりの値)")
+    for label, runner in (("従来方式 (作り直し + page.update())", run_legacy),
+                          ("ForecastCardPool (差し替え)", run_pool)):
+        elapsed, created, conn = runner(forecasts)
+        print(f"{label:40s} controls作成 {created / n:6.1f}  追加送信 {conn.controls_added / n:6.1f}  "
+              f"{conn.bytes_sent / n:8.0f} bytes  {elapsed / n * 1000:6.2f} ms")
+
+
+if __name__ == "__main__":
+    main()
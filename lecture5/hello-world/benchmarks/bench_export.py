@@ -0,0 +1,127 @@
+"""予報履歴の書き出しのベンチマーク
+
+従来の「fetchall() で全件を読み、文字列の気温・日時をPythonで変換してから書く」
+方式と、forecast_export.export_forecasts（数値列をそのまま chunk 行ずつ読み、
+オフィス・月ごとのパーティションに書く）の時間とメモリの最大使用量を比較する。
+メモリは tracemalloc で測るため、どちらも CSV で書き出して比べ、Parquet は
+時間とファイルサイズだけを表示する（pyarrow がある場合）。
+
+実行: python benchmarks/bench_export.py [--offices 60] [--reports 120] [--chunk-size 50000]
+"""
+import argparse
+import csv
+import os
+import sqlite3
+import sys
+import tempfile
+import time
+import tracemalloc
+from datetime import datetime
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "src"))
+
+import forecast_export  # noqa: E402
+from forecast_export import export_forecasts, partition_dir, partition_key  # noqa: E402
+from forecast_parser import build_report  # noqa: E402
+from weather_store import WeatherStore  # noqa: E402
+
+LEGACY_SELECT = """
+    SELECT office_code, report_datetime, forecast_date, weather, temp_min, temp_max, fetched_at
+    FROM forecasts
+    ORDER BY office_code, report_datetime, forecast_date
+"""
+
+
+def seed(store, offices, reports, days=7):
+    """offices × reports 回分の予報（1日2回発表）を投入"""
+    results = []
+    for r in range(reports):
+        day, hour = divmod(r, 2)
+        report = datetime(2024, 1, 1).fromordinal(datetime(2024, 1, 1).toordinal() + day)
+        report_datetime = f"{report:%Y-%m-%d}T{5 + 12 * hour:02d}:00:00+09:00"
+        dates = [
+            f"{datetime.fromordinal(report.toordinal() + d):%Y-%m-%d}T00:00:00+09:00" for d in range(days)
+        ]
+        for o in range(offices):
+            temps_min = [str((o + r + d) % 15 - 3) for d in range(days)]
+            temps_max = [str((o + r + d) % 15 + 8) for d in range(days)]
+            results.append((f"{o:06d}", build_report(report_datetime, dates, ["晴れ"] * days, temps_min, temps_max)))
+        if len(results) >= 2000:
+            store.save_forecasts(results)
+            results = []
+    store.save_forecasts(results)
+
+
+def legacy_export(conn, out_dir):
+    """従来方式: 全件を fetchall() し、行ごとに文字列を変換してから書き出す"""
+    rows = conn.execute(LEGACY_SELECT).fetchall()
+    partitions = {}
+    for office_code, report_datetime, forecast_date, weather, temp_min, temp_max, fetched_at in rows:
+        converted = (
+            office_code, report_datetime, forecast_date, weather,
+            float(temp_min) if temp_min else None,
+            float(temp_max) if temp_max else None,
+            int(datetime.fromisoformat(forecast_date).timestamp()),
+            int(datetime.fromisoformat(report_datetime).timestamp()),
+            fetched_at,
+        )
+        partitions.setdefault(partition_key(converted), []).append(converted)
+
+    for (office_code, month), partition_rows in partitions.items():
+        directory = partition_dir(out_dir, office_code, month)
+        os.makedirs(directory, exist_ok=True)
+        with open(os.path.join(directory, "part-0.csv"), "w", newline="", encoding="utf-8") as f:
+            writer = csv.writer(f)
+            writer.writerow(forecast_export.COLUMNS)
+            writer.writerows(partition_rows)
+    return len(rows)
+
+
+def measure(func):
+    tracemalloc.start()
+    start = time.perf_counter()
+    result = func()
+    elapsed = time.perf_counter() - start
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return result, elapsed, peak
+
+
+def dir_size(path):
+    return sum(os.path.getsize(os.path.join(root, name)) for root, _, names in os.walk(path) for name in names)
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--offices", type=int, default=60)
+    parser.add_argument("--reports", type=int, default=120, help="地域ごとの発表回数（1日2回）")
+    parser.add_argument("--chunk-size", type=int, default=forecast_export.CHUNK_SIZE)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        db_name = os.path.join(tmp, "bench.db")
+        store = WeatherStore(db_name)
+        store.init_schema()
+        seed(store, args.offices, args.reports)
+        store.close()
+
+        conn = sqlite3.connect(db_name)
+        rows, legacy, legacy_peak = measure(lambda: legacy_export(conn, os.path.join(tmp, "legacy")))
+        summary, streamed, streamed_peak = measure(
+            lambda: export_forecasts(conn, os.path.join(tmp, "csv"), "csv", args.chunk_size)
+        )
+
+        print(f"rows={rows} partitions={summary['partitions']} chunk_size={args.chunk_size}")
+        print(f"従来方式 (fetchall + 文字列変換, CSV): {legacy:6.2f} 秒  最大メモリ {legacy_peak / 2**20:7.1f}MB")
+        print(f"export_forecasts (chunk, CSV):       {streamed:6.2f} 秒  最大メモリ {streamed_peak / 2**20:7.1f}MB")
+
+        if forecast_export.pq is not None:
+            summary = export_forecasts(conn, os.path.join(tmp, "parquet"), "parquet", args.chunk_size)
+            print(f"export_forecasts (chunk, Parquet):   {summary['elapsed']:6.2f} 秒  "
+                  f"サイズ {dir_size(os.path.join(tmp, 'parquet')) / 2**20:.1f}MB "
+                  f"(CSV {dir_size(os.path.join(tmp, 'csv')) / 2**20:.1f}MB)")
+        conn.close()
+
+
+if __name__ == "__main__":
+    main()
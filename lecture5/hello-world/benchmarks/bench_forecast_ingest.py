@@ -0,0 +1,91 @@
+"""予報データ取り込みのベンチマーク
+
+従来方式（地域ごとに接続し、1行ずつ execute して地域ごとに commit）と
+WeatherStore.save_forecasts（全地域を executemany + 1トランザクション）を比較する。
+
+実行: python benchmarks/bench_forecast_ingest.py [--offices 60] [--cycles 20]
+"""
+import argparse
+import os
+import sqlite3
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "src"))
+
+from forecast_parser import build_report  # noqa: E402
+from weather_store import WeatherStore  # noqa: E402
+
+# 従来の1行ずつのINSERT
+LEGACY_INSERT_FORECAST = """
+    INSERT OR IGNORE INTO forecasts
+    (office_code, forecast_date, weather, temp_min, temp_max, report_datetime, fetched_at)
+    VALUES (?, ?, ?, ?, ?, ?, ?)
+"""
+
+
+def make_cycle(offices, cycle, days=7):
+    """1回の発表分の [(area_code, ForecastReport), ...] を作る"""
+    report = f"2025-02-{cycle % 28 + 1:02d}T{5 + 6 * (cycle // 28) % 24:02d}:00:00+09:00"
+    results = []
+    for o in range(offices):
+        dates = [f"2025-02-{d + 1:02d}T00:00:00+09:00" for d in range(days)]
+        results.append((f"{o:06d}", build_report(report, dates, ["くもり　時々　晴れ"] * days, ["1"] * days, ["9"] * days)))
+    return results
+
+
+def legacy_save(db_name, results):
+    """従来方式: 地域ごとに接続・1行ずつ INSERT・commit"""
+    for area_code, report in results:
+        conn = sqlite3.connect(db_name)
+        cursor = conn.cursor()
+        for record in report.records:
+            try:
+                cursor.execute(LEGACY_INSERT_FORECAST, (
+                    area_code, record.forecast_date, record.weather, record.temp_min, record.temp_max,
+                    report.report_datetime, "now",
+                ))
+            except Exception as e:
+                print(f"DB保存エラー: {e}")
+        conn.commit()
+        conn.close()
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--offices", type=int, default=60)
+    parser.add_argument("--cycles", type=int, default=20, help="発表回数")
+    args = parser.parse_args()
+
+    cycles = [make_cycle(args.offices, c) for c in range(args.cycles)]
+    rows = args.offices * 7 * args.cycles
+
+    with tempfile.TemporaryDirectory() as tmp:
+        legacy_db = os.path.join(tmp, "legacy.db")
+        WeatherStore(legacy_db).init_schema()
+        start = time.perf_counter()
+        for results in cycles:
+            legacy_save(legacy_db, results)
+        legacy = time.perf_counter() - start
+
+        store = WeatherStore(os.path.join(tmp, "store.db"))
+        store.init_schema()
+        start = time.perf_counter()
+        for results in cycles:
+            store.save_forecasts(results)
+        batched = time.perf_counter() - start
+
+        # 同じ発表をもう一度取り込むと全行が重複としてスキップされる
+        again = store.save_forecasts(cycles[-1])
+        store.close()
+
+    print(f"offices={args.offices} cycles={args.cycles} rows={rows}")
+    print(f"従来方式 (1行ずつ, 地域ごとにcommit): {rows / legacy:10.0f} rows/s")
+    print(f"save_forecasts (executemany, 1回):     {rows / batched:10.0f} rows/s")
+    print(f"倍率: {legacy / batched:.1f}x")
+    print(f"再取り込み: written={again['written']} duplicates={again['duplicates']}")
+
+
+if __name__ == "__main__":
+    main()
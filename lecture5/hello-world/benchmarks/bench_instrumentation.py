@@ -0,0 +1,72 @@
+"""計測（src/instrumentation.py）のオーバーヘッドのベンチマーク
+
+計測なしの関数呼び出し、無効な Instrumentation の span / count、有効な span / count の
+1回あたりの時間を比較する。無効なときは共有の NULL_SPAN を返すだけなので、
+span のコストは with 文1回分程度に収まることを確認する。
+
+実行: python benchmarks/bench_instrumentation.py [--repeat 200000]
+"""
+import argparse
+import os
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "src"))
+
+from instrumentation import Instrumentation  # noqa: E402
+
+
+def work():
+    return sum(range(10))
+
+
+def plain(instrumentation):
+    return work()
+
+
+def with_span(instrumentation):
+    with instrumentation.span("work", area_code="130000"):
+        return work()
+
+
+def with_count(instrumentation):
+    instrumentation.count("source.db_latest")
+    return work()
+
+
+def per_call_seconds(func, instrumentation, repeat):
+    start = time.perf_counter()
+    for _ in range(repeat):
+        func(instrumentation)
+    return (time.perf_counter() - start) / repeat
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--repeat", type=int, default=200000)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        disabled = Instrumentation()
+        enabled = Instrumentation(enabled=True, path=os.path.join(tmp, "trace.jsonl"))
+
+        baseline = per_call_seconds(plain, disabled, args.repeat)
+        print(f"{'計測なし':24s} {baseline * 1e9:8.0f} ns/回")
+        for label, instrumentation in (("無効", disabled), ("有効", enabled)):
+            for name, func in (("span", with_span), ("count", with_count)):
+                seconds = per_call_seconds(func, instrumentation, args.repeat)
+                print(f"{label + ' ' + name:24s} {seconds * 1e9:8.0f} ns/回  "
+                      f"(+{(seconds - baseline) * 1e9:.0f} ns)")
+
+        summary = enabled.summary()
+        print(f"記録した span: {summary['spans']['work']['count']} 件  counters: {summary['counters']}")
+
+        start = time.perf_counter()
+        enabled.flush()
+        size = os.path.getsize(enabled.path)
+        print(f"JSON lines への書き出し: {time.perf_counter() - start:.2f} 秒, {size / 1024 / 1024:.1f}MB")
+
+
+if __name__ == "__main__":
+    main()
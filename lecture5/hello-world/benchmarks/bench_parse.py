@@ -0,0 +1,99 @@
+"""予報JSONの解析のベンチマーク
+
+従来方式（response.json() で文書全体を辞書にしてから、並列リストの
+(forecast_list, temps_min, temps_max, report_datetime) を作る）と、
+forecast_parser.parse_forecast（__slots__ の ForecastRecord にする）、
+アプリと先読みが使う load_forecast_bundle（全地域・全要素・週間予報）の
+1件あたりの時間とメモリの最大使用量、1回の取得で得られる値の数を比較する。
+どれも文書全体を json.loads するので、メモリの最大使用量は同じになる。
+
+実行: python benchmarks/bench_parse.py [--repeat 2000] [ファイル ...]
+"""
+import argparse
+import glob
+import json
+import os
+import sys
+import time
+import tracemalloc
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "src"))
+
+from forecast_parser import load_forecast_bundle, parse_forecast  # noqa: E402
+
+FIXTURES = os.path.join(os.path.dirname(__file__), "..", "tools", "fixtures", "bosai", "forecast", "data", "forecast")
+
+
+def legacy_parse(body):
+    """従来方式: 全体を json.loads してから並列リストを作る"""
+    data = json.loads(body)
+    ts = data[0]["timeSeries"][0]
+    dates = ts["timeDefines"]
+    weathers = ts["areas"][0]["weathers"]
+
+    temps_min = []
+    temps_max = []
+    if len(data[0]["timeSeries"]) > 2:
+        temp_data = data[0]["timeSeries"][2]["areas"][0]
+        temps_min = temp_data.get("tempsMin", [])
+        temps_max = temp_data.get("tempsMax", [])
+
+    return list(zip(dates, weathers)), temps_min, temps_max, data[0].get("reportDatetime", "")
+
+
+def report_parse(body):
+    return parse_forecast(json.loads(body))
+
+
+def per_payload_seconds(parse, bodies, repeat):
+    start = time.perf_counter()
+    for _ in range(repeat):
+        for body in bodies:
+            parse(body)
+    return (time.perf_counter() - start) / (repeat * len(bodies))
+
+
+def peak_memory(parse, body):
+    """1件の解析中に確保したメモリの最大量（バイト）"""
+    tracemalloc.start()
+    result = parse(body)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    del result
+    return peak
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--repeat", type=int, default=2000)
+    parser.add_argument("files", nargs="*", help="予報JSON（省略時は tools/fixtures の予報）")
+    args = parser.parse_args()
+
+    paths = args.files or sorted(glob.glob(os.path.join(FIXTURES, "*.json")))
+    bodies = []
+    for path in paths:
+        with open(path, "rb") as f:
+            bodies.append(f.read())
+
+    for body in bodies:
+        forecast_list, temps_min, temps_max, report_datetime = legacy_parse(body)
+        for report in (report_parse(body), load_forecast_bundle(body).report):
+            assert [(r.forecast_date, r.weather) for r in report] == forecast_list
+            assert report.report_datetime == report_datetime
+
+    print(f"payloads={len(bodies)} 平均 {sum(map(len, bodies)) / len(bodies) / 1024:.1f}KB")
+    for name, parse in (("従来方式 (json全体 + 並列リスト)", legacy_parse),
+                        ("parse_forecast (json全体 + Record)", report_parse),
+                        ("load_forecast_bundle (全地域・週間)", load_forecast_bundle)):
+        seconds = per_payload_seconds(parse, bodies, args.repeat)
+        peak = max(peak_memory(parse, body) for body in bodies)
+        print(f"{name:36s} {seconds * 1e6:8.1f} us/件  最大メモリ {peak / 1024:7.1f}KB")
+
+    # 1回の取得で保存できる値の数（従来は areas[0] の日時・天気・気温だけ）
+    legacy_values = sum(len(legacy_parse(body)[0]) * 4 for body in bodies) / len(bodies)
+    bundle_values = sum(load_forecast_bundle(body).value_count() for body in bodies) / len(bodies)
+    print(f"1件あたりの保存値: 従来 {legacy_values:.0f}  bundle {bundle_values:.0f}  ({bundle_values / legacy_values:.1f}x)")
+
+
+if __name__ == "__main__":
+    main()
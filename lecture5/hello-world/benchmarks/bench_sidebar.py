@@ -0,0 +1,162 @@
+"""地域選択サイドバーの構築のベンチマーク
+
+従来方式（起動時に全センターの ExpansionTile と全オフィスの ListTile を作る）と
+AreaSidebar（センターの見出しだけを作り、オフィスは開いたときに作る）の、
+初回描画までに作るコントロール数・送信バイト数・時間を比較する。
+あわせて AreaIndex の先頭一致検索と、全オフィスの名前を順に調べる方式の速度を比較する。
+area.json は気象庁のセンター・オフィス構成（58 オフィス）を模して作る。
+
+実行: python benchmarks/bench_sidebar.py [--repeat 200]
+"""
+import argparse
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "src"))
+
+import flet as ft  # noqa: E402
+from area_index import OFFICE_READINGS, AreaIndex, normalize_query  # noqa: E402
+from area_sidebar import AreaSidebar, count_controls  # noqa: E402
+from flet_probe import ControlCounter, make_page  # noqa: E402
+
+# センターごとのオフィスコード（気象庁の area.json と同じ構成）
+CENTERS = {
+    "010100": ("北海道地方", ["011000", "012000", "013000", "014030", "014100", "015000", "016000", "017000"]),
+    "010200": ("東北地方", ["020000", "030000", "040000", "050000", "060000", "070000"]),
+    "010300": ("関東甲信地方", ["080000", "090000", "100000", "110000", "120000", "130000", "140000", "190000", "200000"]),
+    "010400": ("東海地方", ["210000", "220000", "230000", "240000"]),
+    "010500": ("北陸地方", ["150000", "160000", "170000", "180000"]),
+    "010600": ("近畿地方", ["250000", "260000", "270000", "280000", "290000", "300000"]),
+    "010700": ("中国地方（山口県を除く）", ["310000", "320000", "330000", "340000"]),
+    "010800": ("四国地方", ["360000", "370000", "380000", "390000"]),
+    "010900": ("九州北部地方（山口県を含む）", ["350000", "400000", "410000", "420000", "430000", "440000"]),
+    "011000": ("九州南部・奄美地方", ["450000", "460040", "460100"]),
+    "011100": ("沖縄地方", ["471000", "472000", "473000", "474000"]),
+}
+
+QUERIES = ["とう", "トウキョウ", "東京", "kana", "Kago", "関東", "おき", "宮", "かごしま", "ぐ", "存在しない"]
+
+
+def make_area_json():
+    offices = {}
+    for center_code, (_, codes) in CENTERS.items():
+        for code in codes:
+            offices[code] = {"name": f"office{code}", "enName": f"Office {code}", "parent": center_code,
+                             "children": []}
+    # 名前は読みの表に合わせて、よく知られた漢字名を入れておく
+    offices["130000"]["name"], offices["130000"]["enName"] = "東京都", "Tokyo"
+    offices["140000"]["name"], offices["140000"]["enName"] = "神奈川県", "Kanagawa"
+    offices["460100"]["name"], offices["460100"]["enName"] = "鹿児島県（奄美地方除く）", "Kagoshima"
+    offices["471000"]["name"], offices["471000"]["enName"] = "沖縄本島地方", "Okinawa Main Island"
+    offices["450000"]["name"], offices["450000"]["enName"] = "宮崎県", "Miyazaki"
+    offices["040000"]["name"], offices["040000"]["enName"] = "宮城県", "Miyagi"
+    centers = {code: {"name": name, "enName": "", "children": codes} for code, (name, codes) in CENTERS.items()}
+    return {"centers": centers, "offices": offices}
+
+
+def legacy_sidebar(area_json, on_click):
+    """従来の main() と同じ構造のサイドバー"""
+    tiles = []
+    for center in area_json["centers"].values():
+        children = []
+        for code in center["children"]:
+            if code in area_json["offices"]:
+                office = area_json["offices"][code]
+                children.append(
+                    ft.ListTile(
+                        title=ft.Text(office["name"], color="white"),
+                        data=code,
+                        on_click=on_click,
+                        hover_color="#1AFFFFFF",
+                    )
+                )
+        if children:
+            tiles.append(
+                ft.ExpansionTile(
+                    title=ft.Text(center["name"], color="white", weight=ft.FontWeight.BOLD),
+                    controls=children,
+                    text_color="white",
+                    collapsed_text_color="#B0BEC5",
+                    bgcolor="transparent",
+                )
+            )
+    return ft.Container(
+        content=ft.Column(
+            [
+                ft.Container(
+                    content=ft.Row([ft.Text("地域選択", size=18, weight=ft.FontWeight.BOLD, color="white")]),
+                    padding=15,
+                    bgcolor="#37474F",
+                ),
+                ft.Container(content=ft.Column(tiles, scroll=ft.ScrollMode.AUTO), expand=True, padding=5),
+            ],
+        ),
+        width=300,
+        bgcolor="#455A64",
+    )
+
+
+def build_legacy(area_json):
+    page, conn = make_page()
+    with ControlCounter() as counter:
+        sidebar = legacy_sidebar(area_json, lambda e: None)
+        page.add(sidebar)
+    return counter.count, conn.bytes_sent, count_controls(sidebar)
+
+
+def build_lazy(area_json):
+    page, conn = make_page()
+    with ControlCounter() as counter:
+        sidebar = AreaSidebar(lambda code, name: None)
+        page.add(sidebar)
+        page.update(*sidebar.set_areas(area_json))
+    return counter.count, conn.bytes_sent, count_controls(sidebar)
+
+
+def linear_search(area_json, query):
+    """従来相当: 全オフィスの名前・読み・英語名を順に調べる"""
+    query = normalize_query(query)
+    return [
+        code for code, office in area_json["offices"].items()
+        if any(normalize_query(name).startswith(query)
+               for name in (office["name"], office.get("enName", ""), OFFICE_READINGS.get(code, "")))
+    ]
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--repeat", type=int, default=200)
+    args = parser.parse_args()
+
+    area_json = make_area_json()
+    print(f"centers={len(CENTERS)} offices={len(area_json['offices'])}")
+    for name, build in (("従来方式 (全オフィスを作成)", build_legacy), ("AreaSidebar (見出しのみ)", build_lazy)):
+        created, sent, tree_size = build(area_json)
+        start = time.perf_counter()
+        for _ in range(args.repeat):
+            build(area_json)
+        seconds = (time.perf_counter() - start) / args.repeat
+        print(f"{name:28s} 作成 {created:4d} 個  ツリー {tree_size:4d} 個  送信 {sent / 1024:6.1f}KB  "
+              f"{seconds * 1000:6.2f} ms")
+
+    index = AreaIndex(area_json)
+    for query in QUERIES:
+        expected = {code for code in linear_search(area_json, query)}
+        found = {code for code, _ in index.search(query)}
+        # センター名での一致は AreaIndex だけが返す
+        assert expected <= found, query
+
+    repeat = args.repeat * 50
+    for name, search in (("順に調べる", lambda q: linear_search(area_json, q)), ("AreaIndex", index.search)):
+        start = time.perf_counter()
+        for _ in range(repeat):
+            for query in QUERIES:
+                search(query)
+        seconds = (time.perf_counter() - start) / (repeat * len(QUERIES))
+        print(f"検索 {name:12s} {seconds * 1e6:8.2f} us/回")
+    print("例: " + ", ".join(f"{q}→{len(index.search(q))}件" for q in QUERIES))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,190 @@
+"""アプリの起動時間のベンチマーク
+
+1. python -X importtime で weather.py / weather2.py を読み込み、読み込み時間の合計と
+   重いモジュールを表示する。従来は requests・sqlite3 を使うモジュールを最初に読み込んで
+   いたので、それらも読み込んだ場合（従来相当）と比較する。
+2. weather2.main() をクライアント無しのページで別プロセスとして起動し、初回描画と
+   地域一覧の表示までの時間を、DB・スナップショットなし／DBのみ／スナップショットあり で比較する。
+   area.json は tools/jma_stub_server.py から取得する。
+3. WeatherStore.init_schema() の時間を、新しいDB（DDLを実行）とスキーマが最新のDBで比較する。
+
+実行: python benchmarks/bench_startup.py [--repeat 5]
+"""
+import argparse
+import json
+import os
+import re
+import shutil
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+SRC_DIR = os.path.join(BENCH_DIR, "..", "src")
+sys.path.insert(0, SRC_DIR)
+sys.path.insert(0, os.path.join(BENCH_DIR, "..", "tools"))
+
+from area_snapshot import SNAPSHOT_PATH  # noqa: E402
+from jma_stub_server import start_stub_server  # noqa: E402
+from weather_store import WeatherStore  # noqa: E402
+
+# 従来の weather2.py / weather.py が起動時に読み込んでいたモジュール
+LEGACY_IMPORTS = {
+    "weather2": ["jma_client", "weather_store", "refresh_scheduler", "forecast_parser"],
+    "weather": ["requests"],
+}
+
+IMPORT_LINE = re.compile(r"import time:\s+(\d+) \|\s+(\d+) \|( *)(\S+)")
+
+# 別プロセスで weather2.main() を動かし、初回描画と地域一覧の表示までの時間を JSON で出す
+CHILD = """
+import json, os, sys, time
+started = time.perf_counter()
+sys.path[:0] = [{src!r}, {bench!r}]
+import weather2
+imported = time.perf_counter()
+loaded = [name for name in ("requests", "sqlite3") if name in sys.modules]
+from flet_probe import make_page
+page, conn = make_page()
+weather2.main(page)
+first_paint = time.perf_counter()
+sidebar = page.controls[0].controls[0]
+while sidebar.index is None and time.perf_counter() - started < 30:
+    time.sleep(0.001)
+ready = time.perf_counter()
+print(json.dumps({{"import": imported - started, "first_paint": first_paint - started,
+                  "ready": ready - started if sidebar.index is not None else None,
+                  "loaded_at_import": loaded}}))
+sys.stdout.flush()
+os._exit(0)
+"""
+
+
+def import_times(modules):
+    """python -X importtime で modules を読み込み、(modules の読み込みの合計ms, flet の ms, 直接読み込んだ [(ms, 名前)], 全モジュール名)"""
+    code = f"import sys; sys.path.insert(0, {SRC_DIR!r}); " + "; ".join(f"import {m}" for m in modules)
+    result = subprocess.run([sys.executable, "-X", "importtime", "-c", code],
+                            capture_output=True, text=True, check=True)
+    total = 0
+    flet_ms = 0
+    direct = []
+    children = []
+    names = set()
+    # 子モジュールの行は親の行より先に出る
+    for line in result.stderr.splitlines():
+        match = IMPORT_LINE.match(line)
+        if not match:
+            continue
+        cumulative, depth, name = int(match.group(2)) / 1000, (len(match.group(3)) - 1) // 2, match.group(4)
+        names.add(name)
+        if name == "flet":
+            flet_ms = max(flet_ms, cumulative)
+        if depth == 1:
+            children.append((cumulative, name))
+        elif depth == 0:
+            if name in modules:
+                total += cumulative
+                # アプリのモジュールが直接読み込んだもの（従来相当で後から読むモジュールも含める）
+                direct.extend(children if name == modules[0] else [(cumulative, name)])
+            children = []
+    direct.sort(reverse=True)
+    return total, flet_ms, direct, names
+
+
+def report_imports(repeat):
+    print("== 読み込み時間 (python -X importtime) ==")
+    for app, legacy in LEGACY_IMPORTS.items():
+        for label, modules in (("従来相当", [app] + legacy), ("現在", [app])):
+            import_times(modules)  # .pyc を作っておく
+            runs = [import_times(modules) for _ in range(repeat)]
+            total = statistics.median(run[0] for run in runs)
+            without_flet = statistics.median(run[0] - run[1] for run in runs)
+            direct, names = runs[-1][2], runs[-1][3]
+            heavy = ", ".join(name for name in ("requests", "sqlite3") if name in names) or "なし"
+            print(f"{app + '.py ' + label:20s} 合計 {total:6.0f} ms  flet以外 {without_flet:6.1f} ms  "
+                  f"(requests/sqlite3: {heavy})")
+            print("    直接の読み込み: " + ", ".join(f"{name} {ms:.1f}ms" for ms, name in direct[:6]))
+
+
+def run_child(workdir, base_url):
+    env = dict(os.environ, JMA_BASE_URL=base_url)
+    for name in ("WEATHER_TRACE", "WEATHER_PROFILE", "WEATHER_TRACEMALLOC"):
+        env.pop(name, None)
+    code = CHILD.format(src=os.path.abspath(SRC_DIR), bench=BENCH_DIR)
+    result = subprocess.run([sys.executable, "-c", code], cwd=workdir, env=env,
+                            capture_output=True, text=True, timeout=60)
+    return json.loads(result.stdout.strip().splitlines()[-1])
+
+
+def report_time_to_interactive(repeat):
+    print("== weather2.py の起動から表示まで ==")
+    server, base_url = start_stub_server()
+    try:
+        states = (
+            ("DB・スナップショットなし", True, True),
+            ("DBのみ (スナップショットなし)", False, True),
+            ("スナップショットあり", False, False),
+        )
+        for label, reset_db, reset_snapshot in states:
+            samples = []
+            for _ in range(repeat):
+                workdir = tempfile.mkdtemp()
+                try:
+                    # 前提の状態（DB・スナップショット）を作ってから測る
+                    run_child(workdir, base_url)
+                    if reset_db:
+                        for name in os.listdir(workdir):
+                            if name.startswith("weather_forecast.db") or name == "http_cache":
+                                path = os.path.join(workdir, name)
+                                shutil.rmtree(path) if os.path.isdir(path) else os.remove(path)
+                    if reset_snapshot:
+                        os.remove(os.path.join(workdir, SNAPSHOT_PATH))
+                    samples.append(run_child(workdir, base_url))
+                finally:
+                    shutil.rmtree(workdir, ignore_errors=True)
+
+            def median_ms(key):
+                values = [sample[key] for sample in samples if sample[key] is not None]
+                return statistics.median(values) * 1000 if values else float("nan")
+
+            loaded = ", ".join(samples[-1]["loaded_at_import"]) or "なし"
+            print(f"{label:30s} 読み込み {median_ms('import'):5.0f} ms  初回描画 {median_ms('first_paint'):5.0f} ms  "
+                  f"地域一覧 {median_ms('ready'):5.0f} ms (初回描画から {median_ms('ready') - median_ms('first_paint'):4.0f} ms)  "
+                  f"読み込み時点の requests/sqlite3: {loaded}")
+    finally:
+        server.shutdown()
+        server.server_close()
+
+
+def report_schema(repeat):
+    print("== WeatherStore.init_schema() ==")
+    fresh = []
+    current = []
+    for _ in range(repeat):
+        with tempfile.TemporaryDirectory() as tmp:
+            db_name = os.path.join(tmp, "weather_forecast.db")
+            for samples in (fresh, current):
+                store = WeatherStore(db_name, pool_size=1)
+                start = time.perf_counter()
+                executed = store.init_schema()
+                samples.append((time.perf_counter() - start, executed))
+                store.close()
+    for label, samples in (("新しいDB", fresh), ("スキーマが最新のDB", current)):
+        seconds = statistics.median(sample[0] for sample in samples)
+        print(f"{label:20s} {seconds * 1000:7.2f} ms  DDL実行: {samples[-1][1]}")
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    report_imports(args.repeat)
+    report_time_to_interactive(args.repeat)
+    report_schema(args.repeat)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,119 @@
+"""weather_store の検索と、従来の「毎回 connect/close + サブクエリ/DISTINCT」方式の比較ベンチマーク
+
+WeatherStore 側は接続プール + latest_report/reports テーブルで検索し、
+さらにLRUキャッシュを有効にした場合も測る。
+
+実行: python benchmarks/bench_store.py [--offices 60] [--lookups 5000] [--threads 4]
+"""
+import argparse
+import os
+import sqlite3
+import sys
+import tempfile
+import threading
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "src"))
+
+from forecast_parser import build_report  # noqa: E402
+from weather_store import WeatherStore  # noqa: E402
+
+# 従来の「最新」検索（相関サブクエリ）と履歴検索（DISTINCT走査）
+LEGACY_SELECT_LATEST = """
+    SELECT forecast_date, weather, temp_min, temp_max, report_datetime
+    FROM forecasts
+    WHERE office_code = ? AND report_datetime = (
+        SELECT report_datetime FROM forecasts
+        WHERE office_code = ?
+        ORDER BY report_datetime DESC LIMIT 1
+    )
+    ORDER BY forecast_date ASC
+"""
+
+LEGACY_SELECT_HISTORY = """
+    SELECT DISTINCT report_datetime, fetched_at
+    FROM forecasts
+    WHERE office_code = ?
+    ORDER BY report_datetime DESC
+"""
+
+
+def seed(store, offices, reports, days=7):
+    """ダミーの予報データを投入"""
+    for o in range(offices):
+        code = f"{o:06d}"
+        for r in range(reports):
+            report = f"2025-01-{r + 1:02d}T05:00:00+09:00"
+            dates = [f"2025-01-{r + d + 1:02d}T00:00:00+09:00" for d in range(days)]
+            store.save_forecast(code, build_report(report, dates, ["晴れ　時々　くもり"] * days, ["1"] * days, ["10"] * days))
+
+
+def legacy_lookup(db_name, area_code):
+    """従来方式：呼び出しごとに接続を開いて閉じる"""
+    conn = sqlite3.connect(db_name)
+    rows = conn.execute(LEGACY_SELECT_LATEST, (area_code, area_code)).fetchall()
+    conn.close()
+    conn = sqlite3.connect(db_name)
+    conn.execute(LEGACY_SELECT_HISTORY, (area_code,)).fetchall()
+    conn.close()
+    return rows
+
+
+def pooled_lookup(store, area_code):
+    rows = store.load_forecast(area_code)
+    store.get_history(area_code)
+    return rows
+
+
+def run(lookup, codes, lookups, threads):
+    """lookups 回の検索を threads 本のスレッドで実行し、毎秒の検索数を返す"""
+    per_thread = lookups // threads
+
+    def worker(offset):
+        for i in range(per_thread):
+            lookup(codes[(offset + i) % len(codes)])
+
+    workers = [threading.Thread(target=worker, args=(t,)) for t in range(threads)]
+    start = time.perf_counter()
+    for w in workers:
+        w.start()
+    for w in workers:
+        w.join()
+    elapsed = time.perf_counter() - start
+    return per_thread * threads / elapsed
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--offices", type=int, default=60)
+    parser.add_argument("--reports", type=int, default=20)
+    parser.add_argument("--lookups", type=int, default=5000)
+    parser.add_argument("--threads", type=int, default=4)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        db_name = os.path.join(tmp, "bench.db")
+        # cache_size=0 でキャッシュを無効にし、接続プールと最新ポインタ表だけの効果を測る
+        store = WeatherStore(db_name, pool_size=args.threads, cache_size=0)
+        store.init_schema()
+        seed(store, args.offices, args.reports)
+        codes = [f"{o:06d}" for o in range(args.offices)]
+
+        legacy = run(lambda c: legacy_lookup(db_name, c), codes, args.lookups, args.threads)
+        pooled = run(lambda c: pooled_lookup(store, c), codes, args.lookups, args.threads)
+        store.close()
+
+        cached_store = WeatherStore(db_name, pool_size=args.threads)
+        cached = run(lambda c: pooled_lookup(cached_store, c), codes, args.lookups, args.threads)
+        cache_stats = cached_store.cache.stats()
+        cached_store.close()
+
+    print(f"offices={args.offices} reports={args.reports} threads={args.threads}")
+    print(f"従来方式 (connect/close + サブクエリ): {legacy:10.0f} lookups/s")
+    print(f"接続プール + 最新ポインタ表:           {pooled:10.0f} lookups/s  ({pooled / legacy:.2f}x)")
+    print(f"上記 + LRUキャッシュ:                  {cached:10.0f} lookups/s  ({cached / legacy:.2f}x)")
+    print(f"キャッシュ: hit_rate={cache_stats['hit_rate']:.1%} evictions={cache_stats['evictions']}")
+
+
+if __name__ == "__main__":
+    main()
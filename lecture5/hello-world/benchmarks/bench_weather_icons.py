@@ -0,0 +1,76 @@
+"""天気アイコン判定のベンチマーク
+
+従来の WEATHER_ICONS を先頭から部分一致で調べる方式と、weather_icons の
+分類（辞書 + 正規表現の初回・メモ化後）を、気象庁の天気文のコーパスで比較する。
+
+実行: python benchmarks/bench_weather_icons.py [--repeat 2000]
+"""
+import argparse
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "src"))
+
+import weather_icons  # noqa: E402
+from weather_icons import WEATHER_CODES, classify_weather, get_weather_icon  # noqa: E402
+
+CORPUS_PATH = os.path.join(os.path.dirname(__file__), "weather_texts.txt")
+
+# 従来のマッピングと判定方法
+LEGACY_ICONS = {
+    "晴": "☀️", "曇": "☁️", "雨": "🌧️", "雪": "❄️",
+    "晴時々曇": "🌤️", "晴後曇": "🌤️", "曇時々晴": "⛅",
+    "曇後晴": "⛅", "晴時々雨": "🌦️", "曇時々雨": "🌧️",
+    "雨時々曇": "🌧️",
+}
+
+
+def legacy_icon(weather_text):
+    for key, icon in LEGACY_ICONS.items():
+        if key in weather_text:
+            return icon
+    return "☀️"
+
+
+def load_corpus():
+    """実際の予報JSONにある天気文 + 天気コード表の表記"""
+    with open(CORPUS_PATH, encoding="utf-8") as f:
+        texts = [line.strip() for line in f if line.strip()]
+    return texts + list(WEATHER_CODES.values())
+
+
+def timed(func, corpus, repeat):
+    start = time.perf_counter()
+    for _ in range(repeat):
+        for text in corpus:
+            func(text)
+    return (time.perf_counter() - start) / (repeat * len(corpus))
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--repeat", type=int, default=2000)
+    args = parser.parse_args()
+
+    corpus = load_corpus()
+
+    legacy = timed(legacy_icon, corpus, args.repeat)
+    cold = timed(classify_weather, corpus, 1)
+    weather_icons._icon_memo.clear()
+    memoized = timed(get_weather_icon, corpus, args.repeat)
+
+    changed = [(text, legacy_icon(text), get_weather_icon(text)) for text in corpus
+               if legacy_icon(text) != get_weather_icon(text)]
+
+    print(f"corpus={len(corpus)} 文")
+    print(f"従来方式 (部分一致を順に走査): {legacy * 1e6:7.2f} us/文")
+    print(f"辞書 + 正規表現 (メモ化なし):  {cold * 1e6:7.2f} us/文")
+    print(f"辞書 + 正規表現 + メモ化:      {memoized * 1e6:7.2f} us/文")
+    print(f"判定が変わった文: {len(changed)}/{len(corpus)}")
+    for text, old, new in changed[:10]:
+        print(f"  {text}: {old} -> {new}")
+
+
+if __name__ == "__main__":
+    main()
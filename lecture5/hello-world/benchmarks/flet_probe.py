@@ -0,0 +1,75 @@
+"""Fletのページをクライアント無しで動かし、送信されるメッセージを数えるための補助
+
+RecordingConnection は flet_socket_server と同じ手順でコマンドを処理・JSON化し、
+実際には送らずにバイト数とメッセージ数だけを記録する。
+"""
+import asyncio
+import json
+
+import flet as ft
+from flet.core.local_connection import LocalConnection
+from flet.core.protocol import ClientActions, ClientMessage, CommandEncoder, PageCommandsBatchResponsePayload
+
+
+class RecordingConnection(LocalConnection):
+    """送信内容のサイズを記録するだけの接続"""
+
+    def __init__(self):
+        super().__init__()
+        self.bytes_sent = 0
+        self.messages = 0
+        self.controls_added = 0
+
+    def send_commands(self, session_id, commands):
+        results = []
+        messages = []
+        for command in commands:
+            result, message = self._process_command(command)
+            if command.name in ("add", "get"):
+                results.append(result)
+                if command.name == "add":
+                    self.controls_added += len(result.split())
+            if message:
+                messages.append(message)
+        if messages:
+            payload = json.dumps(
+                ClientMessage(ClientActions.PAGE_CONTROLS_BATCH, messages), cls=CommandEncoder, separators=(",", ":")
+            )
+            self.bytes_sent += len(payload.encode("utf-8"))
+            self.messages += 1
+        return PageCommandsBatchResponsePayload(results=results, error="")
+
+    def send_command(self, session_id, command):
+        return self.send_commands(session_id, [command])
+
+    def reset(self):
+        self.bytes_sent = 0
+        self.messages = 0
+        self.controls_added = 0
+
+
+def make_page():
+    """RecordingConnection につながった Page を作る"""
+    conn = RecordingConnection()
+    page = ft.Page(conn, "bench", asyncio.new_event_loop())
+    return page, conn
+
+
+class ControlCounter:
+    """with ブロックの中で作られた Flet コントロールの数を数える"""
+
+    def __enter__(self):
+        self.count = 0
+        self._original_init = ft.Control.__init__
+        counter = self
+
+        def counting_init(control, *args, **kwargs):
+            counter.count += 1
+            counter._original_init(control, *args, **kwargs)
+
+        ft.Control.__init__ = counting_init
+        return self
+
+    def __exit__(self, *exc):
+        ft.Control.__init__ = self._original_init
+        return False
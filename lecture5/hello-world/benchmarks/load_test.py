@@ -0,0 +1,155 @@
+"""取得 → 解析 → 保存 → 描画 の負荷試験
+
+tools/jma_stub_server.py（遅延・失敗率つき）を起動し、workers 本のスレッドが
+それぞれ1つのクライアント（requests.Session と Flet のページ・カードプール）として
+予報の表示を繰り返す。段階ごとと全体の p50/p99 レイテンシとスループットを表示する。
+
+実行: python benchmarks/load_test.py [--workers 8] [--requests 400]
+                                     [--latency-ms 50] [--jitter-ms 20] [--failure-rate 0.02]
+      --base-url を渡すとスタブサーバを起動せず、そのURLに対して実行する。
+"""
+import argparse
+import math
+import os
+import sys
+import tempfile
+import threading
+import time
+
+import requests
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "src"))
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "tools"))
+
+from flet_probe import make_page  # noqa: E402
+from forecast_cards import ForecastCardPool  # noqa: E402
+from forecast_parser import load_forecast_bundle  # noqa: E402
+from jma_client import AREA_PATH, FORECAST_PATH  # noqa: E402
+from jma_stub_server import start_stub_server  # noqa: E402
+from weather_store import WeatherStore  # noqa: E402
+
+STAGES = ("fetch", "parse", "save", "render", "total")
+
+
+def percentile(samples, p):
+    """p パーセンタイル（最近傍法）"""
+    if not samples:
+        return float("nan")
+    ordered = sorted(samples)
+    return ordered[max(math.ceil(p / 100 * len(ordered)) - 1, 0)]
+
+
+class LoadTest:
+    """workers 本のスレッドで合計 requests 回の表示を実行し、段階ごとの時間を集める"""
+
+    def __init__(self, base_url, store, office_codes, workers=8, requests_total=400, timeout=10.0):
+        self.base_url = base_url
+        self.store = store
+        self.office_codes = office_codes
+        self.workers = workers
+        self.requests_total = requests_total
+        self.timeout = timeout
+        self.samples = {stage: [] for stage in STAGES}
+        self.errors = 0
+        self._next = 0
+        self._lock = threading.Lock()
+
+    def _take(self):
+        with self._lock:
+            if self._next >= self.requests_total:
+                return None
+            self._next += 1
+            return self._next - 1
+
+    def _worker(self):
+        session = requests.Session()
+        page, _ = make_page()
+        pool = ForecastCardPool()
+        page.add(pool.row)
+
+        while True:
+            i = self._take()
+            if i is None:
+                break
+            code = self.office_codes[i % len(self.office_codes)]
+            try:
+                t0 = time.perf_counter()
+                response = session.get(self.base_url + FORECAST_PATH.format(code), timeout=self.timeout)
+                response.raise_for_status()
+                t1 = time.perf_counter()
+                bundle = load_forecast_bundle(response.content)
+                t2 = time.perf_counter()
+                self.store.save_forecast(code, bundle)
+                t3 = time.perf_counter()
+                changed = []
+                for n, record in enumerate(bundle.report.records):
+                    changed.extend(pool.show(n, record.forecast_date, record.weather, record.temp_min, record.temp_max,
+                                               record.weather_code))
+                changed.extend(pool.hide_from(len(bundle.report.records)))
+                if changed:
+                    page.update(*changed)
+                t4 = time.perf_counter()
+            except (requests.RequestException, ValueError):
+                with self._lock:
+                    self.errors += 1
+                continue
+
+            with self._lock:
+                for stage, seconds in zip(STAGES, (t1 - t0, t2 - t1, t3 - t2, t4 - t3, t4 - t0)):
+                    self.samples[stage].append(seconds)
+        session.close()
+
+    def run(self):
+        threads = [threading.Thread(target=self._worker) for _ in range(self.workers)]
+        start = time.perf_counter()
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        return time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--workers", type=int, default=8)
+    parser.add_argument("--requests", type=int, default=400)
+    parser.add_argument("--latency-ms", type=float, default=50.0)
+    parser.add_argument("--jitter-ms", type=float, default=20.0)
+    parser.add_argument("--failure-rate", type=float, default=0.02)
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--base-url", help="スタブサーバを起動せずにこのURLへ接続")
+    args = parser.parse_args()
+
+    server = None
+    base_url = args.base_url
+    if not base_url:
+        server, base_url = start_stub_server(
+            latency=args.latency_ms / 1000, jitter=args.jitter_ms / 1000,
+            failure_rate=args.failure_rate, seed=args.seed,
+        )
+
+    with tempfile.TemporaryDirectory() as tmp:
+        store = WeatherStore(os.path.join(tmp, "load.db"), pool_size=args.workers)
+        store.init_schema()
+        area_json = requests.get(base_url + AREA_PATH, timeout=10).json()
+        store.save_area(area_json)
+
+        test = LoadTest(base_url, store, list(area_json["offices"]), args.workers, args.requests)
+        elapsed = test.run()
+        store.close()
+
+    done = len(test.samples["total"])
+    print(f"workers={args.workers} requests={args.requests} latency={args.latency_ms:.0f}ms"
+          f"+0〜{args.jitter_ms:.0f}ms failure_rate={args.failure_rate:.0%}")
+    print(f"成功 {done} 件 / 失敗 {test.errors} 件, {elapsed:.2f} 秒, スループット {done / elapsed:.1f} req/s")
+    for stage in STAGES:
+        samples = test.samples[stage]
+        print(f"  {stage:7s} p50 {percentile(samples, 50) * 1000:8.2f} ms   p99 {percentile(samples, 99) * 1000:8.2f} ms")
+    if server is not None:
+        stats = server.stats()
+        print(f"スタブサーバ: {stats['requests']} リクエスト, 503 {stats['failures']} 件")
+        server.shutdown()
+
+
+if __name__ == "__main__":
+    main()
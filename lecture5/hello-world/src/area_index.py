@@ -0,0 +1,155 @@
+import unicodedata
+from bisect import bisect_left
+
+# area.json には読み仮名がないので、オフィス（府県予報区）の読みをここに持つ
+OFFICE_READINGS = {
+    "011000": "そうやちほう",
+    "012000": "かみかわ・るもいちほう",
+    "013000": "あばしり・きたみ・もんべつちほう",
+    "014030": "とかちちほう",
+    "014100": "くしろ・ねむろちほう",
+    "015000": "いぶり・ひだかちほう",
+    "016000": "いしかり・そらち・しりべしちほう",
+    "017000": "おしま・ひやまちほう",
+    "020000": "あおもりけん",
+    "030000": "いわてけん",
+    "040000": "みやぎけん",
+    "050000": "あきたけん",
+    "060000": "やまがたけん",
+    "070000": "ふくしまけん",
+    "080000": "いばらきけん",
+    "090000": "とちぎけん",
+    "100000": "ぐんまけん",
+    "110000": "さいたまけん",
+    "120000": "ちばけん",
+    "130000": "とうきょうと",
+    "140000": "かながわけん",
+    "150000": "にいがたけん",
+    "160000": "とやまけん",
+    "170000": "いしかわけん",
+    "180000": "ふくいけん",
+    "190000": "やまなしけん",
+    "200000": "ながのけん",
+    "210000": "ぎふけん",
+    "220000": "しずおかけん",
+    "230000": "あいちけん",
+    "240000": "みえけん",
+    "250000": "しがけん",
+    "260000": "きょうとふ",
+    "270000": "おおさかふ",
+    "280000": "ひょうごけん",
+    "290000": "ならけん",
+    "300000": "わかやまけん",
+    "310000": "とっとりけん",
+    "320000": "しまねけん",
+    "330000": "おかやまけん",
+    "340000": "ひろしまけん",
+    "350000": "やまぐちけん",
+    "360000": "とくしまけん",
+    "370000": "かがわけん",
+    "380000": "えひめけん",
+    "390000": "こうちけん",
+    "400000": "ふくおかけん",
+    "410000": "さがけん",
+    "420000": "ながさきけん",
+    "430000": "くまもとけん",
+    "440000": "おおいたけん",
+    "450000": "みやざきけん",
+    "460040": "あまみちほう",
+    "460100": "かごしまけん",
+    "471000": "おきなわほんとうちほう",
+    "472000": "だいとうじまちほう",
+    "473000": "みやこじまちほう",
+    "474000": "やえやまちほう",
+}
+
+# 「上川・留萌地方」のような複数の地名は区切って、それぞれの先頭から探せるようにする
+_SEPARATORS = ("・", " ", "-")
+
+
+def normalize_query(text):
+    """検索語の正規化（全角英数は半角・小文字に、カタカナはひらがなに）"""
+    text = unicodedata.normalize("NFKC", text).strip().lower()
+    return "".join(chr(ord(ch) - 0x60) if "ァ" <= ch <= "ヶ" else ch for ch in text)
+
+
+def _split_words(text):
+    words = [text]
+    for separator in _SEPARATORS:
+        words = [part for word in words for part in word.split(separator)]
+    return [word for word in words if word]
+
+
+def _index_keys(*names):
+    """名前そのものと、区切った各語（正規化済み）"""
+    keys = set()
+    for name in names:
+        if not name:
+            continue
+        name = normalize_query(name)
+        keys.add(name)
+        keys.update(_split_words(name))
+    return keys
+
+
+class AreaIndex:
+    """地域の階層（センター → オフィス）と、名前の先頭一致で引く検索表
+
+    検索表は (正規化した名前, オフィスコード) をソートしたリストで、
+    漢字名・読み（ひらがな/カタカナ）・英語名のどれでも先頭一致で二分探索する。
+    センター名（「関東」など）で引くと、そのセンターのオフィスがすべて返る。
+    """
+
+    def __init__(self, area_json):
+        offices = area_json.get("offices", {})
+        self.office_names = {code: office["name"] for code, office in offices.items()}
+
+        # センターごとのオフィス（area.json に存在するものだけ、元の順序）
+        self.centers = []
+        self.center_offices = {}
+        for center_code, center in area_json.get("centers", {}).items():
+            codes = [code for code in center.get("children", []) if code in offices]
+            if codes:
+                self.centers.append((center_code, center["name"]))
+                self.center_offices[center_code] = codes
+
+        entries = set()
+        for code, office in offices.items():
+            for key in _index_keys(office["name"], office.get("enName"), OFFICE_READINGS.get(code)):
+                entries.add((key, code))
+        for center_code, _ in self.centers:
+            center = area_json["centers"][center_code]
+            for key in _index_keys(center["name"], center.get("enName")):
+                for code in self.center_offices[center_code]:
+                    entries.add((key, code))
+        self._keys = sorted(entries)
+
+        # 表示順（センター順 → オフィス順）で結果を並べるための番号
+        self._order = {}
+        for codes in self.center_offices.values():
+            for code in codes:
+                self._order.setdefault(code, len(self._order))
+
+    def __len__(self):
+        return len(self.office_names)
+
+    def offices(self, center_code):
+        """センターのオフィス [(code, name), ...]"""
+        return [(code, self.office_names[code]) for code in self.center_offices.get(center_code, ())]
+
+    def search(self, query, limit=None):
+        """名前・読み・英語名の先頭が query に一致するオフィス [(code, name), ...]（表示順）"""
+        query = normalize_query(query)
+        if not query:
+            return []
+
+        found = set()
+        i = bisect_left(self._keys, (query,))
+        while i < len(self._keys) and self._keys[i][0].startswith(query):
+            found.add(self._keys[i][1])
+            i += 1
+
+        codes = sorted(found, key=lambda code: self._order.get(code, len(self._order)))
+        if limit is not None:
+            codes = codes[:limit]
+        return [(code, self.office_names[code]) for code in codes]
@@ -0,0 +1,105 @@
+import flet as ft
+
+from area_index import AreaIndex
+
+# ListTile（dense）の高さ。検索結果は高さ固定にして ListView の仮想化を効かせる
+RESULT_EXTENT = 48
+
+# 検索結果として作る ListTile の数の上限
+SEARCH_LIMIT = 60
+
+
+def count_controls(control):
+    """control とその子孫のコントロール数"""
+    return 1 + sum(count_controls(child) for child in control._get_children())
+
+
+class AreaSidebar(ft.Container):
+    """地域選択のサイドバー（検索欄 + センターごとの折りたたみ）
+
+    オフィスの ListTile は、センターを初めて開いたときに作る。
+    検索欄に入力すると、AreaIndex の先頭一致で絞り込んだ結果だけを表示する。
+    """
+
+    def __init__(self, on_select):
+        super().__init__(width=300, bgcolor="#455A64")
+        self.on_select = on_select
+        self.index = None
+
+        self.search_field = ft.TextField(
+            hint_text="地域名・よみ・英語名で検索",
+            dense=True,
+            color="white",
+            border_color="#78909C",
+            on_change=self._on_search,
+            disabled=True,
+        )
+        self.status_text = ft.Text("地域を読み込み中...", color="#B0BEC5", size=12)
+        self.tree = ft.ListView(controls=[self.status_text], expand=True, padding=5)
+        self.results = ft.ListView(expand=True, padding=5, item_extent=RESULT_EXTENT, visible=False)
+
+        self.content = ft.Column(
+            [
+                ft.Container(
+                    content=ft.Column([
+                        ft.Text("地域選択", size=18, weight=ft.FontWeight.BOLD, color="white"),
+                        self.search_field,
+                    ], spacing=10),
+                    padding=15,
+                    bgcolor="#37474F",
+                ),
+                self.tree,
+                self.results,
+            ],
+            expand=True,
+        )
+
+    def set_areas(self, area_json):
+        """area.json からセンターの見出しだけを作り、更新が必要なコントロールを返す"""
+        self.index = AreaIndex(area_json)
+        self.tree.controls = [
+            ft.ExpansionTile(
+                title=ft.Text(name, color="white", weight=ft.FontWeight.BOLD),
+                data=center_code,
+                controls=[],
+                text_color="white",
+                collapsed_text_color="#B0BEC5",
+                bgcolor="transparent",
+                on_change=self._on_expand,
+            )
+            for center_code, name in self.index.centers
+        ]
+        self.search_field.disabled = False
+        return [self.tree, self.search_field]
+
+    def _office_tile(self, code, name):
+        return ft.ListTile(
+            title=ft.Text(name, color="white"),
+            data=code,
+            on_click=self._on_click,
+            hover_color="#1AFFFFFF",
+            dense=True,
+        )
+
+    def _on_expand(self, e):
+        """センターを初めて開いたときにオフィスの ListTile を作る"""
+        tile = e.control
+        if e.data == "true" and not tile.controls:
+            tile.controls = [self._office_tile(code, name) for code, name in self.index.offices(tile.data)]
+            tile.update()
+
+    def _on_search(self, e):
+        matches = self.index.search(self.search_field.value or "", limit=SEARCH_LIMIT) if self.index else []
+        searching = bool((self.search_field.value or "").strip())
+        self.results.controls = [self._office_tile(code, name) for code, name in matches]
+        if searching and not matches:
+            self.results.controls = [ft.Text("見つかりません", color="#B0BEC5", size=12)]
+        self.results.visible = searching
+        self.tree.visible = not searching
+        self.page.update(self.results, self.tree)
+
+    def _on_click(self, e):
+        self.on_select(e.control.data, e.control.title.value)
+
+    def control_count(self):
+        return count_controls(self)
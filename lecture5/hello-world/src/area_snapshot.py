@@ -0,0 +1,48 @@
+import os
+import pickle
+import time
+
+# 起動時に読む地域一覧（センター・オフィスだけ）のスナップショット
+SNAPSHOT_PATH = "area_snapshot.pickle"
+
+# 中身の形を変えたら上げる（古い形式のファイルは読まずに作り直す）
+SNAPSHOT_FORMAT = 1
+
+# area.json はめったに変わらないので、これより古ければ取り直す
+SNAPSHOT_MAX_AGE = 7 * 24 * 3600
+
+
+def compact_area(area_json):
+    """サイドバーと先読みに使う centers / offices だけを取り出す"""
+    centers = {
+        code: {"name": center["name"], "enName": center.get("enName", ""), "children": list(center["children"])}
+        for code, center in area_json["centers"].items()
+    }
+    offices = {
+        code: {"name": office["name"], "enName": office.get("enName", ""), "parent": office.get("parent", ""),
+               "children": list(office.get("children", ()))}
+        for code, office in area_json["offices"].items()
+    }
+    return {"centers": centers, "offices": offices}
+
+
+def save_snapshot(area_json, path=SNAPSHOT_PATH):
+    """地域一覧をスナップショットに保存（書き込み途中のファイルを読まないよう置き換えで保存）"""
+    tmp_path = path + ".tmp"
+    with open(tmp_path, "wb") as f:
+        pickle.dump((SNAPSHOT_FORMAT, time.time(), compact_area(area_json)), f, protocol=pickle.HIGHEST_PROTOCOL)
+    os.replace(tmp_path, path)
+
+
+def load_snapshot(path=SNAPSHOT_PATH, max_age=SNAPSHOT_MAX_AGE):
+    """スナップショットの地域一覧（ないか、古いか、読めなければ None）"""
+    try:
+        with open(path, "rb") as f:
+            snapshot_format, saved_at, area = pickle.load(f)
+    except (OSError, EOFError, ValueError, TypeError, pickle.UnpicklingError):
+        return None
+    if snapshot_format != SNAPSHOT_FORMAT:
+        return None
+    if max_age is not None and time.time() - saved_at > max_age:
+        return None
+    return area
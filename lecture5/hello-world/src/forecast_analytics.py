@@ -0,0 +1,268 @@
+import argparse
+import sqlite3
+import time
+
+import numpy as np
+import pandas as pd
+
+from weather_icons import weather_category
+from weather_store import DB_NAME, WeatherStore
+
+# 1回の更新で読む forecasts の id の幅（メモリ使用量の上限を決める）
+BATCH_IDS = 500000
+
+SECONDS_PER_DAY = 86400
+
+# lead_days は日本時間の日付の差で数える
+JST_OFFSET = 9 * 3600
+
+# forecast_revisions の形を変えたら上げる（古い集計は捨てて全件から作り直す）
+REVISIONS_VERSION = 2
+
+# 発表ごとの予報の変化（1行 = ある予報日について、ある発表が直前の発表からどう変わったか）
+# 予報日（forecast_day）は forecast_epoch の日本時間の日付。当日分の forecast_date は発表時刻と
+# 同じ（"...T11:00" と "...T17:00"）なので、文字列のままでは発表をまたいで比べられない。
+# lead_days は予報日が発表日の何日後か（日本時間）
+SQL_CREATE_REVISIONS = """
+    CREATE TABLE IF NOT EXISTS forecast_revisions (
+        office_code TEXT NOT NULL,
+        forecast_day TEXT NOT NULL,
+        report_epoch INTEGER NOT NULL,
+        prev_report_epoch INTEGER NOT NULL,
+        lead_days INTEGER,
+        category TEXT NOT NULL,
+        prev_category TEXT NOT NULL,
+        flipped INTEGER NOT NULL,
+        temp_min_drift REAL,
+        temp_max_drift REAL,
+        PRIMARY KEY (office_code, forecast_day, report_epoch)
+    ) WITHOUT ROWID
+"""
+
+SQL_DROP_REVISIONS = "DROP TABLE IF EXISTS forecast_revisions"
+
+SQL_CREATE_REVISIONS_INDEX = """
+    CREATE INDEX IF NOT EXISTS idx_forecast_revisions_lead
+    ON forecast_revisions(office_code, lead_days)
+"""
+
+# どこまで集計したか（forecasts.id の最大値）
+SQL_CREATE_STATE = """
+    CREATE TABLE IF NOT EXISTS analytics_state (
+        name TEXT PRIMARY KEY,
+        value INTEGER NOT NULL
+    ) WITHOUT ROWID
+"""
+
+SQL_SELECT_STATE = "SELECT value FROM analytics_state WHERE name = ?"
+
+SQL_UPSERT_STATE = """
+    INSERT INTO analytics_state (name, value) VALUES (?, ?)
+    ON CONFLICT (name) DO UPDATE SET value = excluded.value
+"""
+
+SQL_DELETE_STATE = "DELETE FROM analytics_state WHERE name = ?"
+
+SQL_SELECT_MAX_ID = "SELECT COALESCE(MAX(id), 0) FROM forecasts"
+
+# 予報日の式は weather_store の idx_forecasts_revision_days と同じにして索引を使う
+# （forecast_epoch が NULL の行は予報日も NULL になり、比べない）
+
+# id の範囲で新しく入った行の (office_code, 予報日) だけを取り出し、
+# その予報日の全発表を idx_forecasts_revision_days で読む
+SQL_SELECT_TOUCHED_HISTORY = """
+    WITH touched AS (
+        SELECT DISTINCT office_code, date(forecast_epoch + 32400, 'unixepoch') AS forecast_day
+        FROM forecasts
+        WHERE id > ? AND id <= ?
+    )
+    SELECT f.office_code, t.forecast_day, f.forecast_epoch, f.report_epoch, f.weather,
+           f.temp_min_value, f.temp_max_value
+    FROM touched AS t
+    JOIN forecasts AS f
+        ON f.office_code = t.office_code
+        AND date(f.forecast_epoch + 32400, 'unixepoch') = t.forecast_day
+    ORDER BY f.office_code, t.forecast_day, f.report_epoch
+"""
+
+# 初回（全件）は索引をそのまま先頭から読む
+SQL_SELECT_ALL_HISTORY = """
+    SELECT office_code, date(forecast_epoch + 32400, 'unixepoch') AS forecast_day, forecast_epoch,
+           report_epoch, weather, temp_min_value, temp_max_value
+    FROM forecasts
+    WHERE id <= ?
+    ORDER BY office_code, date(forecast_epoch + 32400, 'unixepoch'), report_epoch
+"""
+
+SQL_UPSERT_REVISION = """
+    INSERT OR REPLACE INTO forecast_revisions
+    (office_code, forecast_day, report_epoch, prev_report_epoch, lead_days,
+     category, prev_category, flipped, temp_min_drift, temp_max_drift)
+    VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+"""
+
+REVISION_COLUMNS = [
+    "office_code", "forecast_day", "report_epoch", "prev_report_epoch", "lead_days",
+    "category", "prev_category", "flipped", "temp_min_drift", "temp_max_drift",
+]
+
+# 予報日の何日前の発表か（lead_days）ごとの、気温の変化と天気の変わりやすさ
+SQL_SELECT_DRIFT_SUMMARY = """
+    SELECT office_code, lead_days,
+           COUNT(*) AS revisions,
+           AVG(flipped) AS flip_rate,
+           AVG(ABS(temp_min_drift)) AS temp_min_abs_drift,
+           AVG(ABS(temp_max_drift)) AS temp_max_abs_drift
+    FROM forecast_revisions
+    {where}
+    GROUP BY office_code, lead_days
+    ORDER BY office_code, lead_days
+"""
+
+
+def init_analytics_schema(conn):
+    """集計結果のテーブルを作成（形の古い forecast_revisions は作り直し、次の更新で全件集計する）"""
+    with conn:
+        conn.execute(SQL_CREATE_STATE)
+        row = conn.execute(SQL_SELECT_STATE, ("revisions_version",)).fetchone()
+        if row is None or row[0] < REVISIONS_VERSION:
+            conn.execute(SQL_DROP_REVISIONS)
+            conn.execute(SQL_DELETE_STATE, ("revisions_last_id",))
+            conn.execute(SQL_UPSERT_STATE, ("revisions_version", REVISIONS_VERSION))
+        conn.execute(SQL_CREATE_REVISIONS)
+        conn.execute(SQL_CREATE_REVISIONS_INDEX)
+
+
+def compute_revisions(history):
+    """予報日ごとに発表時刻順に並んだ履歴から、直前の発表との変化を列ごとにまとめて計算"""
+    # 1回の発表に同じ予報日が2つあれば後の方だけを使う（主キーが重なるため）
+    history = history.drop_duplicates(["office_code", "forecast_day", "report_epoch"], keep="last")
+    # 直前の発表の値を横に並べる（SQL の LAG(...) OVER (PARTITION BY ... ORDER BY report_epoch) と同じ）
+    same_date = (
+        (history["office_code"] == history["office_code"].shift())
+        & (history["forecast_day"] == history["forecast_day"].shift())
+    )
+    for column, prev_column in (("report_epoch", "prev_report_epoch"), ("weather", "prev_weather"),
+                                ("temp_min_value", "prev_temp_min"), ("temp_max_value", "prev_temp_max")):
+        history[prev_column] = history[column].shift().where(same_date)
+
+    # 発表時刻を解釈できなかった行は比べない
+    revisions = history[same_date & history["report_epoch"].notna() & history["prev_report_epoch"].notna()].copy()
+    if revisions.empty:
+        return pd.DataFrame(columns=REVISION_COLUMNS)
+
+    # 天気文の種類は少ないので、ユニークな文字列だけを分類して map する
+    texts = pd.unique(pd.concat([revisions["weather"], revisions["prev_weather"]]))
+    categories = pd.Series({text: weather_category(text) for text in texts})
+    revisions["category"] = revisions["weather"].map(categories)
+    revisions["prev_category"] = revisions["prev_weather"].map(categories)
+    revisions["flipped"] = (revisions["category"] != revisions["prev_category"]).astype(np.int64)
+
+    revisions["temp_min_drift"] = revisions["temp_min_value"] - revisions["prev_temp_min"]
+    revisions["temp_max_drift"] = revisions["temp_max_value"] - revisions["prev_temp_max"]
+    revisions["lead_days"] = (
+        np.floor_divide(revisions["forecast_epoch"] + JST_OFFSET, SECONDS_PER_DAY)
+        - np.floor_divide(revisions["report_epoch"] + JST_OFFSET, SECONDS_PER_DAY)
+    ).astype("Int64")
+    revisions["report_epoch"] = revisions["report_epoch"].astype(np.int64)
+    revisions["prev_report_epoch"] = revisions["prev_report_epoch"].astype(np.int64)
+    return revisions[REVISION_COLUMNS]
+
+
+def revision_rows(revisions):
+    """DataFrame を executemany 用の行に（NaN/NA は None）"""
+    columns = []
+    for name in REVISION_COLUMNS:
+        column = revisions[name]
+        if column.hasnans:
+            column = column.astype(object).where(column.notna(), None)
+        columns.append(column.tolist())
+    return list(zip(*columns))
+
+
+def update_revisions(conn, batch_ids=BATCH_IDS):
+    """前回の集計以降に入った発表の分だけ forecast_revisions を更新
+
+    新しく入った行の予報日について、その日の全発表を読み直して上書きするので、
+    古い発表が後から入った場合も正しく並び直る。件数などを辞書で返す。
+    """
+    start = time.perf_counter()
+    init_analytics_schema(conn)
+
+    row = conn.execute(SQL_SELECT_STATE, ("revisions_last_id",)).fetchone()
+    last_id = row[0] if row else 0
+    max_id = conn.execute(SQL_SELECT_MAX_ID).fetchone()[0]
+
+    history_rows = 0
+    written = 0
+    flips = 0
+    while last_id < max_id:
+        upper = min(last_id + batch_ids, max_id)
+        if last_id == 0 and upper == max_id:
+            history = pd.read_sql_query(SQL_SELECT_ALL_HISTORY, conn, params=(upper,))
+        else:
+            history = pd.read_sql_query(SQL_SELECT_TOUCHED_HISTORY, conn, params=(last_id, upper))
+        revisions = compute_revisions(history)
+        with conn:
+            conn.executemany(SQL_UPSERT_REVISION, revision_rows(revisions))
+            conn.execute(SQL_UPSERT_STATE, ("revisions_last_id", upper))
+        history_rows += len(history)
+        written += len(revisions)
+        flips += int(revisions["flipped"].sum()) if len(revisions) else 0
+        last_id = upper
+
+    return {
+        "history_rows": history_rows,
+        "revisions": written,
+        "flips": flips,
+        "last_id": last_id,
+        "elapsed": time.perf_counter() - start,
+    }
+
+
+def drift_summary(conn, office_code=None):
+    """オフィス・lead_days ごとの発表回数、天気が変わった割合、気温の平均変化量"""
+    init_analytics_schema(conn)
+    if office_code:
+        sql = SQL_SELECT_DRIFT_SUMMARY.format(where="WHERE office_code = ?")
+        return pd.read_sql_query(sql, conn, params=(office_code,))
+    return pd.read_sql_query(SQL_SELECT_DRIFT_SUMMARY.format(where=""), conn)
+
+
+def flip_matrix(conn, office_code=None):
+    """直前の発表の天気（行）から今回の天気（列）への変化の回数"""
+    init_analytics_schema(conn)
+    sql = "SELECT prev_category, category FROM forecast_revisions"
+    params = ()
+    if office_code:
+        sql += " WHERE office_code = ?"
+        params = (office_code,)
+    revisions = pd.read_sql_query(sql, conn, params=params)
+    return pd.crosstab(revisions["prev_category"], revisions["category"])
+
+
+def main():
+    parser = argparse.ArgumentParser(description="発表ごとの予報の変化（気温・天気）を集計")
+    parser.add_argument("--db", default=DB_NAME)
+    parser.add_argument("--office", help="表示するオフィスコード（省略時は全オフィス）")
+    args = parser.parse_args()
+
+    # 数値・時刻の列と索引がそろうようにマイグレーションしておく
+    store = WeatherStore(args.db, pool_size=1)
+    store.init_schema()
+    store.close()
+
+    conn = sqlite3.connect(args.db)
+    try:
+        summary = update_revisions(conn)
+        print(f"{summary['history_rows']} 行を読み直し, {summary['revisions']} 件の変化を更新 "
+              f"(天気が変わった {summary['flips']} 件, {summary['elapsed']:.2f} 秒)")
+        with pd.option_context("display.width", 120, "display.max_rows", 200):
+            print(drift_summary(conn, args.office))
+            print(flip_matrix(conn, args.office))
+    finally:
+        conn.close()
+
+
+if __name__ == "__main__":
+    main()
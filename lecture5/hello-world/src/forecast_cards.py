@@ -0,0 +1,119 @@
+import flet as ft
+from datetime import datetime
+from weather_icons import get_weather_icon
+
+WEEKDAYS = ["月", "火", "水", "木", "金", "土", "日"]
+
+
+def format_forecast_date(date_str):
+    """予報日時を「1/15(水)」の形式にする"""
+    try:
+        date = datetime.fromisoformat(date_str.replace("Z", "+0000"))
+        return f"{date.month}/{date.day}({WEEKDAYS[date.weekday()]})"
+    except:
+        return date_str[:10]
+
+
+def format_temp(temp):
+    return f"{temp}°" if temp and temp != "" else "--"
+
+
+class ForecastCard(ft.Container):
+    """天気予報カード（コントロールは一度だけ作り、値を差し替えて使い回す）"""
+
+    def __init__(self):
+        super().__init__(
+            width=140,
+            height=200,
+            bgcolor="#4DFFFFFF",
+            border_radius=10,
+            padding=12,
+            border=ft.border.all(1, "#33FFFFFF"),
+            visible=False,
+        )
+
+        self.date_text = ft.Text("", size=14, weight=ft.FontWeight.BOLD, color="white")
+        self.icon_text = ft.Text("", size=48)
+        self.weather_text = ft.Text("", size=11, text_align=ft.TextAlign.CENTER, color="#B0BEC5", max_lines=2)
+        self.temp_min_text = ft.Text("--", size=14, color="#81D4FA", weight=ft.FontWeight.BOLD)
+        self.temp_max_text = ft.Text("--", size=14, color="#EF5350", weight=ft.FontWeight.BOLD)
+
+        self.content = ft.Column(
+            [
+                self.date_text,
+                ft.Container(height=5),
+                self.icon_text,
+                ft.Container(height=5),
+                self.weather_text,
+                ft.Container(height=5),
+                ft.Row(
+                    [
+                        self.temp_min_text,
+                        ft.Text("/", size=14, color="#B0BEC5"),
+                        self.temp_max_text,
+                    ],
+                    alignment=ft.MainAxisAlignment.CENTER,
+                    spacing=5,
+                ),
+            ],
+            horizontal_alignment=ft.CrossAxisAlignment.CENTER,
+            alignment=ft.MainAxisAlignment.CENTER,
+        )
+
+    def set_forecast(self, date_str, weather, temp_min=None, temp_max=None, weather_code=None):
+        """値を差し替えて表示し、変更のあったコントロールのリストを返す"""
+        changed = []
+        for control, value in (
+            (self.date_text, format_forecast_date(date_str)),
+            (self.icon_text, get_weather_icon(weather, weather_code)),
+            (self.weather_text, weather),
+            (self.temp_min_text, format_temp(temp_min)),
+            (self.temp_max_text, format_temp(temp_max)),
+        ):
+            if control.value != value:
+                control.value = value
+                changed.append(control)
+
+        if not self.visible:
+            self.visible = True
+            changed.append(self)
+        return changed
+
+    def hide(self):
+        if not self.visible:
+            return []
+        self.visible = False
+        return [self]
+
+
+class ForecastCardPool:
+    """あらかじめ作っておいたカードを使い回して予報を表示する
+
+    show()/hide_from() は変更したコントロールのリストを返すので、
+    page.update(*changed) でその部分だけを送信できる。
+    """
+
+    def __init__(self, size=8):
+        self.cards = [ForecastCard() for _ in range(size)]
+        self.row = ft.Row(self.cards, wrap=True, spacing=15, run_spacing=15, scroll=ft.ScrollMode.AUTO)
+
+    def show(self, index, date_str, weather, temp_min=None, temp_max=None, weather_code=None):
+        """index 番目のカードに予報を表示（足りなければカードを追加）"""
+        if index >= len(self.cards):
+            while len(self.cards) <= index:
+                card = ForecastCard()
+                self.cards.append(card)
+                self.row.controls.append(card)
+            self.cards[index].set_forecast(date_str, weather, temp_min, temp_max, weather_code)
+            return [self.row]
+        return self.cards[index].set_forecast(date_str, weather, temp_min, temp_max, weather_code)
+
+    def hide_from(self, start):
+        """start 番目以降のカードを隠す"""
+        changed = []
+        for card in self.cards[start:]:
+            changed.extend(card.hide())
+        return changed
+
+    def hide_all(self):
+        return self.hide_from(0)
@@ -0,0 +1,185 @@
+import argparse
+import csv
+import os
+import sqlite3
+import time
+
+try:
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+except ImportError:  # pyarrow がなければ CSV で書き出す
+    pa = None
+    pq = None
+
+from weather_store import DB_NAME, WeatherStore
+
+EXPORT_DIR = "export"
+
+# 1回に読み出す行数（メモリ使用量の上限を決める）
+CHUNK_SIZE = 10000
+
+# オフィス・発表時刻の順に読み、同じオフィス・月の行をまとめて書き出す
+SQL_SELECT_EXPORT = """
+    SELECT office_code, report_datetime, forecast_date, weather,
+           temp_min_value, temp_max_value, forecast_epoch, report_epoch, fetched_at
+    FROM forecasts
+    ORDER BY office_code, report_datetime, forecast_date
+"""
+
+COLUMNS = (
+    "office_code", "report_datetime", "forecast_date", "weather",
+    "temp_min", "temp_max", "forecast_epoch", "report_epoch", "fetched_at",
+)
+
+if pa is not None:
+    ARROW_SCHEMA = pa.schema([
+        ("office_code", pa.string()),
+        ("report_datetime", pa.string()),
+        ("forecast_date", pa.string()),
+        ("weather", pa.string()),
+        ("temp_min", pa.float64()),
+        ("temp_max", pa.float64()),
+        ("forecast_epoch", pa.int64()),
+        ("report_epoch", pa.int64()),
+        ("fetched_at", pa.string()),
+    ])
+
+
+def partition_key(row):
+    """(office_code, "YYYY-MM")：発表時刻の月で分ける"""
+    return row[0], row[1][:7]
+
+
+def partition_dir(out_dir, office_code, month):
+    return os.path.join(out_dir, f"office_code={office_code}", f"month={month}")
+
+
+class ParquetPartitionWriter:
+    """1つのパーティションに Parquet を書く（チャンクごとに row group を追加）"""
+
+    extension = "parquet"
+
+    def __init__(self, path):
+        self._writer = pq.ParquetWriter(path, ARROW_SCHEMA, compression="zstd")
+
+    def write(self, rows):
+        columns = list(zip(*rows))
+        self._writer.write_table(pa.Table.from_arrays(
+            [pa.array(values, type=field.type) for values, field in zip(columns, ARROW_SCHEMA)],
+            schema=ARROW_SCHEMA,
+        ))
+
+    def close(self):
+        self._writer.close()
+
+
+class CsvPartitionWriter:
+    """pyarrow がない環境用：1つのパーティションに CSV を書く"""
+
+    extension = "csv"
+
+    def __init__(self, path):
+        self._file = open(path, "w", newline="", encoding="utf-8")
+        self._writer = csv.writer(self._file)
+        self._writer.writerow(COLUMNS)
+
+    def write(self, rows):
+        self._writer.writerows(rows)
+
+    def close(self):
+        self._file.close()
+
+
+def get_writer_class(fmt=None):
+    """fmt（"parquet" / "csv"、省略時は使えるほう）の書き出しクラスを返す"""
+    if fmt is None:
+        fmt = "parquet" if pq is not None else "csv"
+    if fmt == "parquet":
+        if pq is None:
+            raise RuntimeError("Parquet で書き出すには pyarrow が必要です（pip install pyarrow）")
+        return ParquetPartitionWriter
+    if fmt == "csv":
+        return CsvPartitionWriter
+    raise ValueError(f"未対応の形式です: {fmt}")
+
+
+def iter_chunks(conn, chunk_size=CHUNK_SIZE):
+    """forecasts を chunk_size 行ずつ読み出す（fetchall で全件を持たない）"""
+    cursor = conn.execute(SQL_SELECT_EXPORT)
+    while True:
+        rows = cursor.fetchmany(chunk_size)
+        if not rows:
+            break
+        yield rows
+
+
+def export_forecasts(conn, out_dir=EXPORT_DIR, fmt=None, chunk_size=CHUNK_SIZE):
+    """forecasts をオフィス・月ごとのパーティションに書き出し、件数などを辞書で返す
+
+    出力は out_dir/office_code=XXXXXX/month=YYYY-MM/part-0.{parquet,csv}。
+    同時に開くのは1パーティション分だけで、メモリに載るのは最大 chunk_size 行。
+    """
+    start = time.perf_counter()
+    writer_class = get_writer_class(fmt)
+
+    writer = None
+    current = None
+    files = []
+    rows_written = 0
+    try:
+        for rows in iter_chunks(conn, chunk_size):
+            batch_start = 0
+            for i, row in enumerate(rows):
+                key = partition_key(row)
+                if key == current:
+                    continue
+                if writer is not None and i > batch_start:
+                    writer.write(rows[batch_start:i])
+                if writer is not None:
+                    writer.close()
+                current = key
+                directory = partition_dir(out_dir, *key)
+                os.makedirs(directory, exist_ok=True)
+                path = os.path.join(directory, f"part-0.{writer_class.extension}")
+                writer = writer_class(path)
+                files.append(path)
+                batch_start = i
+            writer.write(rows[batch_start:])
+            rows_written += len(rows)
+    finally:
+        if writer is not None:
+            writer.close()
+
+    return {
+        "rows": rows_written,
+        "partitions": len(files),
+        "files": files,
+        "format": writer_class.extension,
+        "elapsed": time.perf_counter() - start,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="予報履歴をオフィス・月ごとの列指向ファイルに書き出す")
+    parser.add_argument("--db", default=DB_NAME)
+    parser.add_argument("--out", default=EXPORT_DIR)
+    parser.add_argument("--format", choices=("parquet", "csv"), help="省略時は pyarrow があれば parquet")
+    parser.add_argument("--chunk-size", type=int, default=CHUNK_SIZE)
+    args = parser.parse_args()
+
+    # 古いDBでも数値・時刻の列がそろうようにマイグレーションしておく
+    store = WeatherStore(args.db, pool_size=1)
+    store.init_schema()
+    store.close()
+
+    conn = sqlite3.connect(args.db)
+    try:
+        summary = export_forecasts(conn, args.out, args.format, args.chunk_size)
+    finally:
+        conn.close()
+    print(f"{summary['rows']} 行を {summary['partitions']} パーティションに書き出し "
+          f"({summary['format']}, {summary['elapsed']:.2f} 秒) → {args.out}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,160 @@
+import json
+
+
+class ForecastRecord:
+    """1日分の予報（予報日時・天気・最低/最高気温・天気コード）"""
+
+    __slots__ = ("forecast_date", "weather", "temp_min", "temp_max", "weather_code")
+
+    def __init__(self, forecast_date, weather, temp_min=None, temp_max=None, weather_code=None):
+        self.forecast_date = forecast_date
+        self.weather = weather
+        self.temp_min = temp_min
+        self.temp_max = temp_max
+        self.weather_code = weather_code
+
+    def __eq__(self, other):
+        if not isinstance(other, ForecastRecord):
+            return NotImplemented
+        return all(getattr(self, name) == getattr(other, name) for name in self.__slots__)
+
+    def __repr__(self):
+        return (f"ForecastRecord({self.forecast_date!r}, {self.weather!r}, "
+                f"{self.temp_min!r}, {self.temp_max!r}, {self.weather_code!r})")
+
+
+class ForecastReport:
+    """1回の発表分の予報（発表時刻と ForecastRecord のリスト）"""
+
+    __slots__ = ("report_datetime", "records")
+
+    def __init__(self, report_datetime, records):
+        self.report_datetime = report_datetime
+        self.records = records
+
+    def __len__(self):
+        return len(self.records)
+
+    def __iter__(self):
+        return iter(self.records)
+
+    def __eq__(self, other):
+        if not isinstance(other, ForecastReport):
+            return NotImplemented
+        return self.report_datetime == other.report_datetime and self.records == other.records
+
+    def __repr__(self):
+        return f"ForecastReport({self.report_datetime!r}, {len(self.records)} records)"
+
+
+def build_report(report_datetime, dates, weathers, temps_min=(), temps_max=(), weather_codes=()):
+    """日時・天気・気温・天気コードの並列リストから ForecastReport を組み立てる"""
+    records = [
+        ForecastRecord(
+            date_str,
+            weather,
+            temps_min[i] if i < len(temps_min) else None,
+            temps_max[i] if i < len(temps_max) else None,
+            weather_codes[i] if i < len(weather_codes) else None,
+        )
+        for i, (date_str, weather) in enumerate(zip(dates, weathers))
+    ]
+    return ForecastReport(report_datetime, records)
+
+
+def parse_forecast(data):
+    """天気予報データ（json.loads 済み）を解析"""
+    ts = data[0]["timeSeries"][0]
+    dates = ts["timeDefines"]
+    weathers = ts["areas"][0]["weathers"]
+    # アイコンは天気コードがあればそれで決める
+    weather_codes = ts["areas"][0].get("weatherCodes", [])
+
+    temps_min = []
+    temps_max = []
+
+    try:
+        if len(data[0]["timeSeries"]) > 2:
+            temp_ts = data[0]["timeSeries"][2]
+            if "areas" in temp_ts and len(temp_ts["areas"]) > 0:
+                temp_data = temp_ts["areas"][0]
+                if "tempsMin" in temp_data:
+                    temps_min = temp_data["tempsMin"]
+                if "tempsMax" in temp_data:
+                    temps_max = temp_data["tempsMax"]
+    except:
+        pass
+
+    report_datetime = data[0].get("reportDatetime", "")
+
+    return build_report(report_datetime, dates, weathers, temps_min, temps_max, weather_codes)
+
+
+# 予報JSONの発表の種類（data[0] が3日間の詳細予報、data[1] が週間予報）
+SERIES_NAMES = ("short", "weekly")
+
+
+class ForecastSeries:
+    """1つの地域・要素の時系列（例: 東京地方の pops、東京の tempsMin）"""
+
+    __slots__ = ("series", "area_code", "area_name", "element", "time_defines", "values")
+
+    def __init__(self, series, area_code, area_name, element, time_defines, values):
+        self.series = series
+        self.area_code = area_code
+        self.area_name = area_name
+        self.element = element
+        self.time_defines = time_defines
+        self.values = values
+
+    def __repr__(self):
+        return (f"ForecastSeries({self.series!r}, {self.area_code!r}, {self.area_name!r}, "
+                f"{self.element!r}, {len(self.values)} values)")
+
+
+class ForecastBundle:
+    """1回の取得で得られる予報のすべて
+
+    report は画面表示用（parse_forecast と同じ）、series は全地域・全要素の時系列。
+    """
+
+    __slots__ = ("report", "series")
+
+    def __init__(self, report, series):
+        self.report = report
+        self.series = series
+
+    def value_count(self):
+        return sum(len(series.values) for series in self.series)
+
+    def __repr__(self):
+        return f"ForecastBundle({self.report!r}, {len(self.series)} series, {self.value_count()} values)"
+
+
+def parse_forecast_bundle(data):
+    """天気予報データ（json.loads 済み）から、全地域・全要素の時系列を取り出す
+
+    areas[0] だけでなくすべての地域の weathers/winds/waves/pops/temps と、
+    週間予報の weatherCodes/pops/reliabilities/tempsMin/tempsMax などを含む。
+    """
+    series = []
+    for series_name, block in zip(SERIES_NAMES, data):
+        for ts in block.get("timeSeries", []):
+            time_defines = ts.get("timeDefines", [])
+            for area in ts.get("areas", []):
+                info = area.get("area", {})
+                for element, values in area.items():
+                    if isinstance(values, list):
+                        series.append(ForecastSeries(
+                            series_name, info.get("code", ""), info.get("name", ""), element, time_defines, values,
+                        ))
+    return ForecastBundle(parse_forecast(data), series)
+
+
+def load_forecast_bundle(source):
+    """予報JSON（本文の bytes かバイナリのファイルオブジェクト）全体を解析して ForecastBundle を返す"""
+    if isinstance(source, (bytes, bytearray)):
+        data = json.loads(source)
+    else:
+        data = json.load(source)
+    return parse_forecast_bundle(data)
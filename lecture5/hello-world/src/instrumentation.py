@@ -0,0 +1,253 @@
+import atexit
+import json
+import os
+import sys
+import threading
+import time
+from functools import wraps
+
+# 計測を有効にする環境変数
+TRACE_ENV = "WEATHER_TRACE"            # JSON lines の出力先（例: trace.jsonl）
+PROFILE_ENV = "WEATHER_PROFILE"        # cProfile の出力先（例: weather.prof）
+TRACEMALLOC_ENV = "WEATHER_TRACEMALLOC"  # 1 ならメモリ確保の上位を JSON lines に出す
+
+# tracemalloc のスナップショットで出力する上位件数
+TRACEMALLOC_TOP = 20
+
+
+class _NullSpan:
+    """計測が無効なときの何もしない span（使い回す）"""
+
+    __slots__ = ()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+    def set(self, **attrs):
+        pass
+
+
+NULL_SPAN = _NullSpan()
+
+
+class _ProfileSnapshot:
+    """実行中の cProfile.Profile を止めずに取った統計（pstats.Stats に渡す）
+
+    Profile.create_stats() は呼んだスレッドのプロファイルを止めてしまうので、
+    ほかのスレッドのプロファイラは snapshot_stats() で読む。
+    """
+
+    def __init__(self, profiler):
+        profiler.snapshot_stats()
+        self.stats = dict(profiler.stats)
+
+    def create_stats(self):
+        pass
+
+
+class Span:
+    """with ブロックの時間を計り、終了時に Instrumentation に記録する"""
+
+    __slots__ = ("_owner", "name", "attrs", "_start")
+
+    def __init__(self, owner, name, attrs):
+        self._owner = owner
+        self.name = name
+        self.attrs = attrs
+        self._start = 0.0
+
+    def __enter__(self):
+        self._start = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        duration = time.perf_counter() - self._start
+        if exc_type is not None:
+            self.attrs["error"] = exc_type.__name__
+        self._owner._record_span(self.name, self._start, duration, self.attrs)
+        return False
+
+    def set(self, **attrs):
+        """span に属性を追加（件数・取得元など）"""
+        self.attrs.update(attrs)
+
+
+class Instrumentation:
+    """処理ごとの時間（span）と回数（counter）を集め、JSON lines に書き出す
+
+    無効なときは span() が共有の NULL_SPAN を返すだけなので、ほぼコストはかからない。
+    """
+
+    def __init__(self, enabled=False, path=None, profile_path=None, trace_memory=False):
+        self.enabled = enabled
+        self.path = path
+        self.profile_path = profile_path
+        self.trace_memory = trace_memory
+        self._lock = threading.Lock()
+        self._records = []
+        self.counters = {}
+        # スレッドごとの cProfile.Profile（3.11 までの cProfile は enable() したスレッドしか計れない）
+        self._profilers = []
+        # 前回書き出した counters（変わっていなければ同じ行を書かない）
+        self._flushed_counters = {}
+        self._atexit_registered = False
+        self._origin = time.time() - time.perf_counter()
+
+    @classmethod
+    def from_env(cls, environ=None):
+        """環境変数 WEATHER_TRACE / WEATHER_PROFILE / WEATHER_TRACEMALLOC から作る"""
+        environ = os.environ if environ is None else environ
+        path = environ.get(TRACE_ENV)
+        profile_path = environ.get(PROFILE_ENV)
+        trace_memory = environ.get(TRACEMALLOC_ENV, "") not in ("", "0")
+        enabled = bool(path or profile_path or trace_memory)
+        return cls(enabled, path or ("trace.jsonl" if trace_memory else None), profile_path, trace_memory)
+
+    def span(self, name, **attrs):
+        """with instrumentation.span("fetch_forecast", area_code=code): ... の形で時間を計る"""
+        if not self.enabled:
+            return NULL_SPAN
+        return Span(self, name, attrs)
+
+    def timed(self, name=None):
+        """関数全体を span で囲むデコレータ"""
+        def decorator(func):
+            span_name = name or func.__name__
+
+            @wraps(func)
+            def wrapper(*args, **kwargs):
+                if not self.enabled:
+                    return func(*args, **kwargs)
+                with Span(self, span_name, {}):
+                    return func(*args, **kwargs)
+            return wrapper
+        return decorator
+
+    def count(self, name, n=1):
+        """回数を数える（DBから/APIから などの内訳）"""
+        if not self.enabled:
+            return
+        with self._lock:
+            self.counters[name] = self.counters.get(name, 0) + n
+
+    def _record_span(self, name, start, duration, attrs):
+        record = {
+            "type": "span",
+            "name": name,
+            "ts": round(self._origin + start, 6),
+            "duration_ms": round(duration * 1000, 3),
+            "thread": threading.current_thread().name,
+        }
+        if attrs:
+            record.update(attrs)
+        with self._lock:
+            self._records.append(record)
+
+    def summary(self):
+        """span ごとの回数・合計・p50/p99（ミリ秒）と counters"""
+        with self._lock:
+            durations = {}
+            for record in self._records:
+                if record["type"] == "span":
+                    durations.setdefault(record["name"], []).append(record["duration_ms"])
+            counters = dict(self.counters)
+
+        spans = {}
+        for name, values in durations.items():
+            values.sort()
+            spans[name] = {
+                "count": len(values),
+                "total_ms": round(sum(values), 3),
+                "p50_ms": values[min(len(values) - 1, len(values) * 50 // 100)],
+                "p99_ms": values[min(len(values) - 1, len(values) * 99 // 100)],
+            }
+        return {"spans": spans, "counters": counters}
+
+    def start(self):
+        """cProfile / tracemalloc を開始し、終了時に書き出すよう登録
+
+        プロファイルは呼んだスレッドと、このあと作られるスレッド（予報の読み込みの
+        ワーカーやバックグラウンド更新）で取り、書き出すときにまとめる。
+        Python 3.12 以降の cProfile は sys.monitoring で全スレッドを計り、同時に
+        2つ目を enable() すると ValueError になるので、プロファイラは1つだけにする。
+        セッションごとに呼ばれても、終了時の書き出しは1回だけ登録する。
+        """
+        if not self.enabled:
+            return
+        if self.profile_path and not self._profilers:
+            self._start_profiler()
+            if sys.version_info < (3, 12):
+                threading.setprofile(self._profile_thread)
+        if self.trace_memory:
+            import tracemalloc
+            if not tracemalloc.is_tracing():
+                tracemalloc.start()
+        with self._lock:
+            if self._atexit_registered:
+                return
+            self._atexit_registered = True
+        atexit.register(self.flush)
+
+    def _start_profiler(self):
+        import cProfile
+        profiler = cProfile.Profile()
+        with self._lock:
+            self._profilers.append(profiler)
+        profiler.enable()
+
+    def _profile_thread(self, frame, event, arg):
+        """新しいスレッドの最初の呼び出しで、そのスレッドのプロファイラを開始する"""
+        # enable() でこのスレッドのフックが cProfile に置き換わるので、呼ばれるのは1回だけ
+        self._start_profiler()
+
+    def _dump_profile(self):
+        """全スレッドのプロファイルを1つにまとめて保存"""
+        import pstats
+        with self._lock:
+            profilers = list(self._profilers)
+        pstats.Stats(*(_ProfileSnapshot(profiler) for profiler in profilers)).dump_stats(self.profile_path)
+
+    def _memory_records(self):
+        import tracemalloc
+        if not tracemalloc.is_tracing():
+            return []
+        current, peak = tracemalloc.get_traced_memory()
+        records = [{"type": "memory", "current_kb": current // 1024, "peak_kb": peak // 1024}]
+        for stat in tracemalloc.take_snapshot().statistics("lineno")[:TRACEMALLOC_TOP]:
+            frame = stat.traceback[0]
+            records.append({
+                "type": "allocation",
+                "location": f"{frame.filename}:{frame.lineno}",
+                "size_kb": round(stat.size / 1024, 1),
+                "count": stat.count,
+            })
+        return records
+
+    def flush(self):
+        """溜まった span と counters、メモリの統計を JSON lines に追記し、プロファイルを保存"""
+        if not self.enabled:
+            return
+        with self._lock:
+            records = self._records
+            self._records = []
+            counters = dict(self.counters)
+            if counters == self._flushed_counters:
+                counters = {}
+            else:
+                self._flushed_counters = dict(counters)
+
+        if self.trace_memory:
+            records.extend(self._memory_records())
+        if counters:
+            records.append({"type": "counters", "ts": round(time.time(), 6), **counters})
+
+        if self.path and records:
+            with open(self.path, "a", encoding="utf-8") as f:
+                for record in records:
+                    f.write(json.dumps(record, ensure_ascii=False) + "\n")
+
+        if self._profilers:
+            self._dump_profile()
@@ -0,0 +1,315 @@
+import argparse
+import asyncio
+import hashlib
+import json
+import os
+import threading
+import time
+from urllib.parse import urlsplit
+
+import requests
+from requests.adapters import HTTPAdapter
+
+from forecast_parser import load_forecast_bundle
+from jma_endpoints import AREA_PATH, BASE_URL_ENV, FORECAST_PATH, JMA_BASE_URL, get_base_url  # noqa: F401
+
+AREA_URL = JMA_BASE_URL + AREA_PATH
+FORECAST_URL = JMA_BASE_URL + FORECAST_PATH
+
+# リトライ対象のHTTPステータス
+RETRY_STATUSES = (429, 500, 502, 503, 504)
+
+# HTTPレスポンスキャッシュの保存先
+HTTP_CACHE_DIR = "http_cache"
+
+
+class ResponseCache:
+    """ETag/Last-Modified を使った条件付きGETと、URLごとのディスクキャッシュ
+
+    get_json() は内容が更新されていれば解析済みのJSONを、304 (更新なし) なら
+    None を返す。304の場合は呼び出し側で解析・DB保存を省略できる。
+    parse に本文（bytes）またはバイナリのファイルオブジェクトを受け取る関数
+    （load_forecast_bundle など）を渡すと、json.loads の代わりにその結果を返す。
+
+    fetch() は ETag などをすぐには保存せず、保存する関数（commit）も返す。
+    DB保存が終わってから commit() を呼べば、解析や保存に失敗したときに
+    次回も304にならずに取り直せる。
+    """
+
+    def __init__(self, cache_dir=HTTP_CACHE_DIR, session=None, timeout=10.0):
+        self.cache_dir = cache_dir
+        self.session = session or requests.Session()
+        self.timeout = timeout
+        self._lock = threading.Lock()
+        self.requests = 0
+        self.not_modified = 0
+        self.bytes_downloaded = 0
+        self.bytes_saved = 0
+        os.makedirs(cache_dir, exist_ok=True)
+
+    def _paths(self, url):
+        key = hashlib.sha1(url.encode("utf-8")).hexdigest()
+        base = os.path.join(self.cache_dir, key)
+        return base + ".body", base + ".meta.json"
+
+    def _load_meta(self, url):
+        body_path, meta_path = self._paths(url)
+        if not os.path.exists(body_path):
+            return None
+        try:
+            with open(meta_path, encoding="utf-8") as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return None
+
+    def _store(self, url, response):
+        body_path, meta_path = self._paths(url)
+        meta = {
+            "url": url,
+            "etag": response.headers.get("ETag"),
+            "last_modified": response.headers.get("Last-Modified"),
+            "size": len(response.content),
+        }
+        # 書きかけのファイルを読まないよう一時ファイル経由で置き換える
+        for path, data, mode in ((body_path, response.content, "wb"),
+                                 (meta_path, json.dumps(meta, ensure_ascii=False), "w")):
+            tmp_path = f"{path}.{threading.get_ident()}.tmp"
+            with open(tmp_path, mode) as f:
+                f.write(data)
+            os.replace(tmp_path, path)
+
+    def get_json(self, url, session=None, parse=None):
+        """条件付きGETでJSONを取得（更新なしならNone）。解析できたらすぐキャッシュに保存する"""
+        result, commit = self.fetch(url, session, parse)
+        if commit is not None:
+            commit()
+        return result
+
+    def fetch(self, url, session=None, parse=None):
+        """条件付きGETで取得し (解析結果, キャッシュに保存する関数) を返す（更新なしなら (None, None)）"""
+        meta = self._load_meta(url)
+        headers = {}
+        if meta:
+            if meta.get("etag"):
+                headers["If-None-Match"] = meta["etag"]
+            if meta.get("last_modified"):
+                headers["If-Modified-Since"] = meta["last_modified"]
+
+        response = (session or self.session).get(url, headers=headers, timeout=self.timeout)
+
+        if response.status_code == 304 and meta:
+            with self._lock:
+                self.requests += 1
+                self.not_modified += 1
+                self.bytes_saved += meta["size"]
+            return None, None
+
+        response.raise_for_status()
+        with self._lock:
+            self.requests += 1
+            self.bytes_downloaded += len(response.content)
+        result = parse(response.content) if parse is not None else response.json()
+        return result, lambda: self._store(url, response)
+
+    def load_json(self, url, parse=None):
+        """キャッシュ済みの本文を解析して返す（なければNone）"""
+        body_path, _ = self._paths(url)
+        try:
+            with open(body_path, "rb") as f:
+                return parse(f) if parse is not None else json.loads(f.read())
+        except (OSError, ValueError):
+            return None
+
+    def stats(self):
+        """リクエスト数・304の数・節約したバイト数・ヒット率"""
+        with self._lock:
+            return {
+                "requests": self.requests,
+                "not_modified": self.not_modified,
+                "bytes_downloaded": self.bytes_downloaded,
+                "bytes_saved": self.bytes_saved,
+                "hit_rate": self.not_modified / self.requests if self.requests else 0.0,
+            }
+
+
+class HostRateLimiter:
+    """ホストごとにリクエスト間隔（毎秒のリクエスト数）を制限する"""
+
+    def __init__(self, rate_per_host):
+        self.min_interval = 1.0 / rate_per_host if rate_per_host else 0.0
+        self._next_allowed = {}
+        self._locks = {}
+
+    async def wait(self, host):
+        if not self.min_interval:
+            return
+        lock = self._locks.setdefault(host, asyncio.Lock())
+        async with lock:
+            delay = self._next_allowed.get(host, 0.0) - time.monotonic()
+            if delay > 0:
+                await asyncio.sleep(delay)
+            self._next_allowed[host] = time.monotonic() + self.min_interval
+
+
+class AsyncForecastFetcher:
+    """全オフィスの予報を並行取得するフェッチャ
+
+    HTTP接続は requests.Session のプールを使い回し、同時実行数・ホストごとの
+    レート・リトライ回数・タイムアウトを制限する。
+    """
+
+    def __init__(self, base_url=JMA_BASE_URL, concurrency=8, rate_per_host=10.0,
+                 retries=3, backoff=0.5, timeout=10.0, cache=None):
+        self.base_url = base_url.rstrip("/")
+        self.concurrency = concurrency
+        self.retries = retries
+        self.backoff = backoff
+        self.timeout = timeout
+        self.limiter = HostRateLimiter(rate_per_host)
+
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=4, pool_maxsize=concurrency)
+        self.session.mount("http://", adapter)
+        self.session.mount("https://", adapter)
+
+        # cache を渡すと条件付きGETになり、更新のないオフィスは保存を省略する
+        self.cache = cache
+
+    def area_url(self):
+        return self.base_url + AREA_PATH
+
+    def forecast_url(self, area_code):
+        return self.base_url + FORECAST_PATH.format(area_code)
+
+    def _get_json(self, url, parse=None):
+        if self.cache is not None:
+            return self.cache.fetch(url, session=self.session, parse=parse)
+        if parse is None:
+            response = self.session.get(url, timeout=self.timeout)
+            response.raise_for_status()
+            return response.json(), None
+        # キャッシュしない場合は本文を保存せず、レスポンスからそのまま解析する
+        with self.session.get(url, timeout=self.timeout, stream=True) as response:
+            response.raise_for_status()
+            response.raw.decode_content = True
+            return parse(response.raw), None
+
+    async def fetch_json(self, url, parse=None):
+        """URLからJSONを取得（一時的なエラーは指数バックオフでリトライ）
+
+        (解析結果, キャッシュに保存する関数) を返す。キャッシュを使わないときは関数は None。
+        """
+        host = urlsplit(url).netloc
+        for attempt in range(self.retries + 1):
+            await self.limiter.wait(host)
+            try:
+                return await asyncio.to_thread(self._get_json, url, parse)
+            except requests.HTTPError as e:
+                status = e.response.status_code if e.response is not None else None
+                if status not in RETRY_STATUSES or attempt == self.retries:
+                    raise
+            except (requests.ConnectionError, requests.Timeout):
+                if attempt == self.retries:
+                    raise
+            await asyncio.sleep(self.backoff * (2 ** attempt))
+
+    async def fetch_forecasts(self, area_codes):
+        """複数地域の予報を並行取得・解析し、(ForecastBundle, 失敗分, キャッシュに保存する関数) の辞書を返す
+
+        キャッシュ使用時、304 (更新なし) の地域はどれにも含まれない。保存する関数は
+        DBに保存し終えてから呼ぶ。
+        """
+        semaphore = asyncio.Semaphore(self.concurrency)
+
+        async def fetch_one(area_code):
+            async with semaphore:
+                return await self.fetch_json(self.forecast_url(area_code), parse=load_forecast_bundle)
+
+        codes = list(area_codes)
+        results = await asyncio.gather(*(fetch_one(code) for code in codes), return_exceptions=True)
+
+        fetched = {}
+        errors = {}
+        commits = {}
+        for code, result in zip(codes, results):
+            if isinstance(result, Exception):
+                errors[code] = result
+            elif result[0] is not None:
+                fetched[code], commit = result
+                if commit is not None:
+                    commits[code] = commit
+        return fetched, errors, commits
+
+    async def prefetch(self, area_json, store):
+        """area_json の全オフィスの予報を取得・解析し、まとめてDBに保存"""
+        return await self.prefetch_offices(area_json["offices"].keys(), store)
+
+    async def prefetch_offices(self, office_codes, store):
+        """指定したオフィスの予報を取得・解析し、全地域・全要素をまとめてDBに保存"""
+        start = time.perf_counter()
+        office_codes = list(office_codes)
+        fetched, errors, commits = await self.fetch_forecasts(office_codes)
+        not_modified = len(office_codes) - len(fetched) - len(errors)
+
+        parsed = list(fetched.items())
+        ingest = await asyncio.to_thread(store.save_forecasts, parsed)
+        # 保存できたので、次回から304で省略できるよう ETag などを記録する
+        for commit in commits.values():
+            commit()
+        return {
+            "offices": len(office_codes),
+            "fetched": len(parsed),
+            "rows": ingest["written"],
+            "duplicates": ingest["duplicates"],
+            "values": ingest["values"],
+            "not_modified": not_modified,
+            "errors": errors,
+            "elapsed": time.perf_counter() - start,
+        }
+
+    def close(self):
+        self.session.close()
+
+
+def prefetch_all_forecasts(area_json, store, **fetcher_options):
+    """全オフィスの予報を先読みしてDBに保存（同期呼び出し用）"""
+    fetcher = AsyncForecastFetcher(**fetcher_options)
+    try:
+        return asyncio.run(fetcher.prefetch(area_json, store))
+    finally:
+        fetcher.close()
+
+
+def main():
+    from weather_store import DB_NAME, WeatherStore
+
+    parser = argparse.ArgumentParser(description="全オフィスの天気予報を先読みしてDBに保存")
+    parser.add_argument("--base-url", default=get_base_url())
+    parser.add_argument("--db", default=DB_NAME)
+    parser.add_argument("--concurrency", type=int, default=8)
+    parser.add_argument("--rate", type=float, default=10.0, help="ホストごとの毎秒リクエスト数")
+    parser.add_argument("--cache-dir", default=HTTP_CACHE_DIR, help="HTTPキャッシュの保存先")
+    args = parser.parse_args()
+
+    store = WeatherStore(args.db)
+    store.init_schema()
+    area_json = store.load_area()
+    if not area_json:
+        area_json = requests.get(args.base_url.rstrip("/") + AREA_PATH, timeout=10).json()
+        store.save_area(area_json)
+
+    summary = prefetch_all_forecasts(
+        area_json, store,
+        base_url=args.base_url, concurrency=args.concurrency, rate_per_host=args.rate,
+        cache=ResponseCache(args.cache_dir),
+    )
+    print(f"{summary['fetched']}/{summary['offices']} オフィス取得 (更新なし {summary['not_modified']}), "
+          f"{summary['rows']} 行保存 (重複 {summary['duplicates']}), 全地域の値 {summary['values']} 件, "
+          f"{summary['elapsed']:.2f} 秒")
+    for code, error in summary["errors"].items():
+        print(f"  {code}: {error}")
+    store.close()
+
+
+if __name__ == "__main__":
+    main()
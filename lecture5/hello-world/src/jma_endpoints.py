@@ -0,0 +1,14 @@
+import os
+
+# 気象庁の防災情報JSONの接続先（requests を読み込まずに参照できるよう jma_client から分けている）
+JMA_BASE_URL = "https://www.jma.go.jp"
+AREA_PATH = "/bosai/common/const/area.json"
+FORECAST_PATH = "/bosai/forecast/data/forecast/{}.json"
+
+# 接続先を切り替える環境変数（例: JMA_BASE_URL=http://127.0.0.1:8000 でスタブサーバへ）
+BASE_URL_ENV = "JMA_BASE_URL"
+
+
+def get_base_url():
+    """接続先のベースURL（環境変数 JMA_BASE_URL があればそちら）"""
+    return os.environ.get(BASE_URL_ENV, JMA_BASE_URL).rstrip("/")
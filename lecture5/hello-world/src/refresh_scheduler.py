@@ -0,0 +1,161 @@
+import argparse
+import asyncio
+import threading
+from datetime import datetime, timedelta, timezone
+
+from jma_client import JMA_BASE_URL, AsyncForecastFetcher, ResponseCache, get_base_url
+
+JST = timezone(timedelta(hours=9), "JST")
+
+# 気象庁の天気予報の定時発表（日本時間）
+PUBLICATION_HOURS = (5, 11, 17)
+
+
+def next_publication(now, delay_minutes=5):
+    """now より後の、次の定時発表（+delay_minutes）の時刻を返す"""
+    now = now.astimezone(JST)
+    candidates = [
+        datetime(day.year, day.month, day.day, hour, tzinfo=JST) + timedelta(minutes=delay_minutes)
+        for day in (now.date(), now.date() + timedelta(days=1))
+        for hour in PUBLICATION_HOURS
+    ]
+    return min(candidate for candidate in candidates if candidate > now)
+
+
+def previous_publication(now, delay_minutes=5):
+    """now までに（+delay_minutes を過ぎて）出ているはずの、直近の定時発表の時刻を返す"""
+    now = now.astimezone(JST)
+    candidates = [
+        datetime(day.year, day.month, day.day, hour, tzinfo=JST)
+        for day in (now.date() - timedelta(days=1), now.date())
+        for hour in PUBLICATION_HOURS
+    ]
+    return max(candidate for candidate in candidates if candidate + timedelta(minutes=delay_minutes) <= now)
+
+
+class RefreshScheduler:
+    """定時発表に合わせて、よく見られる地域の予報を裏で取得してDBに保存する
+
+    Fletアプリ内ではスレッドとして start() し、単独のデーモンとしては
+    run_forever() を使う。取得は条件付きGETなので、更新がなければほぼ通信しない。
+    """
+
+    def __init__(self, store, area_json, cache=None, base_url=JMA_BASE_URL,
+                 top_n=20, delay_minutes=5, on_refresh=None):
+        self.store = store
+        self.area_json = area_json
+        self.cache = cache if cache is not None else ResponseCache()
+        self.base_url = base_url
+        self.top_n = top_n
+        self.delay_minutes = delay_minutes
+        self.on_refresh = on_refresh
+        self.last_summary = None
+        self._stop = threading.Event()
+        self._thread = None
+
+    def target_offices(self):
+        """更新対象：閲覧回数の多い地域（まだ記録がなければ全オフィス）"""
+        codes = [code for code in self.store.most_viewed(self.top_n) if code in self.area_json["offices"]]
+        return codes or list(self.area_json["offices"])
+
+    def is_stale(self, now=None):
+        """対象地域のどれかで、保存済みの最新の発表が直近の定時発表より古い（またはない）か"""
+        threshold = previous_publication(now or datetime.now(JST), self.delay_minutes)
+        reports = self.store.latest_reports()
+        for code in self.target_offices():
+            report_datetime = reports.get(code)
+            if report_datetime is None or datetime.fromisoformat(report_datetime) < threshold:
+                return True
+        return False
+
+    def refresh(self):
+        """対象地域の予報を今すぐ取得してDBに保存"""
+        fetcher = AsyncForecastFetcher(base_url=self.base_url, cache=self.cache)
+        try:
+            summary = asyncio.run(fetcher.prefetch_offices(self.target_offices(), self.store))
+        finally:
+            fetcher.close()
+
+        self.last_summary = summary
+        if self.on_refresh:
+            self.on_refresh(summary)
+        return summary
+
+    def run_forever(self, run_immediately=True):
+        """stop() されるまで、定時発表ごとに refresh() を繰り返す
+
+        run_immediately のときも、保存済みの予報が直近の定時発表より新しければ
+        次の定時発表まで取得しない（起動のたびに全地域を取りに行かない）。
+        """
+        if run_immediately:
+            self._safe_refresh(only_if_stale=True)
+
+        while not self._stop.is_set():
+            wait = (next_publication(datetime.now(JST), self.delay_minutes) - datetime.now(JST)).total_seconds()
+            if self._stop.wait(max(wait, 0)):
+                break
+            self._safe_refresh()
+
+    def _safe_refresh(self, only_if_stale=False):
+        try:
+            if only_if_stale and not self.is_stale():
+                return
+            self.refresh()
+        except Exception as e:
+            print(f"バックグラウンド更新エラー: {e}")
+
+    def start(self, run_immediately=True):
+        """バックグラウンドスレッドで開始"""
+        if self._thread and self._thread.is_alive():
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(
+            target=self.run_forever, args=(run_immediately,), name="refresh-scheduler", daemon=True,
+        )
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+
+
+def main():
+    import requests
+    from jma_client import AREA_PATH, HTTP_CACHE_DIR
+    from weather_store import DB_NAME, WeatherStore
+
+    parser = argparse.ArgumentParser(description="定時発表に合わせて天気予報を取得するデーモン")
+    parser.add_argument("--base-url", default=get_base_url())
+    parser.add_argument("--db", default=DB_NAME)
+    parser.add_argument("--cache-dir", default=HTTP_CACHE_DIR)
+    parser.add_argument("--top", type=int, default=20, help="更新する地域数（閲覧回数の多い順）")
+    parser.add_argument("--once", action="store_true", help="1回だけ取得して終了")
+    args = parser.parse_args()
+
+    store = WeatherStore(args.db)
+    store.init_schema()
+    area_json = store.load_area()
+    if not area_json:
+        area_json = requests.get(args.base_url.rstrip("/") + AREA_PATH, timeout=10).json()
+        store.save_area(area_json)
+
+    def report(summary):
+        print(f"[{datetime.now(JST):%Y-%m-%d %H:%M}] {summary['fetched']}/{summary['offices']} 地域取得, "
+              f"更新なし {summary['not_modified']}, {summary['rows']} 行保存")
+
+    scheduler = RefreshScheduler(
+        store, area_json, cache=ResponseCache(args.cache_dir), base_url=args.base_url,
+        top_n=args.top, on_refresh=report,
+    )
+    if args.once:
+        scheduler.refresh()
+    else:
+        print(f"次回の取得: {next_publication(datetime.now(JST)):%Y-%m-%d %H:%M} (Ctrl+Cで終了)")
+        try:
+            scheduler.run_forever()
+        except KeyboardInterrupt:
+            pass
+    store.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -1,39 +1,29 @@
 import flet as ft
-import requests
 from datetime import datetime
+from area_snapshot import load_snapshot, save_snapshot
+from jma_endpoints import AREA_PATH, FORECAST_PATH, get_base_url
+from weather_icons import get_weather_icon
 
-AREA_URL = "http://www.jma.go.jp/bosai/common/const/area.json"
-FORECAST_URL = "https://www.jma.go.jp/bosai/forecast/data/forecast/{}.json"
-
-# 天気アイコンのマッピング
-WEATHER_ICONS = {
-    "晴": "☀️",
-    "曇": "☁️",
-    "雨": "🌧️",
-    "雪": "❄️",
-    "晴時々曇": "🌤️",
-    "晴後曇": "🌤️",
-    "曇時々晴": "⛅",
-    "曇後晴": "⛅",
-    "晴時々雨": "🌦️",
-    "曇時々雨": "🌧️",
-    "雨時々曇": "🌧️",
-}
-
-
-def get_weather_icon(weather_text):
-    """天気テキストから適切なアイコンを取得"""
-    for key, icon in WEATHER_ICONS.items():
-        if key in weather_text:
-            return icon
-    return "☀️"
+# 接続先（環境変数 JMA_BASE_URL でローカルのスタブサーバなどに切り替えられる）
+BASE_URL = get_base_url()
+AREA_URL = BASE_URL + AREA_PATH
+FORECAST_URL = BASE_URL + FORECAST_PATH
 
 
 def fetch_area():
-    return requests.get(AREA_URL).json()
+    """エリア情報を取得（スナップショットがあればダウンロードしない）"""
+    area_json = load_snapshot()
+    if area_json is None:
+        import requests  # 起動を速くするため、ダウンロードが必要になったときに読み込む
+
+        area_json = requests.get(AREA_URL).json()
+        save_snapshot(area_json)
+    return area_json
 
 
 def fetch_forecast(area_code):
+    import requests
+
     url = FORECAST_URL.format(area_code)
     return requests.get(url).json()
 
@@ -43,6 +33,8 @@ def parse_forecast(data):
     ts = data[0]["timeSeries"][0]
     dates = ts["timeDefines"]
     weathers = ts["areas"][0]["weathers"]
+    # 天気コード（アイコンの判定に使う）
+    weather_codes = ts["areas"][0].get("weatherCodes", [])
     
     # 気温データを取得（存在する場合）
     temps_min = []
@@ -63,10 +55,10 @@ def parse_forecast(data):
     # 発表時刻を取得
     report_datetime = data[0].get("reportDatetime", "")
     
-    return list(zip(dates, weathers)), temps_min, temps_max, report_datetime
+    return list(zip(dates, weathers)), temps_min, temps_max, report_datetime, weather_codes
 
 
-def create_forecast_card(date_str, weather, temp_min=None, temp_max=None):
+def create_forecast_card(date_str, weather, temp_min=None, temp_max=None, weather_code=None):
     """天気予報カードを作成"""
     try:
         date = datetime.fromisoformat(date_str.replace("Z", "+0000"))
@@ -75,7 +67,7 @@ def create_forecast_card(date_str, weather, temp_min=None, temp_max=None):
     except:
         date_display = date_str[:10]
     
-    icon = get_weather_icon(weather)
+    icon = get_weather_icon(weather, weather_code)
     
     # 気温表示
     temp_row = ft.Row(
@@ -172,7 +164,7 @@ def main(page: ft.Page):
             page.update()
             
             forecast_json = fetch_forecast(area_code)
-            forecast_list, temps_min, temps_max, report_datetime = parse_forecast(forecast_json)
+            forecast_list, temps_min, temps_max, report_datetime, weather_codes = parse_forecast(forecast_json)
 
             selected_area_text.value = f"📍 {area_name}"
             
@@ -188,8 +180,9 @@ def main(page: ft.Page):
             for i, (date_str, weather) in enumerate(forecast_list):
                 temp_min = temps_min[i] if i < len(temps_min) else None
                 temp_max = temps_max[i] if i < len(temps_max) else None
+                weather_code = weather_codes[i] if i < len(weather_codes) else None
                 
-                card = create_forecast_card(date_str, weather, temp_min, temp_max)
+                card = create_forecast_card(date_str, weather, temp_min, temp_max, weather_code)
                 forecast_cards.controls.append(card)
 
             page.update()
@@ -325,4 +318,5 @@ def main(page: ft.Page):
     )
 
 
-ft.app(target=main)
\ No newline at end of file
+if __name__ == "__main__":
+    ft.app(target=main)
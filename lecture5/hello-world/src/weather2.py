@@ -1,338 +1,247 @@
 import flet as ft
-import requests
+import threading
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime
-import sqlite3
+from area_sidebar import AreaSidebar, count_controls
+from area_snapshot import load_snapshot, save_snapshot
+from forecast_cards import ForecastCardPool
+from instrumentation import Instrumentation
+from jma_endpoints import AREA_PATH, FORECAST_PATH, get_base_url
 
-AREA_URL = "https://www.jma.go.jp/bosai/common/const/area.json"
-FORECAST_URL = "https://www.jma.go.jp/bosai/forecast/data/forecast/{}.json"
-DB_NAME = "weather_forecast.db"
+# requests / sqlite3 を使うモジュール（jma_client・weather_store・refresh_scheduler・forecast_parser）は
+# 初回描画を遅らせないよう、最初に使う関数の中で読み込む
 
-# 天気アイコンのマッピング
-WEATHER_ICONS = {
-    "晴": "☀️", "曇": "☁️", "雨": "🌧️", "雪": "❄️",
-    "晴時々曇": "🌤️", "晴後曇": "🌤️", "曇時々晴": "⛅",
-    "曇後晴": "⛅", "晴時々雨": "🌦️", "曇時々雨": "🌧️",
-    "雨時々曇": "🌧️",
-}
+# 接続先（環境変数 JMA_BASE_URL でローカルのスタブサーバなどに切り替えられる）
+BASE_URL = get_base_url()
+AREA_URL = BASE_URL + AREA_PATH
+FORECAST_URL = BASE_URL + FORECAST_PATH
+
+# 処理時間の計測（WEATHER_TRACE=trace.jsonl などで有効、無効ならほぼコストなし）
+instrumentation = Instrumentation.from_env()
+
+_response_cache = None
+_response_cache_lock = threading.Lock()
+
+
+def get_response_cache():
+    """条件付きGET用のHTTPレスポンスキャッシュ（jma_client と requests は初回の利用時に読み込む）"""
+    global _response_cache
+    if _response_cache is None:
+        with _response_cache_lock:
+            if _response_cache is None:
+                from jma_client import ResponseCache
+                _response_cache = ResponseCache()
+    return _response_cache
+
+
+def get_store():
+    """共有のストア（weather_store と sqlite3 は初回の利用時に読み込む）"""
+    from weather_store import get_store as get_shared_store
+    return get_shared_store()
 
 
 def init_database():
     """データベースを初期化"""
-    conn = sqlite3.connect(DB_NAME)
-    cursor = conn.cursor()
-    
-    # 地域センター情報テーブル
-    cursor.execute("""
-        CREATE TABLE IF NOT EXISTS centers (
-            center_code TEXT PRIMARY KEY,
-            center_name TEXT NOT NULL,
-            created_at TEXT NOT NULL
-        )
-    """)
-    
-    # 地域オフィス情報テーブル
-    cursor.execute("""
-        CREATE TABLE IF NOT EXISTS offices (
-            office_code TEXT PRIMARY KEY,
-            office_name TEXT NOT NULL,
-            center_code TEXT NOT NULL,
-            created_at TEXT NOT NULL,
-            FOREIGN KEY (center_code) REFERENCES centers(center_code)
-        )
-    """)
-    
-    # 天気予報テーブル（正規化）
-    cursor.execute("""
-        CREATE TABLE IF NOT EXISTS forecasts (
-            id INTEGER PRIMARY KEY AUTOINCREMENT,
-            office_code TEXT NOT NULL,
-            forecast_date TEXT NOT NULL,
-            weather TEXT NOT NULL,
-            temp_min TEXT,
-            temp_max TEXT,
-            report_datetime TEXT NOT NULL,
-            fetched_at TEXT NOT NULL,
-            FOREIGN KEY (office_code) REFERENCES offices(office_code),
-            UNIQUE(office_code, forecast_date, report_datetime)
-        )
-    """)
-    
-    # インデックス作成（検索高速化）
-    cursor.execute("""
-        CREATE INDEX IF NOT EXISTS idx_forecasts_office 
-        ON forecasts(office_code, report_datetime DESC)
-    """)
-    
-    conn.commit()
-    conn.close()
+    get_store().init_schema()
 
 
 def save_area_to_db(area_json):
     """エリア情報をDBに保存"""
-    conn = sqlite3.connect(DB_NAME)
-    cursor = conn.cursor()
-    created_at = datetime.now().isoformat()
-    
-    # センター情報を保存
-    for center_code, center_data in area_json["centers"].items():
-        try:
-            cursor.execute("""
-                INSERT OR REPLACE INTO centers (center_code, center_name, created_at)
-                VALUES (?, ?, ?)
-            """, (center_code, center_data["name"], created_at))
-        except Exception as e:
-            print(f"Center保存エラー: {e}")
-    
-    # オフィス情報を保存
-    for office_code, office_data in area_json["offices"].items():
-        # このオフィスが属するセンターを見つける
-        parent_center = None
-        for center_code, center_data in area_json["centers"].items():
-            if office_code in center_data.get("children", []):
-                parent_center = center_code
-                break
-        
-        if parent_center:
-            try:
-                cursor.execute("""
-                    INSERT OR REPLACE INTO offices (office_code, office_name, center_code, created_at)
-                    VALUES (?, ?, ?, ?)
-                """, (office_code, office_data["name"], parent_center, created_at))
-            except Exception as e:
-                print(f"Office保存エラー: {e}")
-    
-    conn.commit()
-    conn.close()
+    get_store().save_area(area_json)
 
 
 def load_area_from_db():
     """DBからエリア情報を取得"""
-    conn = sqlite3.connect(DB_NAME)
-    cursor = conn.cursor()
-    
-    # センター情報取得
-    cursor.execute("SELECT center_code, center_name FROM centers")
-    centers = {row[0]: {"name": row[1], "children": []} for row in cursor.fetchall()}
-    
-    # オフィス情報取得
-    cursor.execute("SELECT office_code, office_name, center_code FROM offices")
-    offices = {}
-    for row in cursor.fetchall():
-        office_code, office_name, center_code = row
-        offices[office_code] = {"name": office_name}
-        if center_code in centers:
-            centers[center_code]["children"].append(office_code)
-    
-    conn.close()
-    
-    return {"centers": centers, "offices": offices} if centers else None
+    return get_store().load_area()
 
 
-def save_forecast_to_db(area_code, forecast_list, temps_min, temps_max, report_datetime):
+def save_forecast_to_db(area_code, report):
     """天気予報データをデータベースに保存"""
-    conn = sqlite3.connect(DB_NAME)
-    cursor = conn.cursor()
-    fetched_at = datetime.now().isoformat()
-    
-    for i, (date_str, weather) in enumerate(forecast_list):
-        temp_min = temps_min[i] if i < len(temps_min) else None
-        temp_max = temps_max[i] if i < len(temps_max) else None
-        
-        try:
-            cursor.execute("""
-                INSERT OR REPLACE INTO forecasts 
-                (office_code, forecast_date, weather, temp_min, temp_max, report_datetime, fetched_at)
-                VALUES (?, ?, ?, ?, ?, ?, ?)
-            """, (area_code, date_str, weather, temp_min, temp_max, report_datetime, fetched_at))
-        except Exception as e:
-            print(f"DB保存エラー: {e}")
-    
-    conn.commit()
-    conn.close()
+    with instrumentation.span("save_forecast_to_db", area_code=area_code) as span:
+        result = get_store().save_forecast(area_code, report)
+        span.set(rows=result["written"], values=result["values"])
 
 
 def load_forecast_from_db(area_code, report_datetime=None):
     """データベースから天気予報データを取得"""
-    conn = sqlite3.connect(DB_NAME)
-    cursor = conn.cursor()
-    
-    if report_datetime:
-        # 特定の発表時刻のデータを取得
-        cursor.execute("""
-            SELECT forecast_date, weather, temp_min, temp_max, report_datetime
-            FROM forecasts
-            WHERE office_code = ? AND report_datetime = ?
-            ORDER BY forecast_date ASC
-        """, (area_code, report_datetime))
-    else:
-        # 最新のデータを取得
-        cursor.execute("""
-            SELECT forecast_date, weather, temp_min, temp_max, report_datetime
-            FROM forecasts
-            WHERE office_code = ? AND report_datetime = (
-                SELECT report_datetime FROM forecasts 
-                WHERE office_code = ? 
-                ORDER BY report_datetime DESC LIMIT 1
-            )
-            ORDER BY forecast_date ASC
-        """, (area_code, area_code))
-    
-    rows = cursor.fetchall()
-    conn.close()
-    
-    if not rows:
-        return None, None, None, None
-    
-    forecast_list = [(row[0], row[1]) for row in rows]
-    temps_min = [row[2] for row in rows]
-    temps_max = [row[3] for row in rows]
-    report_datetime = rows[0][4] if rows else None
-    
-    return forecast_list, temps_min, temps_max, report_datetime
+    with instrumentation.span("load_forecast_from_db", area_code=area_code):
+        return get_store().load_forecast(area_code, report_datetime)
 
 
-def get_forecast_history(area_code):
-    """特定地域の過去の予報発表時刻一覧を取得"""
-    conn = sqlite3.connect(DB_NAME)
-    cursor = conn.cursor()
-    
-    cursor.execute("""
-        SELECT DISTINCT report_datetime, fetched_at
-        FROM forecasts
-        WHERE office_code = ?
-        ORDER BY report_datetime DESC
-    """, (area_code,))
-    
-    rows = cursor.fetchall()
-    conn.close()
-    
-    return rows
+def record_view(area_code):
+    """地域の閲覧回数を記録（バックグラウンド更新の優先度に使う）"""
+    try:
+        get_store().record_view(area_code)
+    except Exception as ex:
+        # 記録できなくても表示には影響しない
+        print(f"閲覧回数の記録に失敗: {ex}")
 
 
-def get_weather_icon(weather_text):
-    """天気テキストから適切なアイコンを取得"""
-    for key, icon in WEATHER_ICONS.items():
-        if key in weather_text:
-            return icon
-    return "☀️"
+def get_forecast_history(area_code):
+    """特定地域の過去の予報発表時刻一覧を取得"""
+    with instrumentation.span("get_forecast_history", area_code=area_code):
+        return get_store().get_history(area_code)
 
 
 def fetch_area():
     """エリア情報を取得（DBにキャッシュ）"""
     # まずDBから取得を試みる
+    # class10s 以下が未保存の古いDBはAPIから取り直す
     area_data = load_area_from_db()
-    if area_data:
+    if area_data and area_data["class10s"]:
         return area_data, "DB"
     
-    # DBになければAPIから取得してDBに保存
-    area_data = requests.get(AREA_URL).json()
+    # DBになければAPIから取得してDBに保存（304ならキャッシュ済みの本文を使う）
+    response_cache = get_response_cache()
+    area_data = response_cache.get_json(AREA_URL) or response_cache.load_json(AREA_URL)
     save_area_to_db(area_data)
     return area_data, "API"
 
 
-def fetch_forecast(area_code):
-    url = FORECAST_URL.format(area_code)
-    return requests.get(url).json()
+def parse_forecast(source):
+    """予報JSONの本文を ForecastBundle に解析"""
+    from forecast_parser import load_forecast_bundle
 
+    with instrumentation.span("parse_forecast"):
+        return load_forecast_bundle(source)
 
-def parse_forecast(data):
-    """天気予報データを解析"""
-    ts = data[0]["timeSeries"][0]
-    dates = ts["timeDefines"]
-    weathers = ts["areas"][0]["weathers"]
-    
-    temps_min = []
-    temps_max = []
-    
-    try:
-        if len(data[0]["timeSeries"]) > 2:
-            temp_ts = data[0]["timeSeries"][2]
-            if "areas" in temp_ts and len(temp_ts["areas"]) > 0:
-                temp_data = temp_ts["areas"][0]
-                if "tempsMin" in temp_data:
-                    temps_min = temp_data["tempsMin"]
-                if "tempsMax" in temp_data:
-                    temps_max = temp_data["tempsMax"]
-    except:
-        pass
-    
-    report_datetime = data[0].get("reportDatetime", "")
-    
-    return list(zip(dates, weathers)), temps_min, temps_max, report_datetime
 
+def fetch_forecast(area_code):
+    """予報を条件付きGETで取得し (ForecastBundle, キャッシュに保存する関数) を返す
 
-def create_forecast_card(date_str, weather, temp_min=None, temp_max=None):
-    """天気予報カードを作成"""
-    try:
-        date = datetime.fromisoformat(date_str.replace("Z", "+0000"))
-        weekdays = ["月", "火", "水", "木", "金", "土", "日"]
-        date_display = f"{date.month}/{date.day}({weekdays[date.weekday()]})"
-    except:
-        date_display = date_str[:10]
-    
-    icon = get_weather_icon(weather)
-    
-    temp_row = ft.Row(
-        [
-            ft.Text(
-                f"{temp_min}°" if temp_min and temp_min != "" else "--",
-                size=14,
-                color="#81D4FA",
-                weight=ft.FontWeight.BOLD,
-            ),
-            ft.Text("/", size=14, color="#B0BEC5"),
-            ft.Text(
-                f"{temp_max}°" if temp_max and temp_max != "" else "--",
-                size=14,
-                color="#EF5350",
-                weight=ft.FontWeight.BOLD,
-            ),
-        ],
-        alignment=ft.MainAxisAlignment.CENTER,
-        spacing=5,
-    )
-    
-    return ft.Container(
-        content=ft.Column(
-            [
-                ft.Text(date_display, size=14, weight=ft.FontWeight.BOLD, color="white"),
-                ft.Container(height=5),
-                ft.Text(icon, size=48),
-                ft.Container(height=5),
-                ft.Text(weather, size=11, text_align=ft.TextAlign.CENTER, color="#B0BEC5", max_lines=2),
-                ft.Container(height=5),
-                temp_row,
-            ],
-            horizontal_alignment=ft.CrossAxisAlignment.CENTER,
-            alignment=ft.MainAxisAlignment.CENTER,
-        ),
-        width=140,
-        height=200,
-        bgcolor="#4DFFFFFF",
-        border_radius=10,
-        padding=12,
-        border=ft.border.all(1, "#33FFFFFF"),
-    )
+    気象庁側に更新がなければ (None, None)。保存する関数はDBに保存し終えてから呼ぶ。
+    """
+    url = FORECAST_URL.format(area_code)
+    with instrumentation.span("fetch_forecast", area_code=area_code) as span:
+        result, commit = get_response_cache().fetch(url, parse=parse_forecast)
+        span.set(not_modified=result is None)
+        return result, commit
+
+
+def load_cached_forecast(area_code):
+    """HTTPキャッシュに残っている予報を ForecastBundle に解析して取得"""
+    return get_response_cache().load_json(FORECAST_URL.format(area_code), parse=parse_forecast)
+
+
+def resolve_forecast(area_code, force_update=False, specific_datetime=None):
+    """表示する予報をDBまたはAPIから取得
+
+    (ForecastReport, 取得元の説明) を返す。
+    """
+    report = None
+    source = ""
+
+    # 特定の日時が指定されている場合
+    if specific_datetime:
+        report = load_forecast_from_db(area_code, specific_datetime)
+        if report:
+            source = "データベースから過去予報を取得"
+            instrumentation.count("source.db_history")
+
+    # 強制更新でない場合はDBから最新を取得
+    elif not force_update:
+        report = load_forecast_from_db(area_code)
+        if report:
+            source = "データベースから最新予報を取得"
+            instrumentation.count("source.db_latest")
+
+    # DBにデータがないか、強制更新の場合はAPIから取得
+    if not report:
+        fetched, commit = fetch_forecast(area_code)
+
+        if fetched is None:
+            # 304: 気象庁側に更新がないので解析・保存せずDBの最新を表示
+            report = load_forecast_from_db(area_code)
+            if report:
+                instrumentation.count("source.api_not_modified")
+                stats = get_response_cache().stats()
+                source = (
+                    f"気象庁API: 更新なし（DBの最新予報を表示, "
+                    f"節約 {stats['bytes_saved'] / 1024:.1f}KB, ヒット率 {stats['hit_rate']:.0%}）"
+                )
+            else:
+                fetched = load_cached_forecast(area_code)
+
+        if fetched is not None:
+            report = fetched.report
+
+            # 全地域・全要素をデータベースに保存
+            save_forecast_to_db(area_code, fetched)
+            # 保存できてから ETag などを記録する（途中で失敗したら次回も取り直す）
+            if commit is not None:
+                commit()
+            source = "気象庁APIから取得（DBに保存済み）"
+            instrumentation.count("source.api")
+
+    return report, source
+
+
+class LatencyTracker:
+    """クリックから表示までの時間を記録し、中央値などを出す"""
+
+    def __init__(self, maxlen=200):
+        self.maxlen = maxlen
+        self.samples = {}
+        self._lock = threading.Lock()
+
+    def record(self, name, seconds):
+        with self._lock:
+            self.samples.setdefault(name, deque(maxlen=self.maxlen)).append(seconds)
+
+    def percentile(self, name, p):
+        with self._lock:
+            values = sorted(self.samples.get(name, ()))
+        if not values:
+            return None
+        return values[min(len(values) - 1, int(len(values) * p / 100))]
+
+    def summary(self):
+        parts = []
+        for name in list(self.samples):
+            parts.append(
+                f"{name}: p50={self.percentile(name, 50) * 1000:.0f}ms "
+                f"p95={self.percentile(name, 95) * 1000:.0f}ms (n={len(self.samples[name])})"
+            )
+        return "UIレイテンシ " + ", ".join(parts)
+
+
+# 地域クリックからカード表示までの時間
+ui_latency = LatencyTracker()
 
 
 def main(page: ft.Page):
+    startup_started = time.perf_counter()
     page.title = "天気予報アプリ（改良版）"
     page.window_width = 1200
     page.window_height = 600
     page.bgcolor = "#263238"
     page.padding = 0
 
-    # データベース初期化
-    init_database()
+    instrumentation.start()
 
     selected_area_text = ft.Text("地域を選択してください", size=20, weight=ft.FontWeight.BOLD, color="white")
     update_time_text = ft.Text("", size=12, color="#B0BEC5", italic=True)
     data_source_text = ft.Text("", size=11, color="#FFD700", italic=True)
     
-    forecast_cards = ft.Row(wrap=True, spacing=15, run_spacing=15, scroll=ft.ScrollMode.AUTO)
+    # カードは使い回し、値を差し替えた部分だけを送信する
+    card_pool = ForecastCardPool()
+    forecast_cards = card_pool.row
+
+    def push(changed):
+        """変更のあったコントロールだけを更新（空のときに page.update() で全体を送らない）"""
+        if changed:
+            with instrumentation.span("page.update", controls=len(changed)):
+                page.update(*changed)
     
     current_area_code = [None]
     current_area_name = [""]
+
+    # 読み込みはワーカースレッドで行い、新しいクリックが来たら古い読み込みの結果は捨てる
+    executor = ThreadPoolExecutor(max_workers=2, thread_name_prefix="forecast")
+    load_lock = threading.Lock()
+    load_token = [0]
     
     # 履歴選択ドロップダウン
     history_dropdown = ft.Dropdown(
@@ -342,43 +251,62 @@ def main(page: ft.Page):
         visible=False,
     )
 
+    def is_current(token):
+        """token の読み込みが最新か（別の地域がクリックされていればキャンセル扱い）"""
+        with load_lock:
+            return token == load_token[0]
+
     def load_forecast(area_code, area_name, force_update=False, specific_datetime=None):
-        """天気予報を読み込み（完全DB対応）"""
+        """天気予報の読み込みをワーカースレッドで開始（イベントハンドラはすぐ戻る）"""
+        started = time.perf_counter()
+        with load_lock:
+            load_token[0] += 1
+            token = load_token[0]
+
+        selected_area_text.value = f" {area_name} - 読み込み中..."
+        update_time_text.value = ""
+        data_source_text.value = ""
+        push([selected_area_text, update_time_text, data_source_text] + card_pool.hide_all())
+
+        executor.submit(render_forecast, token, started, area_code, area_name, force_update, specific_datetime)
+
+    def render_forecast(token, started, area_code, area_name, force_update, specific_datetime):
+        """DB/APIから取得し、カードを1枚ずつ追加して表示"""
         try:
-            selected_area_text.value = f" {area_name} - 読み込み中..."
-            update_time_text.value = ""
-            data_source_text.value = ""
-            forecast_cards.controls.clear()
-            page.update()
-            
-            forecast_list = None
-            temps_min = None
-            temps_max = None
-            report_datetime = None
-            
-            # 特定の日時が指定されている場合
-            if specific_datetime:
-                forecast_list, temps_min, temps_max, report_datetime = load_forecast_from_db(area_code, specific_datetime)
-                if forecast_list:
-                    data_source_text.value = "データベースから過去予報を取得"
-            
-            # 強制更新でない場合はDBから最新を取得
-            elif not force_update:
-                forecast_list, temps_min, temps_max, report_datetime = load_forecast_from_db(area_code)
-                if forecast_list:
-                    data_source_text.value = "データベースから最新予報を取得"
-            
-            # DBにデータがないか、強制更新の場合はAPIから取得
-            if not forecast_list:
-                forecast_json = fetch_forecast(area_code)
-                forecast_list, temps_min, temps_max, report_datetime = parse_forecast(forecast_json)
-                
-                # データベースに保存
-                save_forecast_to_db(area_code, forecast_list, temps_min, temps_max, report_datetime)
-                data_source_text.value = "気象庁APIから取得（DBに保存済み）"
-            
-            # 過去予報履歴を更新
+            # 待っている間に別の地域が選ばれていたら、取得・保存もせずに捨てる
+            if not is_current(token):
+                return
+            report, source = resolve_forecast(area_code, force_update, specific_datetime)
+            if not is_current(token):
+                return
+
+            selected_area_text.value = f" {area_name}"
+            data_source_text.value = source
+
+            if report and report.report_datetime:
+                try:
+                    dt = datetime.fromisoformat(report.report_datetime.replace("Z", "+00:00"))
+                    update_time_text.value = f"発表: {dt.strftime('%Y年%m月%d日 %H:%M')}"
+                except:
+                    update_time_text.value = f"発表: {report.report_datetime}"
+
+            push([selected_area_text, update_time_text, data_source_text])
+
+            records = report.records if report else []
+            for i, record in enumerate(records):
+                if not is_current(token):
+                    return
+
+                push(card_pool.show(i, record.forecast_date, record.weather, record.temp_min, record.temp_max,
+                                    record.weather_code))
+                if i == 0:
+                    ui_latency.record("first_card", time.perf_counter() - started)
+            push(card_pool.hide_from(len(records)))
+
+            # 過去予報履歴を更新（カード表示の後に回す）
             history_list = get_forecast_history(area_code)
+            if not is_current(token):
+                return
             if history_list:
                 history_dropdown.visible = True
                 history_dropdown.options = [
@@ -388,40 +316,26 @@ def main(page: ft.Page):
                     )
                     for dt, _ in history_list
                 ]
-                history_dropdown.value = specific_datetime if specific_datetime else (history_list[0][0] if history_list else None)
+                history_dropdown.value = specific_datetime if specific_datetime else history_list[0][0]
             else:
                 history_dropdown.visible = False
+            push([history_dropdown])
 
-            selected_area_text.value = f" {area_name}"
-            
-            if report_datetime:
-                try:
-                    dt = datetime.fromisoformat(report_datetime.replace("Z", "+00:00"))
-                    update_time_text.value = f"発表: {dt.strftime('%Y年%m月%d日 %H:%M')}"
-                except:
-                    update_time_text.value = f"発表: {report_datetime}"
-            
-            forecast_cards.controls.clear()
-
-            for i, (date_str, weather) in enumerate(forecast_list):
-                temp_min = temps_min[i] if i < len(temps_min) else None
-                temp_max = temps_max[i] if i < len(temps_max) else None
-                
-                card = create_forecast_card(date_str, weather, temp_min, temp_max)
-                forecast_cards.controls.append(card)
-
-            page.update()
+            ui_latency.record("complete", time.perf_counter() - started)
         except Exception as ex:
+            instrumentation.count("load_forecast.error")
+            if not is_current(token):
+                return
             selected_area_text.value = f"エラー: {str(ex)}"
             update_time_text.value = ""
             data_source_text.value = ""
-            page.update()
+            push([selected_area_text, update_time_text, data_source_text])
 
-    def on_area_click(e):
-        area_code = e.control.data
-        area_name = e.control.title.value
+    def on_area_select(area_code, area_name):
         current_area_code[0] = area_code
         current_area_name[0] = area_name
+        # 閲覧回数の書き込みはバックグラウンド更新の保存と待ち合うことがあるので、ワーカースレッドで行う
+        executor.submit(record_view, area_code)
         load_forecast(area_code, area_name, force_update=False)
 
     def on_refresh_click(e):
@@ -436,56 +350,50 @@ def main(page: ft.Page):
 
     history_dropdown.on_change = on_history_change
 
-    # エリア情報を取得（DBから優先）
-    area_json, area_source = fetch_area()
-    print(f"エリア情報: {area_source}から取得")
-
-    tiles = []
-    for center in area_json["centers"].values():
-        children = []
-        for code in center["children"]:
-            if code in area_json["offices"]:
-                office = area_json["offices"][code]
-                children.append(
-                    ft.ListTile(
-                        title=ft.Text(office["name"], color="white"),
-                        data=code,
-                        on_click=on_area_click,
-                        hover_color="#1AFFFFFF",
-                    )
-                )
+    # 地域の一覧は初回描画の後にワーカースレッドで読み込む（オフィスの行はセンターを開いたときに作る）
+    sidebar = AreaSidebar(on_area_select)
+    scheduler = [None]
 
-        if children:
-            tiles.append(
-                ft.ExpansionTile(
-                    title=ft.Text(center["name"], color="white", weight=ft.FontWeight.BOLD),
-                    controls=children,
-                    text_color="white",
-                    collapsed_text_color="#B0BEC5",
-                    bgcolor="transparent",
-                )
-            )
+    def load_areas():
+        """地域一覧を表示し（スナップショット → DB → API の順）、DB初期化と先読みを開始"""
+        try:
+            # スキーマが最新なら user_version を読むだけで DDL は実行しない
+            init_database()
+            area_json = load_snapshot()
+            area_source = "スナップショット"
+            if area_json is None:
+                area_json, area_source = fetch_area()
+                save_snapshot(area_json)
+            print(f"エリア情報: {area_source}から取得")
+            push(sidebar.set_areas(area_json))
+            print(f"起動: 地域一覧の表示まで {(time.perf_counter() - startup_started) * 1000:.0f}ms, "
+                  f"サイドバーのコントロール {sidebar.control_count()} 個 ({len(sidebar.index)} 地域)")
+        except Exception as ex:
+            sidebar.status_text.value = f"エラー: {str(ex)}"
+            push([sidebar.status_text])
+            return
+
+        from refresh_scheduler import RefreshScheduler
+
+        # 定時発表に合わせて、よく見る地域の予報を裏で取得しておく
+        scheduler[0] = RefreshScheduler(
+            get_store(), area_json, cache=get_response_cache(), base_url=BASE_URL,
+            on_refresh=lambda summary: print(
+                f"バックグラウンド更新: {summary['fetched']}/{summary['offices']} 地域取得, "
+                f"更新なし {summary['not_modified']}"
+            ),
+        )
+        scheduler[0].start()
 
-    sidebar = ft.Container(
-        content=ft.Column(
-            [
-                ft.Container(
-                    content=ft.Row([
-                        ft.Text("地域選択", size=18, weight=ft.FontWeight.BOLD, color="white"),
-                    ]),
-                    padding=15,
-                    bgcolor="#37474F",
-                ),
-                ft.Container(
-                    content=ft.Column(tiles, scroll=ft.ScrollMode.AUTO),
-                    expand=True,
-                    padding=5,
-                ),
-            ],
-        ),
-        width=300,
-        bgcolor="#455A64",
-    )
+    def on_disconnect(e):
+        if ui_latency.samples:
+            print(ui_latency.summary())
+        if scheduler[0]:
+            scheduler[0].stop()
+        executor.shutdown(wait=False, cancel_futures=True)
+        instrumentation.flush()
+
+    page.on_disconnect = on_disconnect
 
     main_content = ft.Container(
         content=ft.Column(
@@ -521,6 +429,11 @@ def main(page: ft.Page):
     )
 
     page.add(ft.Row([sidebar, main_content], expand=True, spacing=0))
+    print(f"起動: 初回描画まで {(time.perf_counter() - startup_started) * 1000:.0f}ms, "
+          f"コントロール {count_controls(page)} 個")
+
+    executor.submit(load_areas)
 
 
-ft.app(target=main)
\ No newline at end of file
+if __name__ == "__main__":
+    ft.app(target=main)
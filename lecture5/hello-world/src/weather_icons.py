@@ -0,0 +1,121 @@
+import re
+from functools import lru_cache
+
+# 気象庁の天気コード（予報JSONの weatherCodes）と天気の短い表記
+WEATHER_CODES = {
+    "100": "晴", "101": "晴時々曇", "102": "晴一時雨", "103": "晴時々雨", "104": "晴一時雪",
+    "105": "晴時々雪", "106": "晴一時雨か雪", "107": "晴時々雨か雪", "108": "晴一時雨か雷雨",
+    "110": "晴後時々曇", "111": "晴後曇", "112": "晴後一時雨", "113": "晴後時々雨", "114": "晴後雨",
+    "115": "晴後一時雪", "116": "晴後時々雪", "117": "晴後雪", "118": "晴後雨か雪", "119": "晴後雨か雷雨",
+    "120": "晴朝夕一時雨", "121": "晴朝の内一時雨", "122": "晴夕方一時雨", "123": "晴山沿い雷雨",
+    "124": "晴山沿い雪", "125": "晴午後は雷雨", "126": "晴昼頃から雨", "127": "晴夕方から雨",
+    "128": "晴夜は雨", "130": "朝の内霧後晴", "131": "晴明け方霧", "132": "晴朝夕曇",
+    "140": "晴時々雨で雷を伴う", "160": "晴一時雪か雨", "170": "晴時々雪か雨", "181": "晴後雪か雨",
+    "200": "曇", "201": "曇時々晴", "202": "曇一時雨", "203": "曇時々雨", "204": "曇一時雪",
+    "205": "曇時々雪", "206": "曇一時雨か雪", "207": "曇時々雨か雪", "208": "曇一時雨か雷雨",
+    "209": "霧", "210": "曇後時々晴", "211": "曇後晴", "212": "曇後一時雨", "213": "曇後時々雨",
+    "214": "曇後雨", "215": "曇後一時雪", "216": "曇後時々雪", "217": "曇後雪", "218": "曇後雨か雪",
+    "219": "曇後雨か雷雨", "220": "曇朝夕一時雨", "221": "曇朝の内一時雨", "222": "曇夕方一時雨",
+    "223": "曇日中時々晴", "224": "曇昼頃から雨", "225": "曇夕方から雨", "226": "曇夜は雨",
+    "228": "曇昼頃から雪", "229": "曇夕方から雪", "230": "曇夜は雪", "231": "曇海上海岸は霧か霧雨",
+    "240": "曇時々雨で雷を伴う", "250": "曇時々雪で雷を伴う", "260": "曇一時雪か雨",
+    "270": "曇時々雪か雨", "281": "曇後雪か雨",
+    "300": "雨", "301": "雨時々晴", "302": "雨時々止む", "303": "雨時々雪", "304": "雨か雪",
+    "306": "大雨", "308": "雨で暴風を伴う", "309": "雨一時雪", "311": "雨後晴", "313": "雨後曇",
+    "314": "雨後時々雪", "315": "雨後雪", "316": "雨か雪後晴", "317": "雨か雪後曇",
+    "320": "朝の内雨後晴", "321": "朝の内雨後曇", "322": "雨朝晩一時雪", "323": "雨昼頃から晴",
+    "324": "雨夕方から晴", "325": "雨夜は晴", "326": "雨夕方から雪", "327": "雨夜は雪",
+    "328": "雨一時強く降る", "329": "雨一時みぞれ", "340": "雪か雨", "350": "雨で雷を伴う",
+    "361": "雪か雨後晴", "371": "雪か雨後曇",
+    "400": "雪", "401": "雪時々晴", "402": "雪時々止む", "403": "雪時々雨", "405": "大雪",
+    "406": "風雪強い", "407": "暴風雪", "409": "雪一時雨", "411": "雪後晴", "413": "雪後曇",
+    "414": "雪後雨", "420": "朝の内雪後晴", "421": "朝の内雪後曇", "422": "雪昼頃から雨",
+    "423": "雪夕方から雨", "425": "雪一時強く降る", "426": "雪後みぞれ", "427": "雪一時みぞれ",
+    "450": "雪で雷を伴う",
+}
+
+# 天気の表記 → アイコン（長い＝より具体的な表記が優先される）
+WEATHER_ICONS = {
+    "晴": "☀️", "曇": "☁️", "雨": "🌧️", "雪": "❄️", "霧": "🌫️", "みぞれ": "🌨️",
+    "晴時々曇": "🌤️", "晴一時曇": "🌤️", "晴後曇": "🌤️", "晴後時々曇": "🌤️",
+    "曇時々晴": "⛅", "曇一時晴": "⛅", "曇後晴": "⛅", "曇後時々晴": "⛅",
+    "晴時々雨": "🌦️", "晴一時雨": "🌦️", "晴後雨": "🌦️", "晴後一時雨": "🌦️", "晴後時々雨": "🌦️",
+    "雨時々晴": "🌦️", "雨後晴": "🌦️",
+    "曇時々雨": "🌧️", "曇一時雨": "🌧️", "曇後雨": "🌧️", "曇後一時雨": "🌧️", "曇後時々雨": "🌧️",
+    "雨時々曇": "🌧️", "雨後曇": "🌧️",
+    "晴時々雪": "🌨️", "晴一時雪": "🌨️", "晴後雪": "🌨️", "曇時々雪": "🌨️", "曇一時雪": "🌨️",
+    "晴後一時雪": "🌨️", "晴後時々雪": "🌨️", "曇後一時雪": "🌨️", "曇後時々雪": "🌨️",
+    "曇後雪": "🌨️", "雪時々晴": "🌨️", "雪後晴": "🌨️", "雪時々曇": "🌨️", "雪後曇": "🌨️",
+    "雨か雪": "🌨️", "雪か雨": "🌨️", "雨時々雪": "🌨️", "雪時々雨": "🌨️", "雨一時雪": "🌨️",
+    "雪一時雨": "🌨️", "雨後雪": "🌨️", "雨後一時雪": "🌨️", "雨後時々雪": "🌨️", "雪後雨": "🌨️",
+    "雷雨": "⛈️", "雨で雷を伴う": "⛈️", "雪で雷を伴う": "⛈️", "晴時々雨で雷を伴う": "⛈️",
+    "曇時々雨で雷を伴う": "⛈️", "曇時々雪で雷を伴う": "⛈️",
+    "大雨": "🌧️", "大雪": "❄️", "暴風雪": "🌬️", "風雪強い": "🌬️", "雨で暴風を伴う": "🌬️",
+}
+
+DEFAULT_ICON = "☀️"
+
+# 予報JSONの天気文（例: "晴れ　時々　くもり"）を短い表記（"晴時々曇"）に揃える
+_NORMALIZE_WORDS = (
+    ("晴れ", "晴"), ("くもり", "曇"), ("のち", "後"),
+)
+_SPACES = re.compile(r"\s+")
+# 「夕方　から」「夜　は」などの時間帯の表現は「後」とみなす（"曇夕方から雨" → "曇後雨"）
+_TIME_WORDS = ("朝の内", "朝夕", "朝晩", "昼前", "昼過ぎ", "昼頃", "夕方", "夜のはじめ頃", "夜遅く", "夜", "明け方", "日中", "午後")
+_TIME_PATTERN = re.compile("(?:%s)+(?:から|は)?" % "|".join(sorted(_TIME_WORDS, key=len, reverse=True)))
+
+# 天気コード表にない表記の判定用に、すべての表記を長い順に並べた1本の正規表現。
+# 最も左から始まる表記のうち最も長いものがマッチし、文全体で最も長い表記とは限らない
+# （"曇所により晴時々曇" は "晴時々曇" ではなく "曇"）。判定を1回の走査で済ませるための割り切り。
+_ICON_PATTERN = re.compile("|".join(re.escape(key) for key in sorted(WEATHER_ICONS, key=len, reverse=True)))
+
+
+def normalize_weather_text(weather_text):
+    """空白を除き、ひらがな表記や時間帯の表現を天気コード表の表記に揃える"""
+    text = _SPACES.sub("", weather_text)
+    for word, replacement in _NORMALIZE_WORDS:
+        text = text.replace(word, replacement)
+    return _TIME_PATTERN.sub("後", text)
+
+
+def classify_weather(weather_text):
+    """天気文からアイコンを求める（揃えた表記がそのまま表にあれば辞書で引き、なければ正規表現）"""
+    text = normalize_weather_text(weather_text)
+    icon = WEATHER_ICONS.get(text)
+    if icon is not None:
+        return icon
+    match = _ICON_PATTERN.search(text)
+    return WEATHER_ICONS[match.group()] if match else DEFAULT_ICON
+
+
+# 天気の大分類（天気文の最初に出てくるもの）
+WEATHER_CATEGORIES = ("晴", "曇", "雨", "雪", "霧")
+_CATEGORY_PATTERN = re.compile("|".join(WEATHER_CATEGORIES))
+
+
+@lru_cache(maxsize=1024)
+def weather_category(weather_text):
+    """天気文の大分類（"晴れ　時々　くもり" → "晴"、判定できなければ空文字）"""
+    match = _CATEGORY_PATTERN.search(normalize_weather_text(weather_text or ""))
+    return match.group() if match else ""
+
+
+# 天気コード → アイコン（起動時に一度だけ計算）
+CODE_ICONS = {code: classify_weather(text) for code, text in WEATHER_CODES.items()}
+
+# 天気文 → アイコンのメモ（天気文の種類は限られるので、あふれたら空にするだけ）
+ICON_MEMO_SIZE = 1024
+_icon_memo = {}
+
+
+def get_weather_icon(weather_text, weather_code=None):
+    """天気テキスト（あれば天気コード）から適切なアイコンを取得"""
+    if weather_code in CODE_ICONS:
+        return CODE_ICONS[weather_code]
+    icon = _icon_memo.get(weather_text)
+    if icon is None:
+        icon = classify_weather(weather_text or "")
+        if len(_icon_memo) >= ICON_MEMO_SIZE:
+            _icon_memo.clear()
+        _icon_memo[weather_text] = icon
+    return icon
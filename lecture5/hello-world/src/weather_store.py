@@ -0,0 +1,817 @@
+import queue
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from contextlib import contextmanager
+from datetime import datetime
+
+from forecast_parser import ForecastBundle, ForecastRecord, ForecastReport, ForecastSeries
+
+DB_NAME = "weather_forecast.db"
+
+# area.json の階層（親→子の順）
+AREA_LEVELS = ("centers", "offices", "class10s", "class15s", "class20s")
+
+# offices より下の階層（sub_areas テーブルにまとめて保存）
+SUB_AREA_LEVELS = AREA_LEVELS[2:]
+
+# 接続ごとに一度だけ設定するPRAGMA
+PRAGMAS = (
+    "PRAGMA journal_mode=WAL",
+    "PRAGMA synchronous=NORMAL",
+    "PRAGMA temp_store=MEMORY",
+    "PRAGMA cache_size=-8000",
+    "PRAGMA mmap_size=67108864",
+    "PRAGMA busy_timeout=5000",
+)
+
+# 接続ごとのプリペアドステートメントのキャッシュ数
+STATEMENT_CACHE_SIZE = 64
+
+# SQL文（同じ文字列を使い回すことで接続のステートメントキャッシュに載る）
+SQL_INSERT_CENTER = """
+    INSERT OR REPLACE INTO centers (center_code, center_name, created_at)
+    VALUES (?, ?, ?)
+"""
+
+SQL_INSERT_OFFICE = """
+    INSERT OR REPLACE INTO offices (office_code, office_name, center_code, created_at)
+    VALUES (?, ?, ?, ?)
+"""
+
+SQL_INSERT_SUB_AREA = """
+    INSERT OR REPLACE INTO sub_areas (level, area_code, area_name, parent_code, created_at)
+    VALUES (?, ?, ?, ?, ?)
+"""
+
+SQL_SELECT_CENTERS = "SELECT center_code, center_name FROM centers"
+
+SQL_SELECT_OFFICES = "SELECT office_code, office_name, center_code FROM offices"
+
+SQL_SELECT_SUB_AREAS = "SELECT level, area_code, area_name, parent_code FROM sub_areas"
+
+# 同じ (office_code, forecast_date, report_datetime) は既存行を残して重複として数える
+# （*_value / *_epoch は分析用に数値化した列。元の文字列の列もそのまま残す）
+SQL_INSERT_FORECAST = """
+    INSERT OR IGNORE INTO forecasts
+    (office_code, forecast_date, weather, temp_min, temp_max, report_datetime, fetched_at,
+     temp_min_value, temp_max_value, forecast_epoch, report_epoch, weather_code)
+    VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+"""
+
+SQL_SELECT_FORECAST_AT = """
+    SELECT forecast_date, weather, temp_min, temp_max, report_datetime, weather_code
+    FROM forecasts
+    WHERE office_code = ? AND report_datetime = ?
+    ORDER BY forecast_date ASC
+"""
+
+# latest_report で最新の発表時刻を引き、その発表分だけをキーで読む
+SQL_SELECT_FORECAST_LATEST = """
+    SELECT f.forecast_date, f.weather, f.temp_min, f.temp_max, f.report_datetime, f.weather_code
+    FROM latest_report AS l
+    JOIN forecasts AS f
+        ON f.office_code = l.office_code AND f.report_datetime = l.report_datetime
+    WHERE l.office_code = ?
+    ORDER BY f.forecast_date ASC
+"""
+
+SQL_SELECT_HISTORY = """
+    SELECT report_datetime, fetched_at
+    FROM reports
+    WHERE office_code = ?
+    ORDER BY report_datetime DESC
+"""
+
+# 同じ発表・地域・要素・時刻の値は既存行を残す
+SQL_INSERT_FORECAST_VALUE = """
+    INSERT OR IGNORE INTO forecast_values
+    (office_code, report_datetime, series, area_code, element, time_define, value)
+    VALUES (?, ?, ?, ?, ?, ?, ?)
+"""
+
+SQL_UPSERT_FORECAST_AREA = """
+    INSERT INTO forecast_areas (area_code, area_name)
+    VALUES (?, ?)
+    ON CONFLICT (area_code) DO UPDATE SET area_name = excluded.area_name
+"""
+
+SQL_SELECT_FORECAST_VALUES = """
+    SELECT v.series, v.area_code, a.area_name, v.element, v.time_define, v.value
+    FROM forecast_values AS v
+    LEFT JOIN forecast_areas AS a ON a.area_code = v.area_code
+    WHERE v.office_code = ? AND v.report_datetime = ?
+    ORDER BY v.series, v.area_code, v.element, v.time_define
+"""
+
+SQL_SELECT_LATEST_REPORT = "SELECT report_datetime FROM latest_report WHERE office_code = ?"
+
+SQL_SELECT_LATEST_REPORTS = "SELECT office_code, report_datetime FROM latest_report"
+
+SQL_RECORD_VIEW = """
+    INSERT INTO office_views (office_code, views, last_viewed_at)
+    VALUES (?, 1, ?)
+    ON CONFLICT (office_code) DO UPDATE SET
+        views = views + 1,
+        last_viewed_at = excluded.last_viewed_at
+"""
+
+SQL_SELECT_MOST_VIEWED = """
+    SELECT office_code FROM office_views
+    ORDER BY views DESC, last_viewed_at DESC
+    LIMIT ?
+"""
+
+SQL_INSERT_REPORT = """
+    INSERT OR IGNORE INTO reports (office_code, report_datetime, fetched_at)
+    VALUES (?, ?, ?)
+"""
+
+# 既存より新しい発表時刻のときだけ最新ポインタを進める
+SQL_UPSERT_LATEST_REPORT = """
+    INSERT INTO latest_report (office_code, report_datetime, fetched_at)
+    VALUES (?, ?, ?)
+    ON CONFLICT (office_code) DO UPDATE SET
+        report_datetime = excluded.report_datetime,
+        fetched_at = excluded.fetched_at
+    WHERE excluded.report_datetime > latest_report.report_datetime
+"""
+
+# 既存DB向けのマイグレーション（PRAGMA user_version の番号 → SQL）
+MIGRATIONS = {
+    # v1: forecasts から reports / latest_report を埋める
+    1: (
+        """
+        INSERT OR IGNORE INTO reports (office_code, report_datetime, fetched_at)
+        SELECT office_code, report_datetime, MIN(fetched_at)
+        FROM forecasts
+        GROUP BY office_code, report_datetime
+        """,
+        """
+        INSERT OR REPLACE INTO latest_report (office_code, report_datetime, fetched_at)
+        SELECT r.office_code, r.report_datetime, r.fetched_at
+        FROM reports AS r
+        WHERE r.report_datetime = (
+            SELECT MAX(report_datetime) FROM reports WHERE office_code = r.office_code
+        )
+        """,
+    ),
+    # v2: 気温を数値、予報日時・発表時刻をUNIX時刻で持つ列を追加して埋める
+    2: (
+        "ALTER TABLE forecasts ADD COLUMN temp_min_value REAL",
+        "ALTER TABLE forecasts ADD COLUMN temp_max_value REAL",
+        "ALTER TABLE forecasts ADD COLUMN forecast_epoch INTEGER",
+        "ALTER TABLE forecasts ADD COLUMN report_epoch INTEGER",
+        """
+        UPDATE forecasts SET
+            temp_min_value = CASE WHEN temp_min GLOB '[0-9]*' OR temp_min GLOB '-[0-9]*'
+                                  THEN CAST(temp_min AS REAL) END,
+            temp_max_value = CASE WHEN temp_max GLOB '[0-9]*' OR temp_max GLOB '-[0-9]*'
+                                  THEN CAST(temp_max AS REAL) END,
+            forecast_epoch = CAST(strftime('%s', forecast_date) AS INTEGER),
+            report_epoch = CAST(strftime('%s', report_datetime) AS INTEGER)
+        """,
+    ),
+    # v3: 同じ予報日の発表を時刻順に辿る（forecast_analytics のウィンドウ関数用）
+    3: (
+        """
+        CREATE INDEX IF NOT EXISTS idx_forecasts_revisions
+        ON forecasts(office_code, forecast_date, report_epoch)
+        """,
+    ),
+    # v4: 当日分の予報日時は発表時刻と同じ（11時・17時など）なので、予報日は日本時間の日付で辿る
+    4: (
+        "DROP INDEX IF EXISTS idx_forecasts_revisions",
+        """
+        CREATE INDEX IF NOT EXISTS idx_forecasts_revision_days
+        ON forecasts(office_code, date(forecast_epoch + 32400, 'unixepoch'), report_epoch)
+        """,
+    ),
+    # v5: アイコン用の天気コード（weatherCodes）。既存の行は保存済みの全地域の値から、
+    # 同じ発表・予報日時で天気文が一致する地域のコードを埋める（見つからなければ NULL）
+    5: (
+        "ALTER TABLE forecasts ADD COLUMN weather_code TEXT",
+        """
+        UPDATE forecasts SET weather_code = (
+            SELECT c.value
+            FROM forecast_values AS w
+            JOIN forecast_values AS c
+                ON c.office_code = w.office_code AND c.report_datetime = w.report_datetime
+                AND c.series = w.series AND c.area_code = w.area_code
+                AND c.element = 'weatherCodes' AND c.time_define = w.time_define
+            WHERE w.office_code = forecasts.office_code
+                AND w.report_datetime = forecasts.report_datetime
+                AND w.series = 'short' AND w.element = 'weathers'
+                AND w.time_define = forecasts.forecast_date AND w.value = forecasts.weather
+            LIMIT 1
+        )
+        """,
+    ),
+}
+
+SCHEMA_VERSION = max(MIGRATIONS)
+
+
+def build_parent_index(area_json):
+    """children一覧から、階層ごとの 子コード→親コード の逆引き表を作る
+
+    階層が違うと同じコードが使われることがある（例: 大阪府のoffice/class10）ため、
+    子の階層ごとに別の辞書にする。
+    """
+    index = {level: {} for level in AREA_LEVELS[1:]}
+    for parent_level, child_level in zip(AREA_LEVELS, AREA_LEVELS[1:]):
+        children_index = index[child_level]
+        for parent_code, parent_data in area_json.get(parent_level, {}).items():
+            for child_code in parent_data.get("children", []):
+                children_index.setdefault(child_code, parent_code)
+    return index
+
+
+def to_number(value):
+    """気温などの文字列を数値に（空文字や数値でないものはNone）"""
+    try:
+        return float(value)
+    except (TypeError, ValueError):
+        return None
+
+
+def to_epoch(iso_datetime):
+    """ISO形式の日時（"2025-01-14T17:00:00+09:00"）をUNIX時刻に（解釈できなければNone）"""
+    try:
+        return int(datetime.fromisoformat(iso_datetime.replace("Z", "+00:00")).timestamp())
+    except (AttributeError, ValueError):
+        return None
+
+
+def forecast_rows(area_code, report, fetched_at):
+    """ForecastReportをforecastsテーブルの行に変換"""
+    report_epoch = to_epoch(report.report_datetime)
+    return [
+        (area_code, record.forecast_date, record.weather, record.temp_min, record.temp_max,
+         report.report_datetime, fetched_at,
+         to_number(record.temp_min), to_number(record.temp_max), to_epoch(record.forecast_date), report_epoch,
+         record.weather_code)
+        for record in report.records
+    ]
+
+
+def forecast_value_rows(office_code, bundle):
+    """ForecastBundle の全時系列を forecast_values テーブルの行に変換（空文字は NULL）"""
+    report_datetime = bundle.report.report_datetime
+    return [
+        (office_code, report_datetime, series.series, series.area_code, series.element,
+         time_define, value if value != "" else None)
+        for series in bundle.series
+        for time_define, value in zip(series.time_defines, series.values)
+    ]
+
+
+class ConnectionPool:
+    """スレッドセーフなSQLite接続プール"""
+
+    def __init__(self, db_name=DB_NAME, size=4, timeout=10.0):
+        self.db_name = db_name
+        self.size = size
+        self.timeout = timeout
+        self._idle = queue.LifoQueue(maxsize=size)
+        self._lock = threading.Lock()
+        self._created = 0
+        self._closed = False
+
+    def _connect(self):
+        conn = sqlite3.connect(
+            self.db_name,
+            timeout=self.timeout,
+            check_same_thread=False,
+            cached_statements=STATEMENT_CACHE_SIZE,
+        )
+        for pragma in PRAGMAS:
+            conn.execute(pragma)
+        return conn
+
+    def acquire(self):
+        """接続を借りる（空きがなければ上限まで新規作成し、それ以上は待つ）"""
+        if self._closed:
+            raise RuntimeError("接続プールは既に閉じられています")
+
+        try:
+            return self._idle.get_nowait()
+        except queue.Empty:
+            pass
+
+        with self._lock:
+            can_create = self._created < self.size
+            if can_create:
+                self._created += 1
+
+        if can_create:
+            try:
+                return self._connect()
+            except Exception:
+                with self._lock:
+                    self._created -= 1
+                raise
+
+        try:
+            return self._idle.get(timeout=self.timeout)
+        except queue.Empty:
+            raise TimeoutError("DB接続の取得がタイムアウトしました")
+
+    def release(self, conn):
+        """接続をプールに返す"""
+        if self._closed:
+            conn.close()
+            return
+        if conn.in_transaction:
+            conn.rollback()
+        self._idle.put_nowait(conn)
+
+    @contextmanager
+    def connection(self):
+        conn = self.acquire()
+        try:
+            yield conn
+        finally:
+            self.release(conn)
+
+    @contextmanager
+    def transaction(self):
+        """1つのトランザクションで実行（例外時はロールバック）"""
+        with self.connection() as conn:
+            with conn:
+                yield conn
+
+    def close(self):
+        self._closed = True
+        while True:
+            try:
+                conn = self._idle.get_nowait()
+            except queue.Empty:
+                break
+            conn.close()
+        with self._lock:
+            self._created = 0
+
+
+class ForecastCache:
+    """DB読み出し結果のLRU/TTLキャッシュ（スレッドセーフ）
+
+    キーは ("forecast", office_code, report_datetime) と ("history", office_code)。
+    report_datetime=None は「最新」を表す。
+
+    invalidate() のたびに地域の世代を進める。読み出し側は DB を読む前に generation() を
+    取っておき、put() に渡す。読んでいる間に保存・無効化が挟まると世代が変わるので、
+    古い行を読んだ結果はキャッシュに入らない。
+    """
+
+    def __init__(self, maxsize=128, ttl=300.0):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+        self.invalidations = 0
+        self.stale_puts = 0
+        # office_code → 世代（invalidate で進む）と、clear() の回数
+        self._generations = {}
+        self._cleared = 0
+
+    def generation(self, office_code):
+        """地域の今の世代（DBを読む前に取り、put() に渡す）"""
+        with self._lock:
+            return self._cleared, self._generations.get(office_code, 0)
+
+    def get(self, key):
+        """キャッシュから取得（なければNone）"""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return None
+            value, expires_at = entry
+            if expires_at < time.monotonic():
+                del self._entries[key]
+                self.expirations += 1
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return value
+
+    def put(self, key, value, generation=None):
+        """キャッシュに入れる（generation が今の世代と違えば、読んでいる間に更新されたので入れない）"""
+        with self._lock:
+            if generation is not None and generation != (self._cleared, self._generations.get(key[1], 0)):
+                self.stale_puts += 1
+                return
+            self._entries[key] = (value, time.monotonic() + self.ttl)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    def invalidate(self, office_code, report_datetimes=()):
+        """地域の「最新」と履歴、指定した発表時刻のエントリだけを捨てる"""
+        keys = [("forecast", office_code, None), ("series", office_code, None), ("history", office_code)]
+        for report_datetime in report_datetimes:
+            keys.append(("forecast", office_code, report_datetime))
+            keys.append(("series", office_code, report_datetime))
+        with self._lock:
+            self._generations[office_code] = self._generations.get(office_code, 0) + 1
+            for key in keys:
+                if self._entries.pop(key, None) is not None:
+                    self.invalidations += 1
+
+    def clear(self):
+        with self._lock:
+            self._cleared += 1
+            self._entries.clear()
+
+    def stats(self):
+        """ヒット数・ミス数・追い出し数などの統計"""
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "size": len(self._entries),
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": self.hits / lookups if lookups else 0.0,
+                "evictions": self.evictions,
+                "expirations": self.expirations,
+                "invalidations": self.invalidations,
+                "stale_puts": self.stale_puts,
+            }
+
+
+class WeatherStore:
+    """天気予報DBへのアクセスをまとめたストア（接続はプールで使い回す）"""
+
+    def __init__(self, db_name=DB_NAME, pool_size=4, cache_size=128, cache_ttl=300.0):
+        self.db_name = db_name
+        self.pool = ConnectionPool(db_name, size=pool_size)
+        self.cache = ForecastCache(cache_size, cache_ttl)
+
+    def init_schema(self):
+        """テーブルとインデックスを作成し、DDL を実行したかを返す
+
+        user_version が SCHEMA_VERSION に達しているDBは作成済みなので、
+        PRAGMA を1回読むだけで戻る（テーブルを増やすときはマイグレーションも追加する）。
+        """
+        with self.pool.connection() as conn:
+            if conn.execute("PRAGMA user_version").fetchone()[0] >= SCHEMA_VERSION:
+                return False
+
+        with self.pool.transaction() as conn:
+            # 地域センター情報テーブル
+            conn.execute("""
+                CREATE TABLE IF NOT EXISTS centers (
+                    center_code TEXT PRIMARY KEY,
+                    center_name TEXT NOT NULL,
+                    created_at TEXT NOT NULL
+                )
+            """)
+
+            # 地域オフィス情報テーブル
+            conn.execute("""
+                CREATE TABLE IF NOT EXISTS offices (
+                    office_code TEXT PRIMARY KEY,
+                    office_name TEXT NOT NULL,
+                    center_code TEXT NOT NULL,
+                    created_at TEXT NOT NULL,
+                    FOREIGN KEY (center_code) REFERENCES centers(center_code)
+                )
+            """)
+
+            # 天気予報テーブル（正規化）
+            conn.execute("""
+                CREATE TABLE IF NOT EXISTS forecasts (
+                    id INTEGER PRIMARY KEY AUTOINCREMENT,
+                    office_code TEXT NOT NULL,
+                    forecast_date TEXT NOT NULL,
+                    weather TEXT NOT NULL,
+                    temp_min TEXT,
+                    temp_max TEXT,
+                    report_datetime TEXT NOT NULL,
+                    fetched_at TEXT NOT NULL,
+                    FOREIGN KEY (office_code) REFERENCES offices(office_code),
+                    UNIQUE(office_code, forecast_date, report_datetime)
+                )
+            """)
+
+            # class10s/class15s/class20s の地域情報テーブル
+            conn.execute("""
+                CREATE TABLE IF NOT EXISTS sub_areas (
+                    level TEXT NOT NULL,
+                    area_code TEXT NOT NULL,
+                    area_name TEXT NOT NULL,
+                    parent_code TEXT NOT NULL,
+                    created_at TEXT NOT NULL,
+                    PRIMARY KEY (level, area_code)
+                )
+            """)
+
+            conn.execute("""
+                CREATE INDEX IF NOT EXISTS idx_sub_areas_parent
+                ON sub_areas(level, parent_code)
+            """)
+
+            # インデックス作成（検索高速化）
+            conn.execute("""
+                CREATE INDEX IF NOT EXISTS idx_forecasts_office
+                ON forecasts(office_code, report_datetime DESC)
+            """)
+
+            # 発表時刻ごとの読み出しを日付順のまま索引だけで辿れるようにする
+            conn.execute("""
+                CREATE INDEX IF NOT EXISTS idx_forecasts_report
+                ON forecasts(office_code, report_datetime, forecast_date)
+            """)
+
+            # 発表時刻の一覧（履歴表示用のディメンション）
+            conn.execute("""
+                CREATE TABLE IF NOT EXISTS reports (
+                    office_code TEXT NOT NULL,
+                    report_datetime TEXT NOT NULL,
+                    fetched_at TEXT NOT NULL,
+                    PRIMARY KEY (office_code, report_datetime)
+                ) WITHOUT ROWID
+            """)
+
+            # 地域ごとの最新発表時刻
+            conn.execute("""
+                CREATE TABLE IF NOT EXISTS latest_report (
+                    office_code TEXT PRIMARY KEY,
+                    report_datetime TEXT NOT NULL,
+                    fetched_at TEXT NOT NULL
+                ) WITHOUT ROWID
+            """)
+
+            # 予報JSONの全地域・全要素の値（1行 = 1地域・1要素・1時刻）
+            conn.execute("""
+                CREATE TABLE IF NOT EXISTS forecast_values (
+                    office_code TEXT NOT NULL,
+                    report_datetime TEXT NOT NULL,
+                    series TEXT NOT NULL,
+                    area_code TEXT NOT NULL,
+                    element TEXT NOT NULL,
+                    time_define TEXT NOT NULL,
+                    value TEXT,
+                    PRIMARY KEY (office_code, report_datetime, series, area_code, element, time_define)
+                ) WITHOUT ROWID
+            """)
+
+            # forecast_values に出てくる地域・観測点の名前（class10 とアメダス地点）
+            conn.execute("""
+                CREATE TABLE IF NOT EXISTS forecast_areas (
+                    area_code TEXT PRIMARY KEY,
+                    area_name TEXT NOT NULL
+                ) WITHOUT ROWID
+            """)
+
+            # 地域ごとの閲覧回数（バックグラウンド更新の優先度に使う）
+            conn.execute("""
+                CREATE TABLE IF NOT EXISTS office_views (
+                    office_code TEXT PRIMARY KEY,
+                    views INTEGER NOT NULL,
+                    last_viewed_at TEXT NOT NULL
+                )
+            """)
+
+            self._migrate(conn)
+        return True
+
+    def _migrate(self, conn):
+        """user_version より新しいマイグレーションを順に適用"""
+        version = conn.execute("PRAGMA user_version").fetchone()[0]
+        for target in sorted(MIGRATIONS):
+            if target <= version:
+                continue
+            for sql in MIGRATIONS[target]:
+                conn.execute(sql)
+            conn.execute(f"PRAGMA user_version = {target}")
+
+    def save_area(self, area_json):
+        """エリア情報をDBに保存（逆引き表を1回作り、1トランザクションでまとめて書き込む）"""
+        created_at = datetime.now().isoformat()
+        parents = build_parent_index(area_json)
+
+        center_rows = [
+            (center_code, center_data["name"], created_at)
+            for center_code, center_data in area_json["centers"].items()
+        ]
+
+        # 親センターが見つからないオフィスは従来通り保存しない
+        office_rows = [
+            (office_code, office_data["name"], parents["offices"][office_code], created_at)
+            for office_code, office_data in area_json["offices"].items()
+            if office_code in parents["offices"]
+        ]
+
+        sub_area_rows = []
+        for level in SUB_AREA_LEVELS:
+            for area_code, area_data in area_json.get(level, {}).items():
+                parent_code = parents[level].get(area_code, area_data.get("parent"))
+                if parent_code:
+                    sub_area_rows.append((level, area_code, area_data["name"], parent_code, created_at))
+
+        with self.pool.transaction() as conn:
+            conn.executemany(SQL_INSERT_CENTER, center_rows)
+            conn.executemany(SQL_INSERT_OFFICE, office_rows)
+            conn.executemany(SQL_INSERT_SUB_AREA, sub_area_rows)
+
+    def load_area(self):
+        """DBからエリア情報を取得"""
+        with self.pool.connection() as conn:
+            centers = {row[0]: {"name": row[1], "children": []} for row in conn.execute(SQL_SELECT_CENTERS)}
+
+            offices = {}
+            for office_code, office_name, center_code in conn.execute(SQL_SELECT_OFFICES):
+                offices[office_code] = {"name": office_name, "children": []}
+                if center_code in centers:
+                    centers[center_code]["children"].append(office_code)
+
+            area = {"centers": centers, "offices": offices}
+            for level in SUB_AREA_LEVELS:
+                area[level] = {}
+            for level, area_code, area_name, parent_code in conn.execute(SQL_SELECT_SUB_AREAS):
+                area[level][area_code] = {"name": area_name, "parent": parent_code, "children": []}
+
+        # 子の一覧を親側に組み立て直す
+        for parent_level, level in zip(AREA_LEVELS, AREA_LEVELS[1:]):
+            if level == "offices":
+                continue
+            for area_code, area_data in area[level].items():
+                parent = area[parent_level].get(area_data["parent"])
+                if parent is not None:
+                    parent["children"].append(area_code)
+
+        return area if centers else None
+
+    def save_forecast(self, area_code, report):
+        """天気予報データ（ForecastReport か ForecastBundle）をDBに保存"""
+        return self.save_forecasts([(area_code, report)])
+
+    def save_forecasts(self, results):
+        """複数地域の予報 [(area_code, ForecastReport か ForecastBundle), ...] を1トランザクションで保存
+
+        書き込んだ行数・重複でスキップした行数・不正でスキップした行数と
+        スループットを辞書で返す。ForecastBundle の場合は全地域・全要素の値も
+        forecast_values に書き込み、その件数を values に入れる。
+        """
+        start = time.perf_counter()
+        fetched_at = datetime.now().isoformat()
+
+        rows = []
+        value_rows = []
+        area_names = {}
+        for area_code, result in results:
+            if isinstance(result, ForecastBundle):
+                if result.report.report_datetime:
+                    value_rows.extend(forecast_value_rows(area_code, result))
+                    for series in result.series:
+                        if series.area_code and series.area_name:
+                            area_names[series.area_code] = series.area_name
+                result = result.report
+            rows.extend(forecast_rows(area_code, result, fetched_at))
+
+        # NOT NULL 制約に引っかかる行は1件でバッチ全体を失敗させないよう先に除く
+        valid_rows = [row for row in rows if row[1] and row[2] is not None and row[5]]
+
+        reports = {}
+        for row in valid_rows:
+            reports.setdefault(row[0], set()).add(row[5])
+        report_rows = [
+            (office_code, report_datetime, fetched_at)
+            for office_code, report_datetimes in reports.items()
+            for report_datetime in sorted(report_datetimes)
+        ]
+
+        with self.pool.transaction() as conn:
+            changes_before = conn.total_changes
+            conn.executemany(SQL_INSERT_FORECAST, valid_rows)
+            written = conn.total_changes - changes_before
+            conn.executemany(SQL_INSERT_REPORT, report_rows)
+            conn.executemany(SQL_UPSERT_LATEST_REPORT, report_rows)
+            changes_before = conn.total_changes
+            conn.executemany(SQL_INSERT_FORECAST_VALUE, value_rows)
+            values_written = conn.total_changes - changes_before
+            conn.executemany(SQL_UPSERT_FORECAST_AREA, area_names.items())
+
+        # 書き込んだ地域・発表時刻のキャッシュだけを無効化（commit の後なので、これより前に
+        # 読み始めた読み出しは世代が変わって put() されない）
+        for office_code, report_datetimes in reports.items():
+            self.cache.invalidate(office_code, report_datetimes)
+
+        elapsed = time.perf_counter() - start
+        return {
+            "rows": len(rows),
+            "written": written,
+            "duplicates": len(valid_rows) - written,
+            "invalid": len(rows) - len(valid_rows),
+            "values": values_written,
+            "elapsed": elapsed,
+            "rows_per_sec": len(rows) / elapsed if elapsed > 0 else 0.0,
+        }
+
+    def load_forecast(self, area_code, report_datetime=None):
+        """DBから天気予報データを ForecastReport で取得（report_datetime省略時は最新、なければNone）"""
+        key = ("forecast", area_code, report_datetime)
+        cached = self.cache.get(key)
+        if cached is not None:
+            return cached
+        generation = self.cache.generation(area_code)
+
+        with self.pool.connection() as conn:
+            if report_datetime:
+                rows = conn.execute(SQL_SELECT_FORECAST_AT, (area_code, report_datetime)).fetchall()
+            else:
+                rows = conn.execute(SQL_SELECT_FORECAST_LATEST, (area_code,)).fetchall()
+
+        if not rows:
+            return None
+
+        result = ForecastReport(rows[0][4], [ForecastRecord(*row[:4], row[5]) for row in rows])
+        self.cache.put(key, result, generation)
+        return result
+
+    def load_series(self, area_code, report_datetime=None):
+        """予報JSONの全地域・全要素の時系列を ForecastSeries のリストで取得（report_datetime省略時は最新）"""
+        key = ("series", area_code, report_datetime)
+        cached = self.cache.get(key)
+        if cached is not None:
+            return cached
+        generation = self.cache.generation(area_code)
+
+        with self.pool.connection() as conn:
+            if not report_datetime:
+                row = conn.execute(SQL_SELECT_LATEST_REPORT, (area_code,)).fetchone()
+                if row is None:
+                    return []
+                target = row[0]
+            else:
+                target = report_datetime
+            rows = conn.execute(SQL_SELECT_FORECAST_VALUES, (area_code, target)).fetchall()
+
+        result = []
+        for series_name, series_area, area_name, element, time_define, value in rows:
+            last = result[-1] if result else None
+            if last is None or (last.series, last.area_code, last.element) != (series_name, series_area, element):
+                last = ForecastSeries(series_name, series_area, area_name or "", element, [], [])
+                result.append(last)
+            last.time_defines.append(time_define)
+            last.values.append(value)
+
+        if result:
+            self.cache.put(key, result, generation)
+        return result
+
+    def get_history(self, area_code):
+        """特定地域の過去の予報発表時刻一覧を取得"""
+        key = ("history", area_code)
+        cached = self.cache.get(key)
+        if cached is not None:
+            return cached
+        generation = self.cache.generation(area_code)
+
+        with self.pool.connection() as conn:
+            rows = conn.execute(SQL_SELECT_HISTORY, (area_code,)).fetchall()
+
+        if rows:
+            self.cache.put(key, rows, generation)
+        return rows
+
+    def record_view(self, office_code):
+        """地域が表示された回数を記録"""
+        with self.pool.transaction() as conn:
+            conn.execute(SQL_RECORD_VIEW, (office_code, datetime.now().isoformat()))
+
+    def latest_reports(self):
+        """地域ごとの保存済みの最新の発表時刻 {office_code: report_datetime}"""
+        with self.pool.connection() as conn:
+            return dict(conn.execute(SQL_SELECT_LATEST_REPORTS).fetchall())
+
+    def most_viewed(self, limit=20):
+        """よく表示される地域のコードを多い順に取得"""
+        with self.pool.connection() as conn:
+            return [row[0] for row in conn.execute(SQL_SELECT_MOST_VIEWED, (limit,))]
+
+    def close(self):
+        self.pool.close()
+
+
+_store = None
+_store_lock = threading.Lock()
+
+
+def get_store(db_name=DB_NAME):
+    """アプリ全体で共有するストアを取得"""
+    global _store
+    if _store is None:
+        with _store_lock:
+            if _store is None:
+                _store = WeatherStore(db_name)
+    return _store
@@ -0,0 +1,153 @@
+"""jma_client.ResponseCache（条件付きGETとディスクキャッシュ）のテスト"""
+import asyncio
+import json
+import os
+
+import pytest
+
+from jma_client import AsyncForecastFetcher, ResponseCache
+from weather_store import WeatherStore
+
+URL = "https://example.invalid/bosai/forecast/data/forecast/130000.json"
+FIXTURES = os.path.join(os.path.dirname(__file__), "..", "tools", "fixtures", "bosai", "forecast", "data", "forecast")
+BODY = json.dumps([{"reportDatetime": "2026-01-01T17:00:00+09:00"}]).encode("utf-8")
+
+
+class FakeResponse:
+    def __init__(self, status_code, content=b"", headers=None):
+        self.status_code = status_code
+        self.content = content
+        self.headers = headers or {}
+
+    def raise_for_status(self):
+        if self.status_code >= 400:
+            raise RuntimeError(f"HTTP {self.status_code}")
+
+    def json(self):
+        return json.loads(self.content)
+
+
+class FakeSession:
+    """送られたヘッダーを記録し、If-None-Match が今の ETag と一致すれば304を返す"""
+
+    def __init__(self, etag='"v1"', body=BODY):
+        self.etag = etag
+        self.body = body
+        self.sent_headers = []
+
+    def get(self, url, headers=None, timeout=None):
+        headers = dict(headers or {})
+        self.sent_headers.append(headers)
+        if headers.get("If-None-Match") == self.etag:
+            return FakeResponse(304)
+        return FakeResponse(200, self.body, {"ETag": self.etag, "Last-Modified": "Thu, 01 Jan 2026 08:00:00 GMT"})
+
+    def close(self):
+        pass
+
+
+@pytest.fixture
+def session():
+    return FakeSession()
+
+
+@pytest.fixture
+def cache(tmp_path, session):
+    return ResponseCache(str(tmp_path / "http_cache"), session=session)
+
+
+def test_validators_are_stored_only_after_commit(cache, session):
+    result, commit = cache.fetch(URL)
+    assert result[0]["reportDatetime"] == "2026-01-01T17:00:00+09:00"
+    assert commit is not None
+
+    # commit() 前（DB保存に失敗したなど）は次回も取り直す
+    result, _ = cache.fetch(URL)
+    assert result is not None
+    assert session.sent_headers[1] == {}
+    assert cache.load_json(URL) is None
+
+    commit()
+    assert cache.fetch(URL) == (None, None)
+    assert session.sent_headers[2] == {
+        "If-None-Match": '"v1"',
+        "If-Modified-Since": "Thu, 01 Jan 2026 08:00:00 GMT",
+    }
+    assert cache.load_json(URL) == json.loads(BODY)
+
+    stats = cache.stats()
+    assert stats["requests"] == 3
+    assert stats["not_modified"] == 1
+    assert stats["bytes_downloaded"] == 2 * len(BODY)
+    assert stats["bytes_saved"] == len(BODY)
+
+
+def test_changed_body_is_fetched_again(cache, session):
+    cache.get_json(URL)
+    session.etag = '"v2"'
+    session.body = json.dumps([{"reportDatetime": "2026-01-02T05:00:00+09:00"}]).encode("utf-8")
+
+    result = cache.get_json(URL)
+    assert result[0]["reportDatetime"] == "2026-01-02T05:00:00+09:00"
+    assert session.sent_headers[1]["If-None-Match"] == '"v1"'
+    assert cache.get_json(URL) is None
+    assert session.sent_headers[2]["If-None-Match"] == '"v2"'
+
+
+def test_parse_error_is_not_cached(cache, session):
+    session.body = b"{broken"
+    with pytest.raises(ValueError):
+        cache.get_json(URL)
+    assert cache.load_json(URL) is None
+
+    session.body = BODY
+    assert cache.get_json(URL) == json.loads(BODY)
+    assert session.sent_headers[1] == {}
+
+
+def test_http_error_raises(cache, session):
+    session.get = lambda url, headers=None, timeout=None: FakeResponse(503)
+    with pytest.raises(RuntimeError):
+        cache.fetch(URL)
+    assert cache.stats()["requests"] == 0
+
+
+def test_parse_receives_body(cache):
+    result, commit = cache.fetch(URL, parse=lambda body: len(body))
+    assert result == len(BODY)
+    commit()
+    assert cache.load_json(URL, parse=lambda f: f.read()) == BODY
+
+
+def prefetch(cache, session, store):
+    fetcher = AsyncForecastFetcher(base_url="https://example.invalid", rate_per_host=0, cache=cache)
+    fetcher.session = session
+    try:
+        return asyncio.run(fetcher.prefetch_offices(["130000"], store))
+    finally:
+        fetcher.close()
+
+
+def test_prefetch_commits_validators_after_save(tmp_path):
+    with open(os.path.join(FIXTURES, "130000.json"), "rb") as f:
+        session = FakeSession(body=f.read())
+    cache = ResponseCache(str(tmp_path / "http_cache"), session=session)
+
+    class FailingStore:
+        def save_forecasts(self, results):
+            raise OSError("disk full")
+
+    # 保存に失敗したら ETag を記録せず、次回も本文を取り直す
+    with pytest.raises(OSError):
+        prefetch(cache, session, FailingStore())
+
+    store = WeatherStore(str(tmp_path / "weather.db"))
+    store.init_schema()
+    summary = prefetch(cache, session, store)
+    assert session.sent_headers[1] == {}
+    assert summary["fetched"] == 1 and summary["rows"] > 0
+
+    summary = prefetch(cache, session, store)
+    assert session.sent_headers[2]["If-None-Match"] == '"v1"'
+    assert summary["fetched"] == 0 and summary["not_modified"] == 1
+    store.close()
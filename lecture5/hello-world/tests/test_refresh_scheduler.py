@@ -0,0 +1,70 @@
+"""refresh_scheduler（定時発表に合わせた更新）のテスト"""
+from datetime import datetime
+
+import pytest
+
+from forecast_parser import build_report
+from refresh_scheduler import JST, RefreshScheduler, next_publication, previous_publication
+from weather_store import WeatherStore
+
+AREA_JSON = {"offices": {"130000": {}, "270000": {}}}
+
+
+def jst(hour, minute=0, day=1):
+    return datetime(2026, 1, day, hour, minute, tzinfo=JST)
+
+
+@pytest.mark.parametrize("now, expected", [
+    (jst(11, 3), jst(5)),
+    (jst(11, 5), jst(11)),
+    (jst(4, 0), datetime(2025, 12, 31, 17, tzinfo=JST)),
+    (jst(23, 0), jst(17)),
+])
+def test_previous_publication(now, expected):
+    assert previous_publication(now) == expected
+
+
+def test_next_publication():
+    assert next_publication(jst(11, 3)) == jst(11, 5)
+    assert next_publication(jst(17, 5)) == jst(5, 5, day=2)
+
+
+@pytest.fixture
+def store(tmp_path):
+    store = WeatherStore(str(tmp_path / "weather.db"))
+    store.init_schema()
+    yield store
+    store.close()
+
+
+def save(store, office_code, report_datetime):
+    store.save_forecasts([(office_code, build_report(report_datetime, [report_datetime], ["晴れ"]))])
+
+
+def test_is_stale_compares_latest_report_with_publication(store):
+    scheduler = RefreshScheduler(store, AREA_JSON)
+    # 閲覧記録がなければ全オフィスが対象で、保存済みの予報がなければ古い扱い
+    assert scheduler.is_stale(jst(12)) is True
+
+    save(store, "130000", "2026-01-01T11:00:00+09:00")
+    save(store, "270000", "2026-01-01T11:00:00+09:00")
+    assert scheduler.is_stale(jst(12)) is False
+    assert scheduler.is_stale(jst(17, 6)) is True
+
+    store.record_view("130000")
+    save(store, "130000", "2026-01-01T17:00:00+09:00")
+    assert scheduler.is_stale(jst(17, 6)) is False
+
+
+def test_run_immediately_skips_refresh_when_current(store, monkeypatch):
+    scheduler = RefreshScheduler(store, AREA_JSON)
+    refreshed = []
+    monkeypatch.setattr(scheduler, "refresh", lambda: refreshed.append(True))
+    monkeypatch.setattr(scheduler, "is_stale", lambda: False)
+    scheduler.stop()
+    scheduler.run_forever(run_immediately=True)
+    assert refreshed == []
+
+    monkeypatch.setattr(scheduler, "is_stale", lambda: True)
+    scheduler.run_forever(run_immediately=True)
+    assert refreshed == [True]
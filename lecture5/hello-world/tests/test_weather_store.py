@@ -0,0 +1,206 @@
+"""weather_store（予報DBと読み出しキャッシュ）のテスト"""
+import sqlite3
+from contextlib import contextmanager
+
+import pytest
+
+from forecast_parser import build_report
+from weather_store import SCHEMA_VERSION, SQL_INSERT_FORECAST_VALUE, ForecastCache, WeatherStore
+
+OFFICE = "130000"
+MORNING = "2026-01-01T05:00:00+09:00"
+EVENING = "2026-01-01T17:00:00+09:00"
+
+
+def make_report(report_datetime, weather):
+    return build_report(report_datetime, ["2026-01-01T00:00:00+09:00", "2026-01-02T00:00:00+09:00"],
+                        [weather, weather], ["", "3"], ["10", "12"])
+
+
+@pytest.fixture
+def store(tmp_path):
+    store = WeatherStore(str(tmp_path / "weather.db"))
+    store.init_schema()
+    yield store
+    store.close()
+
+
+def test_save_and_load_latest(store):
+    store.save_forecasts([(OFFICE, make_report(MORNING, "晴れ"))])
+    store.save_forecasts([(OFFICE, make_report(EVENING, "くもり"))])
+    report = store.load_forecast(OFFICE)
+    assert report.report_datetime == EVENING
+    assert [record.weather for record in report.records] == ["くもり", "くもり"]
+    assert store.load_forecast(OFFICE, MORNING).records[0].weather == "晴れ"
+    assert store.latest_reports() == {OFFICE: EVENING}
+
+
+def test_save_invalidates_cached_latest(store):
+    store.save_forecasts([(OFFICE, make_report(MORNING, "晴れ"))])
+    assert store.load_forecast(OFFICE).report_datetime == MORNING
+    store.save_forecasts([(OFFICE, make_report(EVENING, "くもり"))])
+    assert store.load_forecast(OFFICE).report_datetime == EVENING
+
+
+def test_read_overlapping_save_is_not_cached(store):
+    """保存の前に読み始めた読み出しの結果は、無効化の後にキャッシュへ戻らない"""
+    store.save_forecasts([(OFFICE, make_report(MORNING, "晴れ"))])
+    connection = store.pool.connection
+    saved = {}
+
+    @contextmanager
+    def save_after_read():
+        with connection() as conn:
+            yield conn
+        if not saved:
+            # 読み出しが古い行を読み終えてから put() するまでの間に保存が終わる
+            saved["summary"] = None
+            saved["summary"] = store.save_forecasts([(OFFICE, make_report(EVENING, "くもり"))])
+
+    store.pool.connection = save_after_read
+    assert store.load_forecast(OFFICE).report_datetime == MORNING
+    store.pool.connection = connection
+
+    assert saved["summary"]["written"] == 2
+    assert store.cache.stats()["stale_puts"] == 1
+    assert store.load_forecast(OFFICE).report_datetime == EVENING
+
+
+def test_cache_put_skips_old_generation():
+    cache = ForecastCache()
+    key = ("forecast", OFFICE, None)
+    generation = cache.generation(OFFICE)
+    cache.invalidate(OFFICE)
+    cache.put(key, "stale", generation)
+    assert cache.get(key) is None
+
+    generation = cache.generation(OFFICE)
+    cache.invalidate("270000")
+    cache.put(key, "fresh", generation)
+    assert cache.get(key) == "fresh"
+
+    generation = cache.generation(OFFICE)
+    cache.clear()
+    cache.put(key, "stale", generation)
+    assert cache.get(key) is None
+
+
+# 最初の版の weather2.py が作っていたDB（user_version = 0）
+BASELINE_SCHEMA = """
+    CREATE TABLE centers (
+        center_code TEXT PRIMARY KEY,
+        center_name TEXT NOT NULL,
+        created_at TEXT NOT NULL
+    );
+    CREATE TABLE offices (
+        office_code TEXT PRIMARY KEY,
+        office_name TEXT NOT NULL,
+        center_code TEXT NOT NULL,
+        created_at TEXT NOT NULL,
+        FOREIGN KEY (center_code) REFERENCES centers(center_code)
+    );
+    CREATE TABLE forecasts (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        office_code TEXT NOT NULL,
+        forecast_date TEXT NOT NULL,
+        weather TEXT NOT NULL,
+        temp_min TEXT,
+        temp_max TEXT,
+        report_datetime TEXT NOT NULL,
+        fetched_at TEXT NOT NULL,
+        FOREIGN KEY (office_code) REFERENCES offices(office_code),
+        UNIQUE(office_code, forecast_date, report_datetime)
+    );
+    CREATE INDEX idx_forecasts_office ON forecasts(office_code, report_datetime DESC);
+"""
+
+BASELINE_ROWS = [
+    (OFFICE, "2026-01-01T05:00:00+09:00", "晴れ", "", "10", MORNING, "2026-01-01T05:10:00"),
+    (OFFICE, "2026-01-02T00:00:00+09:00", "くもり", "3", "12", MORNING, "2026-01-01T05:10:00"),
+    (OFFICE, "2026-01-01T17:00:00+09:00", "雨", "", "9", EVENING, "2026-01-01T17:10:00"),
+    (OFFICE, "2026-01-02T00:00:00+09:00", "雨", "4", "11", EVENING, "2026-01-01T17:10:00"),
+]
+
+
+def create_db(db_name, schema, rows, user_version):
+    conn = sqlite3.connect(db_name)
+    conn.executescript(schema)
+    conn.executemany(
+        "INSERT INTO forecasts (office_code, forecast_date, weather, temp_min, temp_max, report_datetime, fetched_at)"
+        " VALUES (?, ?, ?, ?, ?, ?, ?)", rows,
+    )
+    conn.execute(f"PRAGMA user_version = {user_version}")
+    conn.commit()
+    conn.close()
+
+
+def index_names(store):
+    with store.pool.connection() as conn:
+        return {row[0] for row in conn.execute("SELECT name FROM sqlite_master WHERE type = 'index'")}
+
+
+def test_migrate_baseline_db_to_latest(tmp_path):
+    db_name = str(tmp_path / "weather.db")
+    create_db(db_name, BASELINE_SCHEMA, BASELINE_ROWS, 0)
+
+    store = WeatherStore(db_name)
+    assert store.init_schema() is True
+    with store.pool.connection() as conn:
+        assert conn.execute("PRAGMA user_version").fetchone()[0] == SCHEMA_VERSION == 5
+        columns = {row[1] for row in conn.execute("PRAGMA table_info(forecasts)")}
+        rows = conn.execute(
+            "SELECT temp_min_value, temp_max_value, forecast_epoch, report_epoch, weather_code"
+            " FROM forecasts WHERE report_datetime = ? ORDER BY forecast_date", (EVENING,),
+        ).fetchall()
+        reports = conn.execute("SELECT report_datetime FROM reports ORDER BY report_datetime").fetchall()
+
+    assert {"temp_min_value", "temp_max_value", "forecast_epoch", "report_epoch", "weather_code"} <= columns
+    indexes = index_names(store)
+    assert "idx_forecasts_revision_days" in indexes
+    assert "idx_forecasts_revisions" not in indexes
+    assert rows == [
+        (None, 9.0, 1767254400, 1767254400, None),
+        (4.0, 11.0, 1767279600, 1767254400, None),
+    ]
+    assert reports == [(MORNING,), (EVENING,)]
+    assert store.latest_reports() == {OFFICE: EVENING}
+    assert [record.weather for record in store.load_forecast(OFFICE).records] == ["雨", "雨"]
+    # 2回目は user_version を読むだけ
+    assert store.init_schema() is False
+    store.close()
+
+
+def test_migrate_v4_backfills_weather_code(tmp_path):
+    db_name = str(tmp_path / "weather.db")
+    create_db(db_name, BASELINE_SCHEMA + """
+        ALTER TABLE forecasts ADD COLUMN temp_min_value REAL;
+        ALTER TABLE forecasts ADD COLUMN temp_max_value REAL;
+        ALTER TABLE forecasts ADD COLUMN forecast_epoch INTEGER;
+        ALTER TABLE forecasts ADD COLUMN report_epoch INTEGER;
+        CREATE TABLE forecast_values (
+            office_code TEXT NOT NULL,
+            report_datetime TEXT NOT NULL,
+            series TEXT NOT NULL,
+            area_code TEXT NOT NULL,
+            element TEXT NOT NULL,
+            time_define TEXT NOT NULL,
+            value TEXT,
+            PRIMARY KEY (office_code, report_datetime, series, area_code, element, time_define)
+        ) WITHOUT ROWID;
+    """, BASELINE_ROWS, 4)
+    conn = sqlite3.connect(db_name)
+    conn.executemany(SQL_INSERT_FORECAST_VALUE, [
+        (OFFICE, EVENING, "short", "130010", "weathers", "2026-01-01T17:00:00+09:00", "雨"),
+        (OFFICE, EVENING, "short", "130010", "weatherCodes", "2026-01-01T17:00:00+09:00", "300"),
+        # 天気文が違う地域のコードは使わない
+        (OFFICE, EVENING, "short", "130020", "weathers", "2026-01-02T00:00:00+09:00", "晴れ"),
+        (OFFICE, EVENING, "short", "130020", "weatherCodes", "2026-01-02T00:00:00+09:00", "100"),
+    ])
+    conn.commit()
+    conn.close()
+
+    store = WeatherStore(db_name)
+    store.init_schema()
+    report = store.load_forecast(OFFICE, EVENING)
+    assert [record.weather_code for record in report.records] == ["300", None]
+    store.close()
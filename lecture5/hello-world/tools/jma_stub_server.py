@@ -0,0 +1,118 @@
+"""気象庁APIの代わりに記録済みのJSONを返すローカルサーバ
+
+fixtures/ 以下を気象庁と同じパス構成で配信する（record_fixtures.py で実際の
+レスポンスを記録できる）。
+    /bosai/common/const/area.json
+    /bosai/forecast/data/forecast/{code}.json
+
+応答の遅延（latency + 0〜jitter 秒）と、一定の割合で 503 を返す失敗を設定できる。
+
+実行: python tools/jma_stub_server.py [--port 8000] [--root tools/fixtures]
+                                      [--latency-ms 50] [--jitter-ms 20] [--failure-rate 0.02]
+アプリ側は環境変数 JMA_BASE_URL=http://127.0.0.1:8000 、フェッチャ側は base_url に渡す。
+"""
+import argparse
+import functools
+import os
+import random
+import threading
+import time
+from http.server import SimpleHTTPRequestHandler, ThreadingHTTPServer
+
+FIXTURES_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "fixtures")
+
+
+class StubHandler(SimpleHTTPRequestHandler):
+    """fixtures を配信するハンドラ（アクセスログは出さない）"""
+
+    extensions_map = {**SimpleHTTPRequestHandler.extensions_map, ".json": "application/json"}
+
+    def do_GET(self):
+        delay, fail = self.server.plan_request()
+        if delay > 0:
+            time.sleep(delay)
+        if fail:
+            self.send_error(503, "stub failure")
+            return
+        super().do_GET()
+
+    def log_message(self, format, *args):
+        pass
+
+
+class StubServer(ThreadingHTTPServer):
+    """遅延と失敗率を設定できるスタブサーバ（リクエスト数・失敗数を数える）"""
+
+    daemon_threads = True
+    request_queue_size = 128
+
+    def __init__(self, address, handler, latency=0.0, jitter=0.0, failure_rate=0.0, seed=None):
+        super().__init__(address, handler)
+        self.latency = latency
+        self.jitter = jitter
+        self.failure_rate = failure_rate
+        self._random = random.Random(seed)
+        self._lock = threading.Lock()
+        self.requests = 0
+        self.failures = 0
+
+    def plan_request(self):
+        """1リクエスト分の (遅延秒, 失敗させるか) を決める"""
+        with self._lock:
+            self.requests += 1
+            delay = self.latency + (self._random.uniform(0, self.jitter) if self.jitter else 0.0)
+            fail = self.failure_rate > 0 and self._random.random() < self.failure_rate
+            if fail:
+                self.failures += 1
+        return delay, fail
+
+    def stats(self):
+        with self._lock:
+            return {"requests": self.requests, "failures": self.failures}
+
+
+def make_stub_server(root=FIXTURES_DIR, host="127.0.0.1", port=0, latency=0.0, jitter=0.0,
+                     failure_rate=0.0, seed=None):
+    handler = functools.partial(StubHandler, directory=root)
+    return StubServer((host, port), handler, latency, jitter, failure_rate, seed)
+
+
+def start_stub_server(root=FIXTURES_DIR, host="127.0.0.1", port=0, latency=0.0, jitter=0.0,
+                      failure_rate=0.0, seed=None):
+    """スタブサーバを別スレッドで起動し、(server, base_url) を返す
+
+    port=0 の場合は空いているポートが割り当てられる。停止は server.shutdown()。
+    latency/jitter は秒、failure_rate は 503 を返す割合（0〜1）。
+    """
+    server = make_stub_server(root, host, port, latency, jitter, failure_rate, seed)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    return server, f"http://{host}:{server.server_address[1]}"
+
+
+def main():
+    parser = argparse.ArgumentParser(description="気象庁APIのスタブサーバ")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8000)
+    parser.add_argument("--root", default=FIXTURES_DIR)
+    parser.add_argument("--latency-ms", type=float, default=0.0, help="応答までの遅延")
+    parser.add_argument("--jitter-ms", type=float, default=0.0, help="遅延に加えるばらつきの最大値")
+    parser.add_argument("--failure-rate", type=float, default=0.0, help="503 を返す割合 (0〜1)")
+    parser.add_argument("--seed", type=int, help="遅延・失敗の乱数のシード")
+    args = parser.parse_args()
+
+    server = make_stub_server(
+        args.root, args.host, args.port,
+        args.latency_ms / 1000, args.jitter_ms / 1000, args.failure_rate, args.seed,
+    )
+    print(f"http://{args.host}:{args.port} で {args.root} を配信中 (Ctrl+Cで終了)")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,57 @@
+"""気象庁APIのレスポンスを fixtures/ に記録する（jma_stub_server.py で再生する）
+
+area.json と、指定したオフィス（省略時は area.json の全オフィス）の予報JSONを、
+気象庁と同じパス構成で保存する。
+
+実行: python tools/record_fixtures.py [--root tools/fixtures] [--offices 130000 270000]
+"""
+import argparse
+import json
+import os
+import sys
+import time
+
+import requests
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "src"))
+
+from jma_client import AREA_PATH, FORECAST_PATH, get_base_url  # noqa: E402
+
+FIXTURES_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "fixtures")
+
+
+def record(session, base_url, path, root):
+    """base_url + path を取得して root + path に保存し、本文を返す"""
+    response = session.get(base_url + path, timeout=10)
+    response.raise_for_status()
+    target = os.path.join(root, *path.strip("/").split("/"))
+    os.makedirs(os.path.dirname(target), exist_ok=True)
+    with open(target, "wb") as f:
+        f.write(response.content)
+    return response.content
+
+
+def main():
+    parser = argparse.ArgumentParser(description="気象庁APIのレスポンスを記録")
+    parser.add_argument("--base-url", default=get_base_url())
+    parser.add_argument("--root", default=FIXTURES_DIR)
+    parser.add_argument("--offices", nargs="*", help="記録するオフィスコード（省略時は全オフィス）")
+    parser.add_argument("--interval", type=float, default=0.2, help="リクエストの間隔（秒）")
+    args = parser.parse_args()
+
+    session = requests.Session()
+    area_body = record(session, args.base_url, AREA_PATH, args.root)
+    total = len(area_body)
+    offices = args.offices or list(json.loads(area_body)["offices"])
+
+    for code in offices:
+        time.sleep(args.interval)
+        try:
+            total += len(record(session, args.base_url, FORECAST_PATH.format(code), args.root))
+        except requests.RequestException as e:
+            print(f"  {code}: {e}")
+    print(f"area.json と {len(offices)} オフィスの予報を記録 ({total / 1024:.0f}KB) → {args.root}")
+
+
+if __name__ == "__main__":
+    main()